@@ -1,207 +1,817 @@
 import os
 import re
 import sys
+import csv
+import io
+import json
+import heapq
+import sqlite3
+import argparse
+import contextlib
 import datetime
-from collections import defaultdict
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from src.series import TimeSeries, format_epoch, parse_epoch
+from src.analysis_cache import AnalysisCache
+from src.downsample import DEFAULT_POINT_BUDGET
+from src.html_report import HtmlReportWriter
+from src.log_sources import LogcatSource, rotated_paths
+from src.crash_index import CrashIndex
+from src.trend import analyze_trend
+from src.sketches import WindowedSketch, merge_sketches
+from src.step_stats import StepStats, bucket_labels
+from src.step_index import POSITION_BASE, StepIndex, encode_positions
+from src.range_index import RangeIndex
+from src.run_store import RunStore
 
 
 class StressLogAnalyzer:
+    STATE_VERSION = 8
+    # 监控曲线 (图表 / 导出 / 历史库)
+    CURVE_KEYS = ("mem_records", "cpu_records", "temp_records", "net_records", "recovery_records", "step_records")
+    # 按列存储的全部数据 (状态文件 / 分析缓存)，step_pos_records 是步骤位置索引，不画图
+    SERIES_KEYS = CURVE_KEYS + ("step_pos_records",)
+    READ_BLOCK = 4 * 1024 * 1024
+    REPORT_MODES = ("standalone", "echarts")
+    # 分位数统计的指标 -> (曲线, 单位)
+    SKETCH_METRICS = {"ping": ("net_records", "ms"), "cpu": ("cpu_records", "%"), "mem": ("mem_records", "MB"),
+                      "step": ("step_records", "ms")}
+    # Ping 超时在日志里记为 1000ms，单独计数，不参与延迟分位数
+    PING_TIMEOUT_MS = 1000
+    # 解析时维护的分位数草图的时间窗 (秒)
+    SKETCH_WINDOW = 3600
+
     def __init__(self, log_path):
         self.log_path = log_path
+        self.reset()
+
+    def reset(self):
+        """清空解析结果和增量状态"""
         self.data = {
             "start_time": None,
             "end_time": None,
+            "start_epoch": None,
+            "end_epoch": None,
             "duration": "N/A",
             "target_pkg": "Unknown",
             "total_actions": 0,
-            "mem_records": [],
-            "cpu_records": [],
-            "temp_records": [],
-            "net_records": [],
+            # 监控曲线按列存储 (epoch 秒 + 紧凑数值)，见 src/series.py
+            "mem_records": TimeSeries("int32"),
+            "cpu_records": TimeSeries("float32"),
+            "temp_records": TimeSeries("int16"),
+            "net_records": TimeSeries("float32"),
             "net_failures": 0,
+            "recovery_records": TimeSeries("int32"),
+            # 带计时的步骤: 结束时间 (日志行时间) + 耗时 ms；按类型 / Sheet 的直方图见 step_stats
+            "step_records": TimeSeries("int32"),
+            "step_stats": StepStats(),
+            # 每个计时步骤的位置 (Sheet * 10000 + Step，见 src/step_index.py)，错误关联步骤时用
+            "step_pos_records": TimeSeries("int32"),
+            # 步骤 id ("Sheet.Step") -> 动作类型
+            "step_actions": {},
+            "recovery_failures": 0,
+            "pace_records": [],
             "errors": defaultdict(int),
             "warnings": 0,
             "snapshots": [],
             "error_timeline": [],
+            # [DEVICE] 行记录的设备 / 版本信息: model / serial / android / build / app
+            "run_info": {},
         }
+        # 增量解析时，上一批数据末尾不完整的半行 (bytes，可能含被截断的多字节字符)
+        self._partial = b""
+        # parse_incremental() 已经读到的文件位置，以及文件身份 (判断是否被替换)
+        self._offset = 0
+        self._inode = None
+        # 并行解析合并时需要知道: 本段是否显式设置过目标包名 / 开始时间 (后出现的覆盖先出现的)
+        self._target_set = False
+        self._start_override = None
+        # 快速路径里攒着、还没统计的标准计时步骤行 (见 _consume_complete)
+        self._step_rows = []
+        # _to_epoch 的分钟前缀缓存
+        self._minute_prefix = None
+        self._minute_epoch = 0
+        # 曲线的多粒度预聚合 (每分钟 / 10 分钟 / 1 小时)，网页缩放和报告下钻用，见 src/range_index.py
+        self.range_index = RangeIndex()
+        # 分位数草图随解析增量维护 (见 update_sketches)，每个指标记着已经并进去的点数和对应的曲线
+        self.sketches = {name: WindowedSketch(self.SKETCH_WINDOW) for name in self.SKETCH_METRICS}
+        self._sketch_seen = {}
+        self._sketch_sources = {}
+
+    # =========================================================
+    # 正则 (清理了重复定义，只保留核心)
+    # =========================================================
+
+    # 主正则: 提取开头的标准时间 [2025-12-24 10:00:00]
+    re_master = re.compile(r"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\]\s+(.+)")
+
+    # 子正则: 用于匹配具体内容 (Content)
+    re_status = re.compile(r"\[STATUS\]\s+Mem:(?P<mem>\d+)MB(?:.*CPU:(?P<cpu>[\d\.]+)%)?(?:.*Temp:(?P<temp>\d+)C)?")
+    re_net = re.compile(r"\[NETWORK\].*?Ping:(?P<val>.+)")
+    re_action = re.compile(r"\[.+?\]\[#\d+\]\s+(.+)")
+    re_pace = re.compile(r"\[PACE\]\s+Sheet:(?P<sheet>.*?)\s*\|\s*Target:(?P<target>[\d\.]+)apm\s*\|\s*Actual:(?P<actual>[\d\.]+)apm\s*\|\s*Steps:(?P<steps>\d+)")
+    re_recovery = re.compile(r"\[RECOVERY\]\s+(?P<kind>\S+)\s*\|\s*Latency:(?P<ms>\d+)ms\s*\|\s*Result:(?P<res>\w+)")
+    re_target_start = re.compile(r"=== 压测开始: (?:目标 )?(\S+) ===")
+    re_device = re.compile(r"\[DEVICE\]\s+(.*)")
+    # "[STEP][#12] 1.3 CLICK 点击: 500, 1000 | Start:8123456 | End:8123690" (开始 / 结束为开机毫秒数)
+    re_step = re.compile(r"\[STEP\]\[#(\d+)\]\s+(\d+\.\d+)\s+(\S+)\s+(.*?)\s*\|\s*Start:(\d+)\s*\|\s*End:(\d+)\s*$")
+    re_header_target = re.compile(r"(?:Target:|目标)\s+([a-zA-Z0-9\._]+)")
+    re_header_start = re.compile(r"Log-Term Stress Test Start:\s+(.+)")
 
-    def parse(self):
+    def parse(self, engine="fast"):
+        """
+        :param engine: "fast" 按字节块读取 + 定长时间戳分派 (默认)；
+                       "regex" 是原来的逐行正则解析，保留作为对照基准
+        """
         if not os.path.exists(self.log_path):
             print(f"错误: 找不到日志文件 {self.log_path}")
             return False
 
         print(f"正在分析日志: {self.log_path} ...")
 
-        # =========================================================
-        # 1. 定义正则 (清理了重复定义，只保留核心)
-        # =========================================================
+        if engine == "regex":
+            with open(self.log_path, 'r', encoding='utf-8', errors='ignore') as f:
+                for line in f:
+                    self._consume_line(line)
+        else:
+            with open(self.log_path, "rb") as f:
+                for block in iter(lambda: f.read(self.READ_BLOCK), b""):
+                    self._consume_block(block)
+            # 文件最后一行可能没有换行符
+            self._consume_complete(self._partial)
+            self._partial = b""
 
-        # 主正则: 提取开头的标准时间 [2025-12-24 10:00:00]
-        re_master = re.compile(r"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\]\s+(.+)")
+        self._calc_duration()
+        self.update_range_index()
+        self.update_sketches()
+        return True
 
-        # 子正则: 用于匹配具体内容 (Content)
-        re_status = re.compile(r"\[STATUS\]\s+Mem:(?P<mem>\d+)MB(?:.*CPU:(?P<cpu>[\d\.]+)%)?(?:.*Temp:(?P<temp>\d+)C)?")
-        re_net = re.compile(r"\[NETWORK\].*?Ping:(?P<val>.+)")
-        re_action = re.compile(r"\[.+?\]\[#\d+\]\s+(.+)")
-        re_target_start = re.compile(r"=== 压测开始: 目标 (.+) ===")
+    def feed(self, chunk):
+        """
+        增量喂入新追加的日志 (实时跟踪用)，可以是 bytes 或 str，
+        末尾不完整的半行留到下次拼接
+        """
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        self._consume_block(chunk)
+        self._calc_duration()
+        self.update_range_index()
+        self.update_sketches()
 
-        re_header_target = re.compile(r"(?:Target:|目标)\s+([a-zA-Z0-9\._]+)")
-        re_header_start = re.compile(r"Log-Term Stress Test Start:\s+(.+)")
+    # =========================================================
+    # 快速路径: 按字节处理，只解码真正需要的行
+    # =========================================================
+    # 时间戳 "[YYYY-MM-DD HH:MM:SS]" 去掉数字后的形状
+    _TS_SHAPE = b"-- ::"
+    _DIGITS = b"0123456789"
+    # 只影响首尾时间的噪声标签 (每个 Step 都会打一条)
+    _NOISE_TAGS = frozenset([b"[STEP]", b"[INFO]", b"[COOLDOWN]", b"[RESUME]", b"[FEISHU]"])
+    # 不带方括号、但会被 _consume_content 处理的关键字
+    _PLAIN_MARKERS = (b"Target:", "目标".encode("utf-8"), b"CRITICAL_", "=== 压测开始".encode("utf-8"))
+    # 标准格式的计时步骤行 (每个 Step 一条，占日志的绝大多数)。
+    # 分隔都是单个空格、描述里没有 '[' 的行不会命中 _consume_content 的其他分类，re_step 的解析结果
+    # 也只差描述首尾的空白，所以可以和噪声行一起整块跳过，再用 finditer 批量取出计时；其他写法的步骤行仍逐行处理
+    _STEP_LINE = (rb"\[(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\] \[STEP\]\[#(\d+)\] (\d+\.\d+) ([A-Z_]+) "
+                  rb"([^\[\r\n]*?) \| Start:(\d+) \| End:(\d+)\n")
+    re_step_line = re.compile(rb"(?m)^" + _STEP_LINE)
+    # 从当前位置开始，一次跳过连续的噪声行 (标准时间戳 + 噪声标签，后面不再有 '['; 或标准计时步骤行) 和空行
+    re_noise_run = re.compile(
+        rb"(?:\[\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\] \[(?:"
+        + b"|".join(t[1:-1] for t in sorted(_NOISE_TAGS))
+        + rb")\][^\[\r\n]*\n|" + re.sub(rb"\((?!\?)", b"(?:", _STEP_LINE) + rb"|\n)*")
 
-        with open(self.log_path, 'r', encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                line = line.strip()
-                if not line: continue
+    def _consume_block(self, block):
+        """拼上上次的半行，处理完整的行，新的半行留到下次"""
+        buf = self._partial + block
+        cut = buf.rfind(b"\n")
+        if cut < 0:
+            self._partial = buf
+            return
+        self._partial = buf[cut + 1:]
+        self._consume_complete(buf[:cut + 1])
 
+    def _consume_complete(self, buf):
+        """
+        处理一段完整的行。噪声行在 C 层 (正则 + bytes.find) 整块跳过，只取首尾时间戳；
+        其余的行 (通常只占几个百分点) 交给 _consume_lines 逐行分派。
+        """
+        # 噪声行里出现 Target: / CRITICAL_ 等关键字时，不能整段跳过
+        marked = set()
+        for marker in self._PLAIN_MARKERS:
+            i = buf.find(marker)
+            while i >= 0:
+                marked.add(buf.rfind(b"\n", 0, i) + 1)
+                i = buf.find(b"\n", i)
+                if i < 0:
+                    break
+                i = buf.find(marker, i)
+        marked = sorted(marked)
 
+        # 标准计时步骤行先攒起来，整块处理完再批量统计 (numpy 每批有固定开销，批越大越划算)
+        self._step_rows = []
+        pos, mi, size = 0, 0, len(buf)
+        while pos < size:
+            run_end = self.re_noise_run.match(buf, pos).end()
+            while mi < len(marked) and marked[mi] < pos:
+                mi += 1
+            if mi < len(marked) and marked[mi] < run_end:
+                run_end = marked[mi]
+            if run_end > pos:
+                self._consume_noise(buf, pos, run_end)
+            if run_end >= size:
+                break
+            line_end = buf.find(b"\n", run_end)
+            if line_end < 0:
+                line_end = size
+            self._consume_lines([buf[run_end:line_end]])
+            pos = line_end + 1
+        self._flush_steps()
 
-                # --- 第一步：主正则拆解 ---
-                m_master = re_master.match(line)
+    def _consume_noise(self, buf, start, end):
+        """buf[start:end] 全是噪声行、标准计时步骤行或空行: 步骤行批量统计耗时，其余只更新开始 / 结束时间"""
+        if b"[STEP][#" in buf[start:end]:
+            self._step_rows.extend(self.re_step_line.findall(buf, start, end))
+        while start < end and buf[start] == 0x0A:
+            start += 1
+        while end > start and buf[end - 1] == 0x0A:
+            end -= 1
+        if start >= end:
+            return
+        if self.data["start_time"] is None:
+            self.data["start_time"] = buf[start + 1:start + 20].decode()
+        last = buf.rfind(b"\n", start, end) + 1 or start
+        self.data["end_time"] = buf[last + 1:last + 20].decode()
 
-                if not m_master: continue
+    def _consume_lines(self, lines):
+        """
+        快速路径和 _consume_line 的结果必须完全一致:
+        标准格式的行在字节层面判断；任何拿不准的行 (非 ASCII 空白、没对齐的时间戳等)
+        整行解码后交给 _consume_line 处理。
+        """
+        data = self.data
+        noise_tags = self._NOISE_TAGS
+        markers = self._PLAIN_MARKERS
+        ts_shape, digits = self._TS_SHAPE, self._DIGITS
+        last_ts = None  # 噪声行只记下时间戳，最后再解码写入 end_time
 
-                # 如果这行连时间头都没有（比如Crash堆栈），直接跳过
+        for raw in lines:
+            line = raw.strip()
+            if not line:
+                continue
+            c0, c_last = line[0], line[-1]
 
-                time_str = m_master.group(1)
-                content = m_master.group(2)
+            # 文本模式下单独的 \r 也算换行；行首可能是非法字节 / Unicode 空白 (解码 + strip 会去掉)
+            if b"\r" in line or c0 >= 0x80 or c0 < 0x20 or 0x1C <= c_last <= 0x1F:
+                if last_ts is not None:
+                    data["end_time"] = last_ts.decode()
+                    last_ts = None
+                for part in raw.split(b"\r"):
+                    self._consume_line(part.decode("utf-8", errors="ignore"))
+                continue
 
-                if self.data["start_time"] is None:
-                    self.data["start_time"] = time_str
-                self.data["end_time"] = time_str
-
-
-                # time_str = m_master.group(1)
-                # content = m_master.group(2)  # 去掉时间后的纯内容
-
-                # --- 第二步：分类解析 ---
-
-                if "Target:" in content or "目标" in content:
-                    m_t = re_header_target.search(content)
-                    if m_t:
-                        self.data["target_pkg"] = m_t.group(1)
-                        # 如果还没找到开始时间，但这行有时间戳，就用这行的时间
-                        if self.data["start_time"] is None and m_master:
-                            self.data["start_time"] = time_str
-
-                # 1. 状态监控 (STATUS)
-                if "[STATUS]" in content:
-                    m = re_status.search(content)
-                    if m:
-                        # 内存
-                        self.data["mem_records"].append((time_str, int(m.group("mem"))))
-                        # CPU
-                        if m.group("cpu"):
-                            try:
-                                self.data["cpu_records"].append((time_str, float(m.group("cpu"))))
-                            except:
-                                pass
-                        # 温度
-                        if m.group("temp"):
-                            try:
-                                self.data["temp_records"].append((time_str, int(m.group("temp"))))
-                            except:
-                                pass
-                    continue
+            if c0 != 0x5B:  # '[' 开头才可能有时间戳 (比如 Crash 堆栈直接跳过)
+                continue
 
-                # 2. 网络监控 (NETWORK)
-                if "[NETWORK]" in content:
-                    m = re_net.search(content)
-                    if m:
-                        val_str = m.group("val").strip()
-                        if "TIMEOUT" in val_str or "FAIL" in val_str:
-                            self.data["net_failures"] += 1
-                            self.data["net_records"].append((time_str, 1000))
-                        else:
-                            try:
-                                latency = float(re.sub(r"[^0-9\.]", "", val_str))
-                                self.data["net_records"].append((time_str, latency))
-                            except:
-                                pass
-                    continue
+            ts = line[1:20]
+            ok = (len(line) >= 23 and line[20] == 0x5D and line[21] in (0x20, 0x09)
+                  and ts[4] == 0x2D and ts[7] == 0x2D and ts[10] == 0x20 and ts[13] == 0x3A and ts[16] == 0x3A
+                  and ts.translate(None, digits) == ts_shape)
+            if ok:
+                content = line[22:]
+                if content[0] in (0x20, 0x09, 0x0B, 0x0C):
+                    content = content.lstrip()
+                ok = 0x20 <= content[0] < 0x80
+            if not ok:
+                if last_ts is not None:
+                    data["end_time"] = last_ts.decode()
+                    last_ts = None
+                self._consume_line(line.decode("utf-8", errors="ignore"))
+                continue
 
-                # 3. 动作记录 (包含 [#数字])
-                if "[#" in content:
-                    m = re_action.search(content)
-                    if m:
-                        self.data["total_actions"] += 1
+            if content[0] == 0x5B:
+                end = content.find(b"]")
+                if (end > 0 and content[:end + 1] in noise_tags and content.find(b"[", end) < 0
+                        and not any(m in content for m in markers)):
+                    if data["start_time"] is None:
+                        data["start_time"] = ts.decode()
+                    last_ts = ts
                     continue
 
-                # 4. 严重错误 (CRITICAL)
-                if "CRITICAL_" in content:
-                    err_type = "SYSTEM_ERROR"
-                    if "OOM" in content:
-                        err_type = "OOM"
-                    elif "MEDIA" in content:
-                        err_type = "MEDIA"
-                    elif "AUDIO" in content:
-                        err_type = "AUDIO"
-                    elif "KERNEL" in content:
-                        err_type = "KERNEL"
-
-                    self.data["errors"][err_type] += 1
-                    self.data["error_timeline"].append({
-                        "time": time_str,
-                        "type": err_type,
-                        "msg": content
-                    })
-                    continue
+            time_str = ts.decode()
+            if data["start_time"] is None:
+                data["start_time"] = time_str
+            data["end_time"] = time_str
+            last_ts = None
 
-                # 5. 其他信息
-                if "[WARN]" in content:
-                    self.data["warnings"] += 1
-                elif "[SNAPSHOT]" in content:
-                    snap_name = content.split(" ")[-1]
-                    self.data["snapshots"].append(snap_name)
-                elif "=== 压测开始" in content:
-                    m = re_target_start.search(content)
-                    if m:
-                        self.data["target_pkg"] = m.group(1)
-                        self.data["start_time"] = time_str
+            text = content.decode("utf-8", errors="ignore")
+            if c_last >= 0x80:
+                # 结尾的非法字节解码时被丢掉，或者是 Unicode 空白，和原解析器一样再去一次尾部空白
+                text = text.rstrip()
+            self._consume_content(time_str, text)
+
+        if last_ts is not None:
+            data["end_time"] = last_ts.decode()
+
+    # =========================================================
+    # 并行模式: 按行边界把文件切成几段，每段一个进程解析，再按顺序合并
+    # =========================================================
+    PARALLEL_MIN_CHUNK = 16 * 1024 * 1024
+
+    def parse_parallel(self, workers=None):
+        """
+        多进程解析大文件，结果和 parse() 完全一致。
+        文件太小 (每段不到 PARALLEL_MIN_CHUNK) 时直接串行解析，省掉进程启动的开销。
+        """
+        if not os.path.exists(self.log_path):
+            print(f"错误: 找不到日志文件 {self.log_path}")
+            return False
+
+        size = os.path.getsize(self.log_path)
+        workers = min(workers or os.cpu_count() or 1, size // self.PARALLEL_MIN_CHUNK)
+        if workers <= 1:
+            return self.parse()
+
+        ranges = self.split_ranges(self.log_path, workers)
+        print(f"正在分析日志: {self.log_path} ({len(ranges)} 段并行) ...")
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            partials = list(pool.map(_parse_range, [self.log_path] * len(ranges),
+                                     [r[0] for r in ranges], [r[1] for r in ranges]))
+        for part in partials:
+            self.merge_partial(part)
+
+        self._calc_duration()
+        self.update_range_index()
+        self.update_sketches()
+        return True
+
+    @staticmethod
+    def split_ranges(path, parts):
+        """把文件切成 parts 段 [start, end)，每段都从行首开始"""
+        size = os.path.getsize(path)
+        bounds = [0]
+        with open(path, "rb") as f:
+            for i in range(1, parts):
+                f.seek(max(size * i // parts, bounds[-1]))
+                f.readline()  # 跳到下一行行首
+                pos = f.tell()
+                if pos >= size:
+                    break
+                if pos > bounds[-1]:
+                    bounds.append(pos)
+        bounds.append(size)
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def parse_range(self, start, end):
+        """只解析文件的 [start, end) 字节 (start 必须是行首)，返回可合并的部分结果"""
+        with open(self.log_path, "rb") as f:
+            f.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                block = f.read(min(self.READ_BLOCK, remaining))
+                if not block:
+                    break
+                remaining -= len(block)
+                self._consume_block(block)
+        self._consume_complete(self._partial)
+        self._partial = b""
+        return {"data": self.data, "target_set": self._target_set, "start_override": self._start_override,
+                "sketches": self.update_sketches()}
+
+    def merge_partial(self, part):
+        """按文件顺序合并一段的部分结果，语义和串行解析一致"""
+        d, p = self.data, part["data"]
+        self.update_sketches()
+
+        # 开始时间: 第一段的第一条时间；之后 "=== 压测开始" 显式设置的会覆盖
+        if part["start_override"]:
+            d["start_time"] = part["start_override"]
+        elif d["start_time"] is None:
+            d["start_time"] = p["start_time"]
+        if p["end_time"] is not None:
+            d["end_time"] = p["end_time"]
+        if part["target_set"]:
+            d["target_pkg"] = p["target_pkg"]
+            self._target_set = True
+        if part["start_override"]:
+            self._start_override = part["start_override"]
+
+        for key in ("total_actions", "net_failures", "recovery_failures", "warnings"):
+            d[key] += p[key]
+        for err_type, count in p["errors"].items():
+            d["errors"][err_type] += count
+        d["run_info"].update(p["run_info"])
+        d["step_stats"].merge(p["step_stats"])
+        d["step_actions"].update(p["step_actions"])
+        for key in ("pace_records", "snapshots", "error_timeline"):
+            d[key].extend(p[key])
+        for key in self.SERIES_KEYS:
+            d[key].extend(p[key])
+        # 每段的草图在 worker 里已经建好，直接合并，不再把这一段的点重新过一遍
+        for name, (key, _) in self.SKETCH_METRICS.items():
+            self.sketches[name].merge(part["sketches"][name])
+            self._sketch_seen[name] += len(p[key])
+
+    # =========================================================
+    # 增量模式: 只解析上次之后新追加的字节
+    # =========================================================
+    def parse_incremental(self):
+        """
+        从上次停下的偏移量继续读文件，已有的统计结果在此基础上累加。
+        文件变短或被替换 (inode 变了) 时，清空结果从头分析。
+        """
+        if not os.path.exists(self.log_path):
+            print(f"错误: 找不到日志文件 {self.log_path}")
+            return False
+
+        st = os.stat(self.log_path)
+        if st.st_size < self._offset or (self._inode is not None and self._inode != st.st_ino):
+            print(f"⚠️ 日志文件被截断或替换，重新从头分析: {self.log_path}")
+            self.reset()
+        self._inode = st.st_ino
+
+        with open(self.log_path, "rb") as f:
+            f.seek(self._offset)
+            for block in iter(lambda: f.read(self.READ_BLOCK), b""):
+                self._offset += len(block)
+                self._consume_block(block)
 
         self._calc_duration()
+        self.update_range_index()
+        self.update_sketches()
         return True
 
+    def export_state(self):
+        """增量状态的元数据 (偏移量、半行、聚合结果)，曲线另外由 self.data 里的 TimeSeries 保存"""
+        return {
+            "version": self.STATE_VERSION,
+            "offset": self._offset,
+            "inode": self._inode,
+            # 半行是 bytes (可能截断在多字节字符中间)，latin-1 可以原样往返
+            "partial_line": self._partial.decode("latin-1"),
+            "sketches": {name: sk.to_state() for name, sk in self.update_sketches().items()},
+            "sketch_seen": self._sketch_seen,
+            "data": {k: (dict(v) if k == "errors" else v.to_state() if k == "step_stats" else v)
+                     for k, v in self.data.items() if k not in self.SERIES_KEYS},
+        }
+
+    def import_state(self, meta, series):
+        """
+        export_state 的逆操作，series 是 {曲线名: TimeSeries}。
+        版本不一致时保持空状态并返回 False。
+        """
+        self.reset()
+        if meta.get("version") != self.STATE_VERSION:
+            return False
+
+        data = dict(meta["data"])
+        data["errors"] = defaultdict(int, data["errors"])
+        data["step_stats"] = StepStats.from_state(data["step_stats"])
+        self.data.update(data)
+        for key in self.SERIES_KEYS:
+            self.data[key] = series[key]
+        self.sketches = {name: WindowedSketch.from_state(state) for name, state in meta["sketches"].items()}
+        self._sketch_seen = dict(meta["sketch_seen"])
+        self._sketch_sources = {name: self.data[key] for name, (key, _) in self.SKETCH_METRICS.items()}
+
+        self._offset = meta["offset"]
+        self._inode = meta["inode"]
+        self._partial = meta["partial_line"].encode("latin-1")
+        return True
+
+    def save_state(self, state_path=None):
+        """保存增量状态，另一个进程可以 load_state 后接着分析"""
+        state_path = state_path or self.log_path + ".state.json"
+        state = self.export_state()
+        state["series"] = {k: self.data[k].to_state() for k in self.SERIES_KEYS}
+        tmp_path = state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, state_path)
+        return state_path
+
+    def load_state(self, state_path=None):
+        """
+        读取 save_state 保存的状态，返回是否成功。
+        状态文件不存在 / 损坏 / 版本不一致时保持空状态，下次 parse_incremental 从头分析。
+        """
+        state_path = state_path or self.log_path + ".state.json"
+        self.reset()
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            series = {k: TimeSeries.from_state(v) for k, v in state.get("series", {}).items()}
+        except (OSError, ValueError, KeyError):
+            return False
+        if set(series) != set(self.SERIES_KEYS):
+            return False
+        return self.import_state(state, series)
+
+    # =========================================================
+    # 分析缓存: 同一份日志不重复解析，只变长了就在缓存结果上增量解析
+    # =========================================================
+    def parse_cached(self, cache=None, workers=1):
+        """
+        :param cache: AnalysisCache，默认用系统临时目录下的缓存
+        :param workers: 没有缓存时用几个进程解析 (None = CPU 核数)
+        """
+        if not os.path.exists(self.log_path):
+            print(f"错误: 找不到日志文件 {self.log_path}")
+            return False
+
+        cache = cache or AnalysisCache()
+        status = cache.load(self.log_path, self)
+        if status == "hit":
+            print(f"✅ 命中分析缓存: {self.log_path}")
+        elif status == "grown":
+            print(f"日志有新增，在缓存结果上继续分析: {self.log_path} ...")
+        else:
+            self.reset()
+            size = os.path.getsize(self.log_path)
+            with open(self.log_path, "rb") as f:
+                f.seek(max(0, size - 1))
+                ends_with_newline = f.read(1) == b"\n"
+            # 并行解析会把最后一行也算进去，只有以换行结尾时才能接上增量状态
+            if workers != 1 and ends_with_newline:
+                self.parse_parallel(workers)
+                self._offset = size
+            else:
+                print(f"正在分析日志: {self.log_path} ...")
+
+        # 上传的日志每次都是新的临时文件，身份由缓存的内容哈希保证，这里不再比较 inode
+        self._inode = None
+        offset = self._offset
+        self.parse_incremental()
+        if status != "hit" or self._offset != offset:
+            cache.save(self.log_path, self)
+
+        # 最后一行可能没有换行符: 缓存里保留的是半行，展示结果时把它也算上
+        self._consume_complete(self._partial)
+        self._partial = b""
+        self._calc_duration()
+        self.update_range_index()
+        self.update_sketches()
+        return True
+
+    def _consume_line(self, line):
+        """解析一行日志，更新 self.data"""
+        line = line.strip()
+        if not line: return
+
+        # --- 第一步：主正则拆解 ---
+        # 如果这行连时间头都没有（比如Crash堆栈），直接跳过
+        m_master = self.re_master.match(line)
+        if not m_master: return
+
+        time_str = m_master.group(1)
+        content = m_master.group(2)  # 去掉时间后的纯内容
+
+        if self.data["start_time"] is None:
+            self.data["start_time"] = time_str
+        self.data["end_time"] = time_str
+
+        self._consume_content(time_str, content)
+
+    def _to_epoch(self, time_str):
+        """
+        'YYYY-MM-DD HH:MM:SS' -> epoch 秒。
+        相邻的行基本都在同一分钟里，缓存 "日期 + 时:分" 前缀对应的 epoch，只解析秒数。
+        """
+        prefix = time_str[:17]
+        if prefix != self._minute_prefix:
+            self._minute_epoch = parse_epoch(prefix + "00")
+            self._minute_prefix = prefix
+        return self._minute_epoch + int(time_str[17:19])
+
+    def _consume_content(self, time_str, content):
+        """按内容分类更新 self.data (时间戳已经由调用方处理)"""
+        # --- 第二步：分类解析 ---
+        if "Target:" in content or "目标" in content:
+            m_t = self.re_header_target.search(content)
+            if m_t:
+                self.data["target_pkg"] = m_t.group(1)
+                self._target_set = True
+                # 如果还没找到开始时间，但这行有时间戳，就用这行的时间
+                if self.data["start_time"] is None:
+                    self.data["start_time"] = time_str
+
+        # 1. 状态监控 (STATUS)
+        if "[STATUS]" in content:
+            m = self.re_status.search(content)
+            if m:
+                # 内存
+                epoch = self._to_epoch(time_str)
+                self.data["mem_records"].append(epoch, int(m.group("mem")))
+                # CPU
+                if m.group("cpu"):
+                    try:
+                        self.data["cpu_records"].append(epoch, float(m.group("cpu")))
+                    except:
+                        pass
+                # 温度
+                if m.group("temp"):
+                    try:
+                        self.data["temp_records"].append(epoch, int(m.group("temp")))
+                    except:
+                        pass
+            return
+
+        # 2. 网络监控 (NETWORK)
+        if "[NETWORK]" in content:
+            m = self.re_net.search(content)
+            if m:
+                val_str = m.group("val").strip()
+                if "TIMEOUT" in val_str or "FAIL" in val_str:
+                    self.data["net_failures"] += 1
+                    self.data["net_records"].append(self._to_epoch(time_str), 1000)
+                else:
+                    try:
+                        latency = float(re.sub(r"[^0-9\.]", "", val_str))
+                        self.data["net_records"].append(self._to_epoch(time_str), latency)
+                    except:
+                        pass
+            return
+
+        # 2.5 自救恢复耗时 (RECOVERY)
+        if "[RECOVERY]" in content:
+            m = self.re_recovery.search(content)
+            if m:
+                self.data["recovery_records"].append(self._to_epoch(time_str), int(m.group("ms")))
+                if m.group("res") != "OK":
+                    self.data["recovery_failures"] += 1
+            return
+
+        # 2.6 节奏控制 (PACE)
+        if "[PACE]" in content:
+            m = self.re_pace.search(content)
+            if m:
+                self.data["pace_records"].append({
+                    "time": time_str,
+                    "epoch": self._to_epoch(time_str),
+                    "sheet": m.group("sheet"),
+                    "target": float(m.group("target")),
+                    "actual": float(m.group("actual")),
+                    "steps": int(m.group("steps")),
+                })
+            return
+
+        # 2.7 设备 / 版本信息 (DEVICE): "Model:xx | Serial:xx | Android:xx | Build:xx | App:xx"
+        if "[DEVICE]" in content:
+            m = self.re_device.search(content)
+            if m:
+                for part in m.group(1).split("|"):
+                    key, sep, value = part.partition(":")
+                    if sep and value.strip():
+                        self.data["run_info"][key.strip().lower()] = value.strip()
+            return
+
+        # 3. 动作记录 (包含 [#数字])
+        if "[#" in content:
+            self._consume_action(time_str, content)
+            return
+
+        # 4. 严重错误 (CRITICAL)
+        if "CRITICAL_" in content:
+            err_type = "SYSTEM_ERROR"
+            if "OOM" in content:
+                err_type = "OOM"
+            elif "MEDIA" in content:
+                err_type = "MEDIA"
+            elif "AUDIO" in content:
+                err_type = "AUDIO"
+            elif "KERNEL" in content:
+                err_type = "KERNEL"
+
+            self.data["errors"][err_type] += 1
+            self.data["error_timeline"].append({
+                "time": time_str,
+                "epoch": self._to_epoch(time_str),
+                "type": err_type,
+                "msg": content
+            })
+            return
+
+        # 4.5 ANR (模板 / HostRunner 检测到 ANR 时先打这一行，再去自救)
+        if "[ANR_DETECTED]" in content:
+            self.data["errors"]["ANR"] += 1
+            self.data["error_timeline"].append({
+                "time": time_str,
+                "epoch": self._to_epoch(time_str),
+                "type": "ANR",
+                "msg": content
+            })
+            return
+
+        # 5. 其他信息
+        if "[WARN]" in content:
+            self.data["warnings"] += 1
+        elif "[SNAPSHOT]" in content:
+            snap_name = content.split(" ")[-1]
+            self.data["snapshots"].append(snap_name)
+        elif "=== 压测开始" in content:
+            m = self.re_target_start.search(content)
+            if m:
+                self.data["target_pkg"] = m.group(1)
+                self.data["start_time"] = time_str
+                self._target_set = True
+                self._start_override = time_str
+
+    def _flush_steps(self):
+        if self._step_rows:
+            rows, self._step_rows = self._step_rows, []
+            self._consume_steps(rows)
+
+    def _consume_steps(self, rows):
+        """
+        re_step_line.findall 的批量结果 [(时间, 序号, 步骤 id, 类型, 描述, 开始, 结束), ...]，
+        整批用 numpy 换算耗时 / epoch、更新直方图，结果和逐行 _consume_action 相同
+        """
+        data = self.data
+        data["total_actions"] += len(rows)
+        cols = np.array(rows)
+
+        # epoch 和 _to_epoch 同样按 "日期 + 时:分" 前缀换算 (每个不同的分钟解析一次)，再加上秒数
+        stamps = cols[:, 0].astype("S19")
+        minutes, inv = np.unique(stamps.astype("S17"), return_inverse=True)
+        digits = np.frombuffer(stamps.tobytes(), dtype=np.uint8).reshape(-1, 19)[:, 17:].astype(np.int64) - 48
+        epochs = np.array([parse_epoch(m.decode() + "00") for m in minutes.tolist()], dtype=np.int64)[inv]
+        epochs += digits[:, 0] * 10 + digits[:, 1]
+
+        # 步骤位置索引: 所有步骤都记 (包括没法计时的)；同一个步骤 id 以最后一次出现的动作类型为准
+        ids = cols[:, 2]
+        data["step_pos_records"].extend_arrays(epochs, encode_positions(ids))
+        uniq, last = np.unique(ids[::-1], return_index=True)
+        for step_id, i in zip(uniq.tolist(), (len(ids) - 1 - last).tolist()):
+            data["step_actions"][step_id.decode()] = cols[i, 3].decode()
+
+        ms = cols[:, 6].astype(np.int64) - cols[:, 5].astype(np.int64)
+        valid = np.flatnonzero(ms >= 0)  # 中途重启过 (开机时间归零) 的步骤没法计时
+        if len(valid) < len(ms):
+            cols, ms, epochs = cols[valid], ms[valid], epochs[valid]
+        if not len(ms):
+            return
+        data["step_records"].extend_arrays(epochs, ms)
+
+        stats = data["step_stats"]
+        stats.add_many(cols[:, 3], np.char.partition(cols[:, 2], b".")[:, 0], ms)
+        # 最慢榜: 只有不低于当前门槛、且在这一批里排得上前 TOP_N 的才拼完整记录
+        cand = np.flatnonzero(ms >= stats.threshold())
+        if len(cand) > stats.TOP_N:
+            cand = cand[ms[cand] >= np.partition(ms[cand], -stats.TOP_N)[-stats.TOP_N]]
+        for i in cand.tolist():
+            ts, seq, step_id, action, desc, _, _ = rows[valid[i]] if len(valid) < len(rows) else rows[i]
+            stats.offer([int(ms[i]), int(seq), ts.decode(), step_id.decode(), action.decode(),
+                         desc.decode("utf-8", errors="ignore").strip()])
+
+    def _consume_action(self, time_str, content):
+        """动作记录: 带序号和毫秒计时的步骤还要统计耗时，旧格式 "[STEP][#n] 描述" 只计数"""
+        # 快速路径攒着的步骤在前面，先统计掉，保持曲线的时间顺序
+        self._flush_steps()
+        m = self.re_step.search(content)
+        if m:
+            self.data["total_actions"] += 1
+            seq, step_id, action, desc, start, end = m.groups()
+            epoch = self._to_epoch(time_str)
+            sheet, _, step = step_id.partition(".")
+            self.data["step_pos_records"].append(epoch, int(sheet) * POSITION_BASE + int(step))
+            self.data["step_actions"][step_id] = action
+            ms = int(end) - int(start)
+            if ms >= 0:  # 中途重启过 (开机时间归零) 的一步没法计时
+                self.data["step_records"].append(epoch, ms)
+                self.data["step_stats"].add(int(seq), time_str, step_id, action, desc, ms)
+        elif self.re_action.search(content):
+            self.data["total_actions"] += 1
+
     def _calc_duration(self):
         """
-        根据日志的首尾时间，计算压测持续时长
-        """
-        start_dt = None
-        end_dt = None
-        fmt = "%Y-%m-%d %H:%M:%S"
-
-        # 1. 确定开始时间 (优先用解析到的 start_time，没有则用第一条数据的时间)
-        t_str_start = self.data.get("start_time")
-        if not t_str_start and self.data["mem_records"]:
-            t_str_start = self.data["mem_records"][0][0]  # 取第一条记录的时间
-
-        if t_str_start:
-            try:
-                start_dt = datetime.datetime.strptime(t_str_start, fmt)
-                # 回填一下 start_time，防止是 None
-                self.data["start_time"] = t_str_start
-            except:
-                pass
-
-        # 2. 确定结束时间 (优先用解析到的 end_time，没有则用最后一条数据的时间)
-        t_str_end = self.data.get("end_time")
-        if not t_str_end and self.data["mem_records"]:
-            t_str_end = self.data["mem_records"][-1][0]  # 取最后一条记录的时间
-
-        if t_str_end:
-            try:
-                end_dt = datetime.datetime.strptime(t_str_end, fmt)
-                self.data["end_time"] = t_str_end
-            except:
-                pass
-
-        # 3. 计算差值
-        if start_dt and end_dt:
-            delta = end_dt - start_dt
-            total_seconds = int(delta.total_seconds())
+        根据日志的首尾时间，计算压测持续时长 (同时回填 start_epoch / end_epoch)
+        """
+        mem = self.data["mem_records"]
+
+        # 1. 确定开始 / 结束时间 (优先用解析到的时间，没有则用第一条 / 最后一条数据的时间)
+        if not self.data["start_time"] and len(mem):
+            self.data["start_time"] = format_epoch(mem.epochs[0])
+        if not self.data["end_time"] and len(mem):
+            self.data["end_time"] = format_epoch(mem.epochs[-1])
 
+        start_epoch = end_epoch = None
+        try:
+            if self.data["start_time"]:
+                start_epoch = self._to_epoch(self.data["start_time"])
+            if self.data["end_time"]:
+                end_epoch = self._to_epoch(self.data["end_time"])
+        except ValueError:
+            pass
+        self.data["start_epoch"] = start_epoch
+        self.data["end_epoch"] = end_epoch
+
+        # 2. 计算差值
+        if start_epoch is not None and end_epoch is not None:
             # 防止时间倒流（比如日志文件拼接顺序错了）
-            if total_seconds < 0:
-                total_seconds = 0
+            total_seconds = max(0, end_epoch - start_epoch)
 
             h = total_seconds // 3600
             m = (total_seconds % 3600) // 60
@@ -211,6 +821,90 @@ class StressLogAnalyzer:
         else:
             self.data["duration"] = "N/A (时间不足)"
 
+    def update_range_index(self):
+        """把新解析出的曲线点和错误并进多粒度索引 (只处理上次之后新增的部分)，返回索引"""
+        self.range_index.update({key.replace("_records", ""): self.data[key] for key in self.CURVE_KEYS},
+                                self.data["error_timeline"])
+        return self.range_index
+
+    @staticmethod
+    def _js_points(series, max_points):
+        """曲线 -> JS 数组元素 "[毫秒, 值],..." (float32 按 6 位有效数字输出，避免 12.300000190734863)"""
+        t, v = series.downsample(max_points)
+        return ",".join(f"[{ts * 1000},{val:.6g}]" for ts, val in zip(t.tolist(), v.tolist()))
+
+    def update_sketches(self):
+        """把新解析出的曲线点并进分位数草图 (只处理上次之后新增的部分)，返回 {指标名: WindowedSketch}"""
+        for name, (key, _) in self.SKETCH_METRICS.items():
+            series = self.data[key]
+            seen = self._sketch_seen.get(name, 0)
+            if self._sketch_sources.get(name) is not series or len(series) < seen:
+                # 曲线被换掉 (重新解析 / 外部直接赋值) 或变短: 这个指标从头建
+                self.sketches[name] = WindowedSketch(self.SKETCH_WINDOW)
+                self._sketch_sources[name] = series
+                seen = 0
+            self._sketch_seen[name] = len(series)
+            self._add_sketch_points(self.sketches[name], name, series.epochs[seen:], series.values[seen:])
+        return self.sketches
+
+    def _add_sketch_points(self, sketch, name, t, v):
+        if name == "ping":
+            valid = v < self.PING_TIMEOUT_MS
+            t, v = t[valid], v[valid]
+        sketch.add_arrays(t, v)
+
+    def build_sketches(self, window_sec=None):
+        """
+        Ping / CPU / 内存 / 步骤耗时的分位数草图 {指标名: WindowedSketch} (整场 + 每小时)。
+        默认时间窗直接返回解析时增量维护的草图 (缓存命中时从缓存读出，不用重扫曲线)；
+        其他时间窗按整条曲线现算。
+        草图可以合并: 多台设备 / 多份日志各自 build_sketches 后用 src.sketches.merge_sketches 汇总。
+        """
+        if window_sec in (None, self.SKETCH_WINDOW):
+            return self.update_sketches()
+        sketches = {}
+        for name, (key, _) in self.SKETCH_METRICS.items():
+            sketches[name] = WindowedSketch(window_sec)
+            self._add_sketch_points(sketches[name], name, self.data[key].epochs, self.data[key].values)
+        return sketches
+
+    def analyze_trends(self):
+        """内存 / CPU / 温度的趋势分析 (斜率、阶跃变点、是否持续上涨)，见 src/trend.py"""
+        return {metric: analyze_trend(metric, self.data[f"{metric}_records"].epochs, self.data[f"{metric}_records"].values)
+                for metric in ("mem", "cpu", "temp")}
+
+    def steps_per_minute(self):
+        """
+        每分钟实际完成的步骤数 (按步骤结束时间分钟对齐)，首尾不完整的两分钟不算。
+        :return: (分钟起点 epoch 数组, 每分钟步数数组)
+        """
+        t = self.data["step_records"].epochs
+        if not len(t):
+            return t[:0], np.zeros(0, dtype=np.int64)
+        # 手机改时间 / 时间同步会让时间戳回退，先排序再按分钟计数 (没有步骤的分钟计 0)
+        t = np.sort(t)
+        first = t[0] - t[0] % 60
+        counts = np.bincount((t - first) // 60)
+        minutes = first + 60 * np.arange(len(counts))
+        return minutes[1:-1], counts[1:-1]
+
+    def step_index(self):
+        """按时间排序的步骤索引 (见 src/step_index.py)"""
+        return StepIndex.from_analyzer(self)
+
+    def correlate_errors(self, n=5, window_sec=300):
+        """每类错误 (OOM / ANR / ...) 之前最常出现的 Sheet 和动作类型"""
+        return self.step_index().correlate(self.data["error_timeline"], n, window_sec)
+
+    def get_pace_summary(self):
+        """
+        每个 Sheet 取最后一条 [PACE] 记录 (Sheet 级累计速率)
+        """
+        summary = {}
+        for rec in self.data["pace_records"]:
+            summary[rec["sheet"]] = rec
+        return summary
+
     def print_summary(self):
         d = self.data
         print("\n" + "=" * 40)
@@ -220,23 +914,75 @@ class StressLogAnalyzer:
         print(f"执行动作 : {d['total_actions']} Steps")
         print("-" * 40)
 
-        mem_vals = [m[1] for m in d['mem_records']]
-        if mem_vals:
-            avg_mem = sum(mem_vals) / len(mem_vals)
-            max_mem = max(mem_vals)
+        mem_vals = d['mem_records'].values
+        if len(mem_vals):
+            avg_mem = mem_vals.mean()
+            max_mem = mem_vals.max()
             print(f"内存峰值 : {max_mem} MB")
             print(f"内存均值 : {int(avg_mem)} MB")
         else:
             print("内存数据 : 无记录")
 
         if d['cpu_records']:
-            avg_cpu = sum([x[1] for x in d['cpu_records']]) / len(d['cpu_records'])
+            avg_cpu = d['cpu_records'].values.mean()
             print(f"CPU 均值  : {avg_cpu:.1f}%")
 
         if d['temp_records']:
-            max_temp = max([x[1] for x in d['temp_records']])
+            max_temp = d['temp_records'].values.max()
             print(f"最高温度  : {max_temp}°C")
 
+        if d['recovery_records']:
+            rec_vals = d['recovery_records'].values
+            print(f"自救恢复  : {len(rec_vals)} 次 (均值 {int(rec_vals.mean())} ms, "
+                  f"最长 {max(rec_vals)} ms, 超时 {d['recovery_failures']} 次)")
+
+        sketches = self.build_sketches()
+        if any(sk.run.count for sk in sketches.values()):
+            print("-" * 40)
+            print("分位数      p50 / p95 / p99:")
+            for name, sk in sketches.items():
+                if sk.run.count:
+                    r = sk.run.summary()
+                    unit = self.SKETCH_METRICS[name][1]
+                    print(f"   - {name:<5} : {r['p50']:.1f} / {r['p95']:.1f} / {r['p99']:.1f} {unit}")
+
+        trends = [r for r in self.analyze_trends().values() if r.verdict != "INSUFFICIENT"]
+        if trends:
+            print("-" * 40)
+            print("趋势 (分段拟合，阶跃不计入):")
+            for r in trends:
+                print(f"   - {r.metric:<5} : {r.slope_per_hour:+.1f} {r.unit}/h | {r.label} "
+                      f"(置信度 {r.confidence:.0%}, 变点 {len(r.change_points)} 个)")
+
+        pace_summary = self.get_pace_summary()
+        if pace_summary:
+            print("-" * 40)
+            print("节奏控制 (目标 / 实际 APM):")
+            for sheet, p in pace_summary.items():
+                print(f"   - {sheet:<12} : {p['target']:.1f} / {p['actual']:.1f}")
+
+        stats = d["step_stats"]
+        if len(stats):
+            print("-" * 40)
+            _, per_minute = self.steps_per_minute()
+            if len(per_minute):
+                print(f"步骤速率 : 平均 {per_minute.mean():.1f} / 最低 {per_minute.min()} / 最高 {per_minute.max()} 步每分钟")
+            labels = bucket_labels()
+            for by, title in (("type", "动作类型"), ("sheet", "Sheet")):
+                print(f"步骤耗时 (按{title}): 次数 | 均值 | 最长 | 最多的耗时区间")
+                for row in stats.table(by):
+                    name = row["key"] if by == "type" else f"Sheet#{row['key']}"
+                    peak = labels[row["hist"].index(max(row["hist"]))]
+                    print(f"   - {name:<12} : {row['count']} | {row['mean_ms']:.0f} ms | {row['max_ms']} ms | {peak}")
+            print("最慢的步骤:")
+            for step in stats.top(5):
+                print(f"   - [{step['time']}] #{step['seq']} {step['step']} {step['type']} {step['desc'][:40]} : {step['ms']} ms")
+
+        correlations = self.correlate_errors() if len(d["step_pos_records"]) else {}
+        if any(c.matched for c in correlations.values()):
+            print("-" * 40)
+            print_correlations(correlations)
+
         print("-" * 40)
         print(f"警告 (Warn)  : {d['warnings']}")
         print(f"错误 (Error) : {sum(d['errors'].values())}")
@@ -248,21 +994,45 @@ class StressLogAnalyzer:
         print("=" * 40)
         print(f"截图文件数 : {len(d['snapshots'])}")
 
-    def generate_html(self, output_file="stress_report.html"):
-        d = self.data
+    def export_series_csv(self, output_file="stress_series.csv"):
+        """全分辨率导出所有监控曲线 (长表: 时间, 指标, 数值)，图表降采样后想看原始数据时用"""
+        with open(output_file, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["time", "metric", "value"])
+            for key in self.CURVE_KEYS:
+                series = self.data[key]
+                metric = key.replace("_records", "")
+                writer.writerows(zip(series.time_strings(), [metric] * len(series), series.values.tolist()))
+        print(f"✅ 全分辨率数据已导出: {output_file}")
+        return output_file
 
-        # 准备图表数据
-        times = [f"'{x[0]}'" for x in d['mem_records']]
-        mems = [str(x[1]) for x in d['mem_records']]
+    def generate_html(self, output_file="stress_report.html", max_points=DEFAULT_POINT_BUDGET, mode="standalone"):
+        """
+        :param max_points: 每条曲线最多画多少个点 (按桶保留最小 / 最大值，峰值不会丢)，None 为全分辨率
+        :param mode: "standalone" (默认，内联图表运行时 + 二进制打包数据，离线可看)
+                     或 "echarts" (从 CDN 加载 ECharts，需要联网)
+        """
+        if mode not in self.REPORT_MODES:
+            raise ValueError(f"未知的报告模式: {mode} (可选 {', '.join(self.REPORT_MODES)})")
+        if mode == "standalone":
+            HtmlReportWriter(self, max_points).write(output_file)
+            print(f"✅ HTML 报告已生成: {output_file}")
+            return output_file
 
-        cpu_times = [f"'{x[0]}'" for x in d['cpu_records']]
-        cpu_vals = [str(x[1]) for x in d['cpu_records']]
+        d = self.data
+
+        # 准备图表数据: [毫秒时间戳, 值] 点对，时间轴用 ECharts 的 time 类型
+        mems = self._js_points(d['mem_records'], max_points)
+        cpu_vals = self._js_points(d['cpu_records'], max_points)
+        temp_vals = self._js_points(d['temp_records'], max_points)
+        net_vals = self._js_points(d['net_records'], max_points)
 
-        temp_times = [f"'{x[0]}'" for x in d['temp_records']]
-        temp_vals = [str(x[1]) for x in d['temp_records']]
+        pace_rows = "".join(
+            f"<tr><td>{sheet}</td><td>{p['target']:.1f}</td><td>{p['actual']:.1f}</td><td>{p['steps']}</td></tr>"
+            for sheet, p in self.get_pace_summary().items()
+        ) or "<tr><td colspan='4'>未开启节奏控制</td></tr>"
 
-        net_times = [f"'{x[0]}'" for x in d['net_records']]
-        net_vals = [str(x[1]) for x in d['net_records']]
+        rec_vals = self._js_points(d['recovery_records'], max_points)
 
         html_content = f"""
 <!DOCTYPE html>
@@ -282,6 +1052,8 @@ class StressLogAnalyzer:
         .card p {{ margin: 10px 0 0; font-size: 28px; font-weight: bold; color: #2c3e50; }}
         .chart-box {{ height: 400px; width: 100%; margin-bottom: 20px; }}
         .danger {{ color: #e74c3c !important; }}
+        table {{ border-collapse: collapse; width: 100%; }}
+        th, td {{ border: 1px solid #e9ecef; padding: 8px; text-align: center; }}
     </style>
 </head>
 <body>
@@ -291,7 +1063,7 @@ class StressLogAnalyzer:
 
         <div class="card-grid">
             <div class="card"><h4>执行动作 (Steps)</h4><p>{d['total_actions']}</p></div>
-            <div class="card"><h4>内存峰值 (MB)</h4><p>{max([m[1] for m in d['mem_records']]) if d['mem_records'] else 0}</p></div>
+            <div class="card"><h4>内存峰值 (MB)</h4><p>{d['mem_records'].values.max() if len(d['mem_records']) else 0}</p></div>
             <div class="card"><h4>网络超时 (次)</h4><p class="{'danger' if d['net_failures'] > 0 else ''}">{d['net_failures']}</p></div>
             <div class="card"><h4>严重错误 (个)</h4><p class="{'danger' if sum(d['errors'].values()) > 0 else ''}">{sum(d['errors'].values())}</p></div>
         </div>
@@ -302,6 +1074,15 @@ class StressLogAnalyzer:
         <h3>📡 网络延迟 (Ping)</h3>
         <div id="netChart" class="chart-box"></div>
 
+        <h3>⏱️ ANR 自救耗时 (Recovery)</h3>
+        <div id="recChart" class="chart-box"></div>
+
+        <h3>⏲️ 节奏控制 (APM)</h3>
+        <table>
+            <tr><th>Sheet</th><th>目标 APM</th><th>实际 APM</th><th>步数</th></tr>
+            {pace_rows}
+        </table>
+
         <h3>🚫 异常统计</h3>
         <div id="pieChart" style="height: 350px;"></div>
 
@@ -310,36 +1091,48 @@ class StressLogAnalyzer:
     <script type="text/javascript">
         var comboChart = echarts.init(document.getElementById('comboChart'));
         var comboOption = {{
+            useUTC: true,  // 时间戳按日志里的墙上时间编码，不做时区换算
             tooltip: {{ trigger: 'axis', axisPointer: {{ type: 'cross' }} }},
             legend: {{ data: ['Memory (MB)', 'CPU (%)', 'Temp (°C)'] }},
             grid: {{ right: '20%' }},
-            xAxis: [{{ type: 'category', data: [{",".join(times)}] }}],
+            xAxis: [{{ type: 'time' }}],
             yAxis: [
                 {{ type: 'value', name: 'Memory', position: 'left', axisLine: {{ show: true, lineStyle: {{ color: '#5470C6' }} }} }},
                 {{ type: 'value', name: 'CPU', position: 'right', axisLine: {{ show: true, lineStyle: {{ color: '#91CC75' }} }} }},
                 {{ type: 'value', name: 'Temp', position: 'right', offset: 80, axisLine: {{ show: true, lineStyle: {{ color: '#EE6666' }} }} }}
             ],
             series: [
-                {{ name: 'Memory (MB)', type: 'line', yAxisIndex: 0, data: [{",".join(mems)}], smooth: true, areaStyle: {{ opacity: 0.1 }} }},
-                {{ name: 'CPU (%)', type: 'line', yAxisIndex: 1, data: [{",".join(cpu_vals)}], smooth: true }},
-                {{ name: 'Temp (°C)', type: 'line', yAxisIndex: 2, data: [{",".join(temp_vals)}], smooth: true, itemStyle: {{ color: '#EE6666' }} }}
+                {{ name: 'Memory (MB)', type: 'line', yAxisIndex: 0, data: [{mems}], showSymbol: false, areaStyle: {{ opacity: 0.1 }} }},
+                {{ name: 'CPU (%)', type: 'line', yAxisIndex: 1, data: [{cpu_vals}], showSymbol: false }},
+                {{ name: 'Temp (°C)', type: 'line', yAxisIndex: 2, data: [{temp_vals}], showSymbol: false, itemStyle: {{ color: '#EE6666' }} }}
             ]
         }};
         comboChart.setOption(comboOption);
 
         var netChart = echarts.init(document.getElementById('netChart'));
         var netOption = {{
+            useUTC: true,
             tooltip: {{ trigger: 'axis' }},
-            xAxis: {{ type: 'category', data: [{",".join(net_times)}] }},
+            xAxis: {{ type: 'time' }},
             yAxis: {{ type: 'value', name: 'ms' }},
             visualMap: {{
                 show: false,
                 pieces: [ {{gt: 0, lte: 200, color: '#2ecc71'}}, {{gt: 200, color: '#e74c3c'}} ]
             }},
-            series: [{{ type: 'line', data: [{",".join(net_vals)}], markLine: {{ data: [ {{ yAxis: 1000, name: 'Timeout' }} ] }} }}]
+            series: [{{ type: 'line', data: [{net_vals}], showSymbol: false, markLine: {{ data: [ {{ yAxis: 1000, name: 'Timeout' }} ] }} }}]
         }};
         netChart.setOption(netOption);
 
+        var recChart = echarts.init(document.getElementById('recChart'));
+        var recOption = {{
+            useUTC: true,
+            tooltip: {{ trigger: 'axis' }},
+            xAxis: {{ type: 'time' }},
+            yAxis: {{ type: 'value', name: 'ms' }},
+            series: [{{ type: 'bar', data: [{rec_vals}], itemStyle: {{ color: '#F39C12' }} }}]
+        }};
+        recChart.setOption(recOption);
+
         var pieChart = echarts.init(document.getElementById('pieChart'));
         var pieOption = {{
             tooltip: {{ trigger: 'item' }},
@@ -353,7 +1146,7 @@ class StressLogAnalyzer:
         }};
         pieChart.setOption(pieOption);
 
-        window.onresize = function() {{ comboChart.resize(); netChart.resize(); pieChart.resize(); }};
+        window.onresize = function() {{ comboChart.resize(); netChart.resize(); recChart.resize(); pieChart.resize(); }};
     </script>
 </body>
 </html>
@@ -362,22 +1155,423 @@ class StressLogAnalyzer:
         with open(output_file, "w", encoding="utf-8") as f:
             f.write(html_content)
         print(f"✅ HTML 报告已生成: {output_file}")
+        return output_file
 
 
-if __name__ == "__main__":
-    possible_paths = [os.path.join("dist_stress", "event.log"), "event.log"]
-    log_file = None
-    for p in possible_paths:
-        if os.path.exists(p):
-            log_file = p
-            break
-    if len(sys.argv) > 1:
-        log_file = sys.argv[1]
+class LogDirectoryAnalyzer:
+    """
+    整个压测目录 (adb pull 下来的 dognoise_stress/) 的联合分析:
+    event.log + crash_stack.log (含 logcat 轮转出的 .1 ~ .20) + anr_history.log。
+
+    event.log 仍由 StressLogAnalyzer 解析 (走缓存 / 快速路径)，其余来源逐行流式读取，
+    和 event.log 的错误时间线用 heapq.merge 按时间归并成一条统一时间线。
+    """
+
+    EVENT_LOG = "event.log"
+    CRASH_LOG = "crash_stack.log"
+    ANR_LOG = "anr_history.log"
+
+    def __init__(self, log_dir):
+        self.log_dir = log_dir
+        self.event = StressLogAnalyzer(os.path.join(log_dir, self.EVENT_LOG))
+        self.sources = {}
+        # 统一时间线: {"time", "epoch", "source", "type", "msg"}，按时间排序
+        self.timeline = []
+        # (来源, 类型) -> 次数
+        self.breakdown = Counter()
+        # crash_stack.log 里的崩溃堆栈，按归一化签名聚类
+        self.crashes = CrashIndex()
+
+    def parse(self, workers=1, cache=None):
+        """:param cache: event.log 用的 AnalysisCache，默认用系统临时目录下的缓存"""
+        if not os.path.isdir(self.log_dir):
+            print(f"错误: 找不到日志目录 {self.log_dir}")
+            return False
+
+        if os.path.exists(self.event.log_path):
+            self.event.parse_cached(cache, workers=workers)
+        else:
+            print(f"⚠️ 目录里没有 {self.EVENT_LOG}，只分析 logcat 记录")
+        d = self.event.data
+
+        # logcat 时间不带年份，以压测开始的年份为准
+        year = int(format_epoch(d["start_epoch"])[:4]) if d["start_epoch"] else datetime.date.today().year
+        self.crashes = CrashIndex()
+        self.sources = {
+            "crash": LogcatSource(rotated_paths(self.log_dir, self.CRASH_LOG), "crash", year, self.crashes),
+            "anr": LogcatSource(rotated_paths(self.log_dir, self.ANR_LOG), "anr", year),
+        }
+        event_stream = ({**e, "source": "event"} for e in d["error_timeline"])
+        streams = [event_stream] + [src.events() for src in self.sources.values()]
+
+        self.timeline = list(heapq.merge(*streams, key=lambda e: e["epoch"]))
+        self.crashes.close()
+        self.breakdown = Counter((e["source"], e["type"]) for e in self.timeline)
+        return True
+
+    def print_summary(self):
+        if os.path.exists(self.event.log_path):
+            self.event.print_summary()
+        print("\n" + "=" * 40)
+        print("🧩 [Dognoise] 多来源异常汇总")
+        print("=" * 40)
+        for name, src in self.sources.items():
+            print(f"{name:<6} : {len(src.paths)} 个文件, {src.lines} 行")
+        print("-" * 40)
+        if not self.breakdown:
+            print("未发现崩溃 / ANR / 严重错误")
+        for (source, kind), count in self.breakdown.most_common():
+            print(f"   - {source:<6} {kind:<14} : {count}")
+
+        if self.crashes.signatures:
+            print("-" * 40)
+            print(f"崩溃签名: {len(self.crashes.signatures)} 种 / 共 {self.crashes.total} 次")
+            for sig in self.crashes.top(10):
+                print(f"   - [{sig.signature}] x{sig.count:<5} {sig.title[:70]}")
+                print(f"     首次 {sig.first_time} | 最近 {sig.last_time}")
+
+        tags = self.sources["crash"].tags if self.sources else Counter()
+        if tags:
+            print("-" * 40)
+            print("logcat 错误最多的 Tag:")
+            for tag, count in tags.most_common(10):
+                print(f"   - {tag:<24} : {count}")
+
+        # logcat 里的崩溃 / ANR 也按时间关联到压测步骤 (event.log 自己的错误上面已经统计过)
+        logcat_events = [e for e in self.timeline if e["source"] != "event"]
+        if logcat_events and len(self.event.data["step_pos_records"]):
+            correlations = self.event.step_index().correlate(logcat_events)
+            if any(c.matched for c in correlations.values()):
+                print("-" * 40)
+                print("logcat 事件 → ", end="")
+                print_correlations(correlations)
+
+        if self.timeline:
+            print("-" * 40)
+            print("时间线 (最近 10 条):")
+            for e in self.timeline[-10:]:
+                print(f"   [{e['time']}] {e['source']:<6} {e['type']:<12} {e['msg'][:80]}")
+        print("=" * 40)
+
+    def export_timeline_csv(self, output_file="stress_timeline.csv"):
+        """统一时间线导出为 CSV (时间, 来源, 类型, 内容, 之前最近的一步)"""
+        index = self.event.step_index()
+        nearest = index.preceding([e["epoch"] for e in self.timeline], n=1)[:, 0] if self.timeline else []
+        last_steps = [""] * len(self.timeline)
+        for k, i in enumerate(nearest):
+            if i >= 0:
+                step = index.describe(i)
+                last_steps[k] = f"{step['step']} {step['action']}"
+        with open(output_file, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["time", "source", "type", "msg", "last_step"])
+            writer.writerows((e["time"], e["source"], e["type"], e["msg"], step)
+                             for e, step in zip(self.timeline, last_steps))
+        print(f"✅ 统一时间线已导出: {output_file}")
+        return output_file
+
+
+    def export_crashes_json(self, output_file="stress_crashes.json"):
+        """崩溃签名汇总 (按次数降序，每个签名带一份原始堆栈样例)"""
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump([sig.model_dump() for sig in self.crashes.top(len(self.crashes.signatures))],
+                      f, ensure_ascii=False, indent=2)
+        print(f"✅ 崩溃签名已导出: {output_file}")
+        return output_file
+
+
+class BatchAnalyzer:
+    """
+    批量分析: 在一个根目录 (例如 host_main fleet pull 导出的 fleet_logs/) 下找出所有压测目录，
+    用进程池逐个做目录分析，每场输出各自的报告，最后汇总成一张按设备排名的表 (CSV + JSON)。
+
+    - 含 event.log / crash_stack.log 的目录算一场，目录名 (相对根目录) 作为场次名
+    - 每场在子进程里完整跑一遍 LogDirectoryAnalyzer，单场出错 (日志损坏 / 进程崩溃) 只记为失败，不影响其他场
+    - 汇总排名: 错误数、内存峰值、网络失败次数依次降序
+    """
+
+    RUN_MARKERS = (LogDirectoryAnalyzer.EVENT_LOG, LogDirectoryAnalyzer.CRASH_LOG)
+    SUMMARY_FIELDS = ("run", "status", "device", "serial", "package", "app", "duration", "actions",
+                      "errors", "crashes", "anr", "net_failures", "peak_mem", "ping_p95", "report", "error")
+
+    def __init__(self, root, out_dir=None, workers=None, reports=True, cache_dir=None):
+        self.root = root
+        self.out_dir = out_dir or os.path.join(root, "batch_reports")
+        self.workers = workers or min(os.cpu_count() or 1, 8)
+        self.reports = reports
+        # 分析缓存目录，None 时用 AnalysisCache 的默认位置
+        self.cache_dir = cache_dir
+        # 每场一行 (见 SUMMARY_FIELDS)，按排名排序
+        self.results = []
+        # 所有成功场次合并后的分位数草图
+        self.sketches = {}
+
+    def discover(self):
+        """根目录下所有压测目录 (按路径排序)，输出目录本身不算"""
+        out_dir = os.path.realpath(self.out_dir)
+        runs = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            if os.path.realpath(dirpath) == out_dir:
+                dirnames[:] = []
+                continue
+            dirnames.sort()
+            if any(name in filenames or name in dirnames for name in self.RUN_MARKERS):
+                runs.append(dirpath)
+        return sorted(runs)
+
+    def run_name(self, run_dir):
+        rel = os.path.relpath(run_dir, self.root)
+        return os.path.basename(os.path.abspath(self.root)) if rel == "." else rel.replace(os.sep, "_")
+
+    def run(self):
+        runs = self.discover()
+        if not runs:
+            print(f"错误: {self.root} 下没有找到压测日志 (含 {' / '.join(self.RUN_MARKERS)} 的目录)")
+            return False
+        os.makedirs(self.out_dir, exist_ok=True)
+        print(f"找到 {len(runs)} 场压测，{self.workers} 个进程并行分析 ...")
+
+        results, sketch_sets = [], []
+        pending = list(runs)
+        # 每场遇到进程池崩溃 (worker 被杀 / 段错误 / os._exit) 的次数
+        broken = Counter()
+        while pending:
+            # 崩溃会连累同一个进程池里所有没出结果的场次，先换个新进程池并行重跑一次；
+            # 两次都没跑完的场次再单独跑 (一个进程池只跑这一场)，这时崩溃就能确定是它自己
+            suspects = [run_dir for run_dir in pending if broken[run_dir] >= 2]
+            group, workers = (suspects[:1], 1) if suspects else (list(pending), self.workers)
+            for run_dir, outcome in self._run_pool(group, workers):
+                if outcome is None:
+                    broken[run_dir] += 1
+                    if not suspects:
+                        continue
+                    outcome = {"status": "error", "error": "BrokenProcessPool: 分析进程异常退出"}, None
+                pending.remove(run_dir)
+                row, sketches = outcome
+                row["run"] = self.run_name(run_dir)
+                results.append(row)
+                if sketches:
+                    sketch_sets.append(sketches)
+                mark = "✅" if row["status"] == "ok" else "❌"
+                print(f"[{len(results)}/{len(runs)}] {mark} {row['run']}"
+                      + (f" ({row['error']})" if row.get("error") else ""))
+
+        self.results = sorted(results, key=self.rank_key)
+        self.sketches = merge_sketches(sketch_sets)
+        return True
+
+    def _run_pool(self, run_dirs, workers):
+        """
+        在一个新的进程池里分析 run_dirs，按完成顺序产出 (run_dir, (汇总行, 草图))；
+        进程池崩溃时，受影响的场次产出 (run_dir, None)，由调用方决定重跑
+        """
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {}
+            for run_dir in run_dirs:
+                report_dir = os.path.join(self.out_dir, self.run_name(run_dir)) if self.reports else None
+                futures[pool.submit(_analyze_run, run_dir, report_dir, self.cache_dir)] = run_dir
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except BrokenProcessPool:
+                    yield futures[future], None
+                except Exception as e:  # 提交 / 回传结果失败 (比如结果不能 pickle)
+                    yield futures[future], ({"status": "error", "error": f"{type(e).__name__}: {e}"}, None)
+
+    @staticmethod
+    def rank_key(row):
+        """失败的场次排最后；其余按 错误数 -> 内存峰值 -> 网络失败 降序"""
+        if row["status"] != "ok":
+            return (1, 0, 0, 0, row["run"])
+        return (0, -row["errors"], -(row["peak_mem"] or 0), -row["net_failures"], row["run"])
+
+    def print_summary(self):
+        print("\n" + "=" * 80)
+        print(f"📊 [Dognoise] 批量分析汇总 ({len(self.results)} 场)")
+        print("=" * 80)
+        print(f"{'场次':<24} {'设备':<16} {'错误':>6} {'崩溃':>6} {'内存峰值':>10} {'网络失败':>8}")
+        print("-" * 80)
+        for row in self.results:
+            if row["status"] != "ok":
+                print(f"{row['run'][:24]:<24} ❌ 分析失败: {row['error']}")
+                continue
+            peak = f"{row['peak_mem']} MB" if row["peak_mem"] is not None else "-"
+            print(f"{row['run'][:24]:<24} {(row['device'] or '-')[:16]:<16} {row['errors']:>6} "
+                  f"{row['crashes']:>6} {peak:>10} {row['net_failures']:>8}")
+        fleet = {name: sk.run.summary() for name, sk in self.sketches.items() if sk.run.count}
+        if fleet:
+            print("-" * 80)
+            print("全部场次合并分位数  p50 / p95 / p99:")
+            for name, r in fleet.items():
+                unit = StressLogAnalyzer.SKETCH_METRICS[name][1]
+                print(f"   - {name:<5} : {r['p50']:.1f} / {r['p95']:.1f} / {r['p99']:.1f} {unit}")
+        print("=" * 80)
+
+    def export(self, csv_file=None, json_file=None):
+        """汇总表 CSV + JSON (JSON 额外带合并后的分位数)，返回两个文件路径"""
+        csv_file = csv_file or os.path.join(self.out_dir, "batch_summary.csv")
+        json_file = json_file or os.path.join(self.out_dir, "batch_summary.json")
+        with open(csv_file, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=self.SUMMARY_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(self.results)
+        with open(json_file, "w", encoding="utf-8") as f:
+            json.dump({
+                "root": os.path.abspath(self.root),
+                "runs": self.results,
+                "failed": sum(row["status"] != "ok" for row in self.results),
+                "percentiles": {name: sk.run.summary() for name, sk in self.sketches.items() if sk.run.count},
+            }, f, ensure_ascii=False, indent=2)
+        print(f"✅ 汇总已导出: {csv_file} / {json_file}")
+        return csv_file, json_file
+
+
+def print_correlations(correlations):
+    """错误前的步骤排名 (次数 / 占比 / lift)"""
+    print("错误前的步骤 (最近 Sheet / 前 5 步的动作, lift = 相对整场的倍数):")
+    for c in correlations.values():
+        if not c.matched:
+            continue
+        print(f"   - {c.error_type:<12} : {c.errors} 次 (定位到步骤 {c.matched} 次)")
+        for title, items in (("Sheet", c.sheets[:3]), ("动作 ", c.actions[:3])):
+            ranked = ", ".join(f"{r.key} {r.share:.0%} (x{r.lift:g})" for r in items)
+            print(f"       {title} : {ranked}")
+
+
+def record_run(analyzer, crashes=0, db_path=None, sketches=None):
+    """把这一场存进本地历史库，并和同一个包的上一场对比 (历史库出错不影响分析结果)"""
+    try:
+        with RunStore(db_path) as store:
+            run_id = store.save_run(analyzer, sketches=sketches, crashes=crashes)
+            print(f"✅ 已记录到历史库: #{run_id} ({store.db_path})")
+            base_id = store.previous_run(run_id)
+            if base_id:
+                print(store.format_diff(base_id, run_id))
+            return run_id
+    except sqlite3.Error as e:
+        print(f"⚠️ 写入历史库失败: {e}")
+        return None
+
+
+def compare_with_previous(run_id, db_path=None):
+    """网页用: 这一场和同一个包上一场的对比，返回 (上一场, diff 行)；没有上一场或历史库出错时返回 None"""
+    if run_id is None:
+        return None
+    try:
+        with RunStore(db_path) as store:
+            base_id = store.previous_run(run_id)
+            if not base_id:
+                return None
+            return store.get_run(base_id), store.diff(base_id, run_id)
+    except sqlite3.Error as e:
+        print(f"⚠️ 读取历史库失败: {e}")
+        return None
+
+
+def _analyze_run(run_dir, report_dir, cache_dir=None):
+    """
+    批量分析的 worker: 分析一个压测目录，返回 (汇总行, 分位数草图)。
+    分析过程的输出不打印 (多进程会交错)，异常转成 status=error 的汇总行。
+    """
+    row = {key: None for key in BatchAnalyzer.SUMMARY_FIELDS}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyzer = LogDirectoryAnalyzer(run_dir)
+            if not analyzer.parse(workers=1, cache=AnalysisCache(cache_dir) if cache_dir else None):
+                raise RuntimeError("目录不存在")
+            event = analyzer.event
+            d = event.data
+            sketches = event.build_sketches()
+            if report_dir:
+                os.makedirs(report_dir, exist_ok=True)
+                analyzer.export_timeline_csv(os.path.join(report_dir, "stress_timeline.csv"))
+                if analyzer.crashes.signatures:
+                    analyzer.export_crashes_json(os.path.join(report_dir, "stress_crashes.json"))
+                if os.path.exists(event.log_path):
+                    row["report"] = event.generate_html(os.path.join(report_dir, "stress_report.html"))
+    except Exception as e:
+        row.update(status="error", error=f"{type(e).__name__}: {e}")
+        return row, None
 
+    info = d["run_info"]
+    mem = d["mem_records"].values
+    ping = sketches["ping"].run
+    row.update(
+        status="ok", device=info.get("model") or os.path.basename(os.path.abspath(run_dir)),
+        serial=info.get("serial"), package=d["target_pkg"], app=info.get("app"), duration=d["duration"],
+        actions=d["total_actions"], errors=sum(d["errors"].values()), crashes=analyzer.crashes.total,
+        # event.log 的 [ANR_DETECTED] 和 anr_history 记的是同一批 ANR，取较大的一边，不重复计数
+        anr=max(d["errors"].get("ANR", 0),
+                sum(n for (source, kind), n in analyzer.breakdown.items() if kind == "ANR" and source != "event")),
+        net_failures=d["net_failures"], peak_mem=int(mem.max()) if len(mem) else None,
+        ping_p95=round(ping.quantile(0.95), 1) if ping.count else None,
+    )
+    return row, sketches
+
+
+def _parse_range(log_path, start, end):
+    """进程池的 worker: 解析一段字节范围"""
+    return StressLogAnalyzer(log_path).parse_range(start, end)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Dognoise 压测日志分析")
+    parser.add_argument("path", nargs="?", default=None,
+                        help="event.log 或压测目录；--batch 时为包含多场压测的根目录 (省略时自动查找 event.log)")
+    parser.add_argument("--batch", action="store_true", help="批量分析根目录下的所有压测目录")
+    parser.add_argument("--workers", type=int, default=None, help="并行进程数 (默认按 CPU 核数)")
+    parser.add_argument("--out", default=None, help="批量分析的输出目录 (默认 <根目录>/batch_reports)")
+    parser.add_argument("--no-reports", action="store_true", help="批量分析时只出汇总表，不写每场的报告")
+    parser.add_argument("--no-record", action="store_true", help="不写入本地历史库")
+    parser.add_argument("--cache-dir", default=None, help="分析缓存目录 (默认在系统临时目录下)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.batch:
+        batch = BatchAnalyzer(args.path or ".", args.out, args.workers, reports=not args.no_reports,
+                              cache_dir=args.cache_dir)
+        if not batch.run():
+            return 1
+        batch.print_summary()
+        batch.export()
+        return 0
+
+    log_file = args.path
+    if not log_file:
+        for p in (os.path.join("dist_stress", "event.log"), "event.log"):
+            if os.path.exists(p):
+                log_file = p
+                break
     if not log_file:
-        print("未找到 event.log。请将脚本放在日志同级目录，或使用: python analyze_log.py <path_to_log>")
+        print("未找到 event.log。请将脚本放在日志同级目录，或使用: python analyze_log.py <path_to_log | log_dir>")
+        return 1
+
+    cache = AnalysisCache(args.cache_dir) if args.cache_dir else None
+    if os.path.isdir(log_file):
+        analyzer = LogDirectoryAnalyzer(log_file)
+        if not analyzer.parse(workers=args.workers, cache=cache):
+            return 1
+        analyzer.print_summary()
+        analyzer.export_timeline_csv()
+        if analyzer.crashes.signatures:
+            analyzer.export_crashes_json()
+        if os.path.exists(analyzer.event.log_path):
+            analyzer.event.generate_html()
+            if not args.no_record:
+                record_run(analyzer.event, crashes=analyzer.crashes.total)
     else:
         analyzer = StressLogAnalyzer(log_file)
-        if analyzer.parse():
-            analyzer.print_summary()
-            analyzer.generate_html()
\ No newline at end of file
+        if not analyzer.parse_cached(cache, workers=args.workers):
+            return 1
+        analyzer.print_summary()
+        analyzer.generate_html()
+        if not args.no_record:
+            record_run(analyzer)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+日志解析基准: 生成一份模拟的长时间压测 event.log，
+分别用 regex (原逐行正则)、fast (字节块 + 定长时间戳分派) 和 parallel (多进程分段) 解析，
+对比耗时并校验结果完全一致。
+
+用法: python benchmarks/bench_parse.py [行数，默认 1000000] [--workers N] [--keep 日志路径]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import datetime
+import tempfile
+import contextlib
+import io
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyze_log import StressLogAnalyzer
+
+STEP_LINES = ["CLICK 点击: 500, 1000", "SWIPE 滑动: 100,800 -> 100,200", "WAIT 等待: 2秒", "KEY 按键: 4"]
+
+
+def generate_log(path, lines):
+    """大部分是 [STEP] 行，夹杂 STATUS / NETWORK / PACE / 错误，和真实日志的比例接近"""
+    rnd = random.Random(42)
+    t = datetime.datetime(2025, 12, 24, 10, 0, 0)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"[{t:%Y-%m-%d %H:%M:%S}] === 压测开始: com.test.app ===\n")
+        for i in range(lines):
+            t += datetime.timedelta(seconds=1)
+            ts = f"[{t:%Y-%m-%d %H:%M:%S}]"
+            r = rnd.random()
+            if r < 0.02:
+                f.write(f"{ts} [STATUS] Mem:{rnd.randint(180, 400)}MB | CPU:{rnd.uniform(5, 60):.1f}% | Temp:{rnd.randint(35, 45)}C\n")
+            elif r < 0.03:
+                f.write(f"{ts} [NETWORK] Ping:{rnd.uniform(10, 80):.1f}ms\n")
+            elif r < 0.032:
+                f.write(f"{ts} [PACE] Sheet:Video | Target:30.0apm | Actual:{rnd.uniform(25, 30):.1f}apm | Steps:{i}\n")
+            elif r < 0.0325:
+                f.write(f"{ts} [CRITICAL_OOM] 发现严重征兆\n")
+                f.write("    at com.test.app.Main.run(Main.java:42)\n")
+            else:
+                # 和模板 step_end 的输出格式一致 (全局序号 + 开机毫秒计时)
+                start = i * 1000
+                f.write(f"{ts} [STEP][#{i}] 1.{i % 4 + 1} {rnd.choice(STEP_LINES)} | "
+                        f"Start:{start} | End:{start + rnd.randint(20, 900)}\n")
+
+
+def timed_parse(path, engine, workers=None):
+    analyzer = StressLogAnalyzer(path)
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if engine == "parallel":
+            analyzer.parse_parallel(workers)
+        else:
+            analyzer.parse(engine=engine)
+    return time.perf_counter() - t0, analyzer.data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="event.log 解析基准")
+    parser.add_argument("lines", nargs="?", type=int, default=1000000)
+    parser.add_argument("--workers", type=int, default=None, help="并行解析的进程数 (默认 CPU 核数)")
+    parser.add_argument("--keep", default=None, help="把生成的日志保存到这个路径 (默认用完删除)")
+    args = parser.parse_args()
+
+    path = args.keep or os.path.join(tempfile.mkdtemp(), "event.log")
+    generate_log(path, args.lines)
+    size_mb = os.path.getsize(path) / 1024 / 1024
+    print(f"日志: {args.lines} 行, {size_mb:.1f} MB")
+
+    try:
+        t_regex, d_regex = timed_parse(path, "regex")
+        t_fast, d_fast = timed_parse(path, "fast")
+        t_par, d_par = timed_parse(path, "parallel", args.workers)
+    finally:
+        if not args.keep:
+            os.remove(path)
+
+    print(f"regex   : {t_regex:6.2f}s  ({size_mb / t_regex:6.1f} MB/s)")
+    print(f"fast    : {t_fast:6.2f}s  ({size_mb / t_fast:6.1f} MB/s)  x{t_regex / t_fast:.1f}")
+    print(f"parallel: {t_par:6.2f}s  ({size_mb / t_par:6.1f} MB/s)  x{t_regex / t_par:.1f} "
+          f"({args.workers or os.cpu_count()} 进程)")
+    if not (d_regex == d_fast == d_par):
+        print("❌ 两种解析结果不一致")
+        return 1
+    print("✅ 解析结果一致")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+import os
+import sys
+import argparse
+
+# 确保能找到 src
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.excel_loader import ExcelLoader
+from src.host_runner import HostRunner
+from src.fleet import FleetOrchestrator, list_devices
+from src.log_follower import LogFollower
+from src.log_exporter import LogExporter
+from src.deployer import ScriptDeployer, WIPE_MODES
+from src.trend import TrendTracker
+from analyze_log import StressLogAnalyzer
+
+
+def cmd_run(args):
+    """电脑端直接驱动测试计划 (不推送 stress_core.sh)"""
+    loader = ExcelLoader(args.excel)
+    try:
+        project = loader.load_project()
+        print(f"任务加载成功: {len(project.plans)} 个 Sheet")
+    except Exception as e:
+        print(f"加载失败: {e}")
+        return 1
+
+    runner = HostRunner(project, args.log_dir, adb=args.adb, serial=args.serial)
+    print(f"开始主机端压测，日志: {runner.event_log}")
+    return 0 if runner.run(args.duration) else 1
+
+
+def _resolve_serials(args):
+    """--serials 优先，其次 --serials-file，都没有就用 adb devices 里的全部在线设备"""
+    if args.serials:
+        return [s.strip() for s in args.serials.split(",") if s.strip()]
+    if args.serials_file:
+        with open(args.serials_file, "r", encoding="utf-8") as f:
+            return [l.strip() for l in f if l.strip() and not l.startswith("#")]
+    return list_devices(args.adb)
+
+
+def cmd_fleet(args):
+    """多设备并发 启动 / 状态 / 停止 / 导出日志"""
+    serials = _resolve_serials(args)
+    if not serials:
+        print("没有可用的设备")
+        return 1
+
+    print(f"设备 {len(serials)} 台，并发 {args.parallel}，单台超时 {args.timeout}s")
+    fleet = FleetOrchestrator(serials, adb=args.adb, parallel=args.parallel, timeout=args.timeout)
+
+    if args.action == "start":
+        results = fleet.start(args.script, wipe=args.wipe)
+    elif args.action == "status":
+        results = fleet.status()
+    elif args.action == "stop":
+        results = fleet.stop()
+    else:
+        results = fleet.pull(args.dest)
+
+    print()
+    print(fleet.format_summary(results))
+    return 0 if all(r.ok for r in results) else 1
+
+
+def cmd_follow(args):
+    """压测进行中增量拉取日志，并实时更新分析结果"""
+    local_dir = os.path.join(args.dest, args.serial or "default")
+    analyzer = StressLogAnalyzer(os.path.join(local_dir, "event.log"))
+    # 接着上次保存的分析状态，只分析本地文件里新追加的部分
+    analyzer.load_state()
+    # 趋势跟踪: 每次拉取后在新数据上更新，一旦判定持续上涨就提前报警 (每个指标只报一次)
+    trackers = {m: TrendTracker(m) for m in ("mem", "cpu", "temp")}
+    alerted = set()
+
+    def on_poll(appended):
+        if os.path.exists(analyzer.log_path):
+            analyzer.parse_incremental()
+            analyzer.save_state()
+        d = analyzer.data
+        last = d["mem_records"].last()
+        last_mem = last[1] if last else "-"
+        print(f"[{args.serial or 'default'}] +{sum(appended.values())} bytes | 最新内存 {last_mem} MB | "
+              f"错误 {sum(d['errors'].values())} | 网络超时 {d['net_failures']} | 时长 {d['duration']}")
+
+        for metric, tracker in trackers.items():
+            report = tracker.update(d[f"{metric}_records"])
+            if report.verdict == "LEAK" and metric not in alerted:
+                alerted.add(metric)
+                print(f"🚨 [{args.serial or 'default'}] {metric} {report.label}: "
+                      f"{report.slope_per_hour:+.1f} {report.unit}/h (置信度 {report.confidence:.0%}, "
+                      f"已运行 {report.span_hours}h)")
+
+    follower = LogFollower(local_dir, adb=args.adb, serial=args.serial)
+    print(f"开始跟踪日志 -> {local_dir} (间隔 {args.interval}s，Ctrl+C 停止)")
+    follower.follow(interval=args.interval, max_polls=1 if args.once else None, on_poll=on_poll)
+    return 0
+
+
+def cmd_deploy(args):
+    """推送脚本 (内容没变就跳过)，并按选择处理旧日志"""
+    deployer = ScriptDeployer(args.adb, args.serial)
+    try:
+        res = deployer.deploy(args.script, wipe=args.wipe)
+    except (RuntimeError, OSError) as e:
+        print(f"❌ 部署失败: {e}")
+        return 1
+    print(f"{'✅ 已推送新脚本' if res['pushed'] else '⏩ 脚本未变化，跳过推送'} (sha256 {res['hash'][:12]})")
+    print(f"🗂️ {res['wipe']}")
+    return 0
+
+
+def cmd_export(args):
+    """单流归档导出日志 (跳过本地已有的文件)"""
+    dest = os.path.join(args.dest, args.serial or "default")
+    exporter = LogExporter(args.adb, args.serial)
+    try:
+        exporter.export(dest, keep_archive=args.keep_archive)
+    except RuntimeError as e:
+        print(f"❌ 导出失败: {e}")
+        return 1
+    return 0
+
+
+def build_parser():
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Dognoise 主机端工具")
+    parser.add_argument("--adb", default="adb", help="adb 可执行文件路径")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="通过一个 adb shell 长连接在电脑端执行测试计划")
+    p_run.add_argument("--excel", default=os.path.join(base_dir, "config", "test plan.xlsx"), help="测试计划 Excel")
+    p_run.add_argument("--serial", default=None, help="设备序列号 (只有一台设备时可省略)")
+    p_run.add_argument("--log-dir", default=os.path.join(base_dir, "host_logs"), help="本地日志目录")
+    p_run.add_argument("--duration", type=int, default=None, help="覆盖 Excel 里的测试时长 (秒)")
+    p_run.set_defaults(func=cmd_run)
+
+    p_fleet = sub.add_parser("fleet", help="多设备并发控制")
+    p_fleet.add_argument("action", choices=["start", "status", "stop", "pull"])
+    p_fleet.add_argument("--serials", default=None, help="逗号分隔的设备序列号")
+    p_fleet.add_argument("--serials-file", default=None, help="设备列表文件，每行一个序列号")
+    p_fleet.add_argument("--script", default=os.path.join(base_dir, "dist", "stress_core.sh"), help="要推送的脚本")
+    p_fleet.add_argument("--dest", default=os.path.join(base_dir, "fleet_logs"), help="导出日志的本地目录")
+    p_fleet.add_argument("--parallel", type=int, default=4, help="最大并发设备数")
+    p_fleet.add_argument("--timeout", type=float, default=180, help="单台设备超时 (秒)")
+    p_fleet.add_argument("--wipe", choices=WIPE_MODES, default="archive", help="启动前旧日志: 保留/归档/删除")
+    p_fleet.set_defaults(func=cmd_fleet)
+
+    p_follow = sub.add_parser("follow", help="增量拉取运行中的日志 (只拉新增字节)")
+    p_follow.add_argument("--serial", default=None, help="设备序列号 (只有一台设备时可省略)")
+    p_follow.add_argument("--dest", default=os.path.join(base_dir, "follow_logs"), help="本地日志目录")
+    p_follow.add_argument("--interval", type=float, default=60, help="拉取间隔 (秒)")
+    p_follow.add_argument("--once", action="store_true", help="只拉一次就退出")
+    p_follow.set_defaults(func=cmd_follow)
+
+    p_deploy = sub.add_parser("deploy", help="推送脚本 (内容没变就跳过)，可选处理旧日志")
+    p_deploy.add_argument("--serial", default=None, help="设备序列号 (只有一台设备时可省略)")
+    p_deploy.add_argument("--script", default=os.path.join(base_dir, "dist", "stress_core.sh"), help="要推送的脚本")
+    p_deploy.add_argument("--wipe", choices=WIPE_MODES, default="keep", help="旧日志: 保留/归档/删除")
+    p_deploy.set_defaults(func=cmd_deploy)
+
+    p_export = sub.add_parser("export", help="打包成一个压缩流导出日志 (跳过本地已有文件)")
+    p_export.add_argument("--serial", default=None, help="设备序列号 (只有一台设备时可省略)")
+    p_export.add_argument("--dest", default=os.path.join(base_dir, "export_logs"), help="本地日志目录")
+    p_export.add_argument("--keep-archive", action="store_true", help="只保存 .tar.gz，不解包")
+    p_export.set_defaults(func=cmd_export)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
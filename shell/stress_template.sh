@@ -33,6 +33,14 @@ EVENT_LOG="$WORKDIR/event.log"
 CRASH_LOG="$WORKDIR/crash_stack.log"
 ANR_LOG="$WORKDIR/anr_history.log"
 LOCK_FILE="/data/local/tmp/dognoise.lock"
+# ANR 自救的最长等待时间 (秒)
+ANR_RECOVER_TIMEOUT=30
+# 断点文件: 记录当前执行位置，脚本被杀后可以续跑
+CHECKPOINT_FILE="$WORKDIR/checkpoint.state"
+CHECKPOINT_INTERVAL=30
+
+# 运行模式: 传入 resume 参数时从断点续跑 (sh stress_core.sh resume)
+RUN_MODE=$1
 MY_PID=$$
 
 # 初始化文件
@@ -59,6 +67,16 @@ function get_uptime_sec() {
     echo ${up_val%%.*}
 }
 
+# 毫秒级开机时间 (/proc/uptime 精度为 10ms)
+function get_uptime_ms() {
+    read up_val _ < /proc/uptime
+    local sec=${up_val%%.*}
+    local frac=${up_val#*.}
+    # 去掉前导 0，防止 "08" 被当成八进制
+    frac=${frac#0}
+    echo $((sec * 1000 + ${frac:-0} * 10))
+}
+
 
 
 
@@ -86,9 +104,70 @@ function send_feishu() {
     fi
 }
 
+function save_checkpoint() {
+    local now=$(get_uptime_sec)
+    # 限频写入，避免每一步都刷 sdcard
+    if [ "$1" != "force" ] && [ $((now - last_checkpoint_time)) -lt $CHECKPOINT_INTERVAL ]; then
+        return
+    fi
+    # 先写临时文件再 mv，防止写到一半被杀导致断点损坏
+    {
+        echo "RESUME_SHEET=${sheet_idx:-1}"
+        echo "RESUME_COUNT=${sheet_count:-1}"
+        echo "RESUME_STEP=${step_idx:-1}"
+        echo "RESUME_ELAPSED=$((now - start_uptime))"
+        echo "RESUME_SEQ=${step_seq:-0}"
+    } > "$CHECKPOINT_FILE.tmp"
+    mv -f "$CHECKPOINT_FILE.tmp" "$CHECKPOINT_FILE"
+    last_checkpoint_time=$now
+}
+
+function load_checkpoint() {
+    if [ ! -f "$CHECKPOINT_FILE" ]; then
+        log_info "[RESUME] 未找到断点文件，从头开始"
+        return 1
+    fi
+    . "$CHECKPOINT_FILE"
+    resume_pending=1
+    # 已运行时长继续计入 DURATION_SEC (重启后 uptime 会归零，所以存的是时长而不是 uptime)
+    start_uptime=$(( $(get_uptime_sec) - ${RESUME_ELAPSED:-0} ))
+    # 步骤序号接着断点继续编号，整场压测内全局递增
+    step_seq=${RESUME_SEQ:-0}
+    log_info "[RESUME] 从 Sheet#${RESUME_SHEET} 第${RESUME_COUNT}轮 Step#${RESUME_STEP} 继续，已运行 ${RESUME_ELAPSED}s"
+    return 0
+}
+
+function resume_sheet_start() {
+    # $1 = sheet 序号, $2 = 该 sheet 的循环次数; 输出 sheet_count 的起始值
+    if [ $resume_pending -eq 1 ]; then
+        if [ $1 -lt $RESUME_SHEET ]; then
+            echo $2
+            return
+        fi
+        if [ $1 -eq $RESUME_SHEET ]; then
+            echo $((RESUME_COUNT - 1))
+            return
+        fi
+    fi
+    echo 0
+}
+
+function resume_skip() {
+    # $1 = sheet 序号, $2 = step 序号; 返回 0 表示续跑时应跳过该步骤
+    [ $resume_pending -eq 1 ] || return 1
+    if [ $1 -lt $RESUME_SHEET ] || { [ $1 -eq $RESUME_SHEET ] && [ $2 -lt $RESUME_STEP ]; }; then
+        return 0
+    fi
+    resume_pending=0
+    log_info "[RESUME] 已定位到断点位置"
+    return 1
+}
+
 function leave_last_words() {
     trap - EXIT  # <--- 防止退出时再次触发 EXIT
     local reason=$1
+    # 未跑完就退出时，记下当前位置供续跑
+    [ "$test_finished" != "1" ] && save_checkpoint force
     local now_up=$(get_uptime_sec)
     local total_run=$((now_up - start_uptime))
 
@@ -188,17 +267,117 @@ function check_fatal_logs() {
     fi
 }
 
+# 毫秒级 sleep，不依赖 awk (sleep 支持小数秒)
+function sleep_ms() {
+    local ms=$1
+    local frac=$((ms % 1000))
+    if [ $frac -lt 10 ]; then
+        frac="00$frac"
+    elif [ $frac -lt 100 ]; then
+        frac="0$frac"
+    fi
+    sleep $((ms / 1000)).$frac
+}
+
+# --- 节奏控制 (Config 里配置了 APM 的 Sheet 才会用到) ---
+# 每一步都对齐到绝对的 uptime 截止时间，只睡剩余的时间，
+# 所以动作本身、健康检查带来的抖动会在后续步骤里自动补偿，不会累积漂移。
+function pace_start() {
+    # $1 = Sheet 名, $2 = 目标 APM, $3 = 每步间隔 (ms)
+    pace_sheet=$1
+    pace_target=$2
+    pace_interval_ms=$3
+    pace_t0=$(get_uptime_ms)
+    pace_deadline=$pace_t0
+    pace_steps=0
+    pace_last_report=$pace_t0
+}
+
+function pace_report() {
+    local elapsed=$(( $(get_uptime_ms) - pace_t0 ))
+    # 续跑时整个 Sheet 被跳过的情况，不上报
+    [ $pace_steps -eq 0 ] || [ $elapsed -le 0 ] && return
+    # 保留一位小数: 先放大 10 倍做整数运算
+    local apm_x10=$(( pace_steps * 600000 / elapsed ))
+    log_info "[PACE] Sheet:${pace_sheet} | Target:${pace_target}apm | Actual:$((apm_x10 / 10)).$((apm_x10 % 10))apm | Steps:${pace_steps}"
+    pace_last_report=$(get_uptime_ms)
+}
+
+function pace_tick() {
+    pace_steps=$((pace_steps + 1))
+    pace_deadline=$((pace_deadline + pace_interval_ms))
+    local now=$(get_uptime_ms)
+    local remain=$((pace_deadline - now))
+
+    if [ $remain -gt 0 ]; then
+        sleep_ms $remain
+    elif [ $((0 - remain)) -gt $pace_interval_ms ]; then
+        # 落后超过一个间隔 (比如卡在 ANR 自救里)，重置基准，避免之后连续猛发追赶
+        pace_deadline=$now
+    fi
+
+    # 每分钟上报一次实际速率
+    if [ $((now - pace_last_report)) -ge 60000 ]; then
+        pace_report
+    fi
+}
+
+# --- 步骤计时 ---
+# 每个动作片段: step_begin 类型 "描述" -> 动作命令 -> step_end
+# step_end 写一行 "[STEP][#全局序号] Sheet.Step 类型 描述 | Start:开机毫秒 | End:开机毫秒"，分析器据此统计步骤耗时
+function step_begin() {
+    step_seq=$((step_seq + 1))
+    step_type=$1
+    step_desc=$2
+    step_t0=$(get_uptime_ms)
+}
+
+function step_end() {
+    log_info "[STEP][#${step_seq}] ${sheet_idx:-0}.${step_idx:-0} ${step_type} ${step_desc} | Start:${step_t0} | End:$(get_uptime_ms)"
+}
+
+function is_app_ready() {
+    # 就绪信号: 进程已出现，且焦点窗口落在目标应用 (START_URI) 上
+    [ -z "$(pidof $TARGET_PKG 2>/dev/null)" ] && return 1
+    dumpsys window 2>/dev/null | grep -E "mCurrentFocus|mFocusedApp" | grep -q -e "$TARGET_PKG" -e "${START_URI##*/}"
+}
+
+function recover_app() {
+    # 用真实的就绪信号代替固定 sleep，超时时间 ANR_RECOVER_TIMEOUT 秒
+    local kind=$1
+    local t0=$(get_uptime_ms)
+    local deadline=$(( $(get_uptime_sec) + ANR_RECOVER_TIMEOUT ))
+    local result="TIMEOUT"
+
+    # force-stop 是同步的，不需要额外等待
+    am force-stop $TARGET_PKG
+    # -W 会阻塞到 Activity 启动完成
+    am start -W -n $START_URI > /dev/null 2>&1
+
+    while [ $(get_uptime_sec) -lt $deadline ]; do
+        if is_app_ready; then
+            result="OK"
+            break
+        fi
+        sleep 0.2
+    done
+
+    local cost=$(( $(get_uptime_ms) - t0 ))
+    log_info "[RECOVERY] ${kind} | Latency:${cost}ms | Result:${result}"
+    [ "$result" == "OK" ]
+}
+
 function check_anr_state() {
     # 扫描 Events Log 里的 am_anr 标签
-    if logcat -b events -d -t 100 | grep "am_anr" | grep -q "$TARGET_PKG"; then
+    local anr_lines=$(logcat -b events -d -v time -t 100 | grep "am_anr" | grep "$TARGET_PKG")
+    if [ -n "$anr_lines" ]; then
+            # 原始记录追加到 anr_history.log 供离线分析 (同一条 ANR 被重复扫到时只记一次)
+            echo "$anr_lines" | grep -vxF -f "$ANR_LOG" >> "$ANR_LOG"
             log_info "!!![ANR_DETECTED]!!!"
             take_snapshot "ANR"
-            
+
             # 自救重启逻辑
-            am force-stop $TARGET_PKG
-            sleep 2
-            am start -n $START_URI
-            sleep 5
+            recover_app "ANR"
             return 1 # 返回 1 表示发生了重启
     fi
     return 0
@@ -295,6 +474,9 @@ function check_health_fast() {
 
     # 门禁 2: 网络检查 (60s)
     check_network
+
+    # 门禁 3: 断点记录 (CHECKPOINT_INTERVAL)
+    save_checkpoint
 }
 
 # ==========================================
@@ -306,21 +488,39 @@ start_uptime=$(get_uptime_sec)
 last_heartbeat_time=$(get_uptime_sec)
 last_heavy_check_time=0
 last_net_check_time=0
-
-log_info "=== 压测开始: $TARGET_PKG ==="
-send_feishu "🚀 压测已启动" "目标: $TARGET_PKG\n计划时长: $DURATION_SEC 秒"
+last_checkpoint_time=0
+resume_pending=0
+test_finished=0
+step_seq=0
+
+if [ "$RUN_MODE" == "resume" ] && load_checkpoint; then
+    # 续跑不再写 "压测开始"，避免分析器把开始时间重置到续跑时刻
+    log_info "=== 压测续跑: $TARGET_PKG ==="
+    send_feishu "🔁 压测已续跑" "目标: $TARGET_PKG\n已运行: ${RESUME_ELAPSED} 秒"
+else
+    log_info "=== 压测开始: $TARGET_PKG ==="
+    send_feishu "🚀 压测已启动" "目标: $TARGET_PKG\n计划时长: $DURATION_SEC 秒"
+fi
+# 设备 / 版本信息 (分析器按它把结果存进历史库，跨版本对比)
+APP_VERSION=$(dumpsys package $TARGET_PKG 2>/dev/null | grep versionName | head -n 1 | sed 's/.*versionName=//')
+log_info "[DEVICE] Model:$DEV_NAME | Serial:$(getprop ro.serialno) | Android:$(getprop ro.build.version.release) | Build:$(getprop ro.build.display.id) | App:$APP_VERSION"
 
 while true; do
     # 1. 全局时长检查
     now_up=$(get_uptime_sec)
     if [ $((now_up - start_uptime)) -ge $DURATION_SEC ]; then
         send_feishu "✅ 压测完成" "已满 $DURATION_SEC 秒。"
+        test_finished=1
+        rm -f "$CHECKPOINT_FILE"
         exit 0
     fi
 
     # 2. 插入 Excel 生成的动作序列
     # {{TASK_SEQUENCE_HERE}}
 
+    # 断点位置已不存在 (比如计划被修改)，下一轮从头正常执行
+    resume_pending=0
+
     # 3. 每一轮大循环后的缓冲
     sleep 1
 done
\ No newline at end of file
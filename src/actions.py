@@ -6,14 +6,22 @@ class ActionGenerator:
     def generate(self, task: TaskModel) -> CompiledFragment:
         raise NotImplementedError
 
+    @staticmethod
+    def step(task: TaskModel, desc: str, cmd: str) -> str:
+        """
+        动作的主体代码: 前后包上模板里的 step_begin / step_end，
+        每执行一次写一行带全局序号和毫秒计时的 [STEP] 记录
+        """
+        return f'    step_begin {task.action} "{desc}"\n{cmd}    step_end\n'
+
 class ClickGenerator(ActionGenerator):
     def generate(self, task: TaskModel) -> CompiledFragment:
         x, y = task.p1, task.p2
-        log_cmd = f'    log_info "[STEP] 点击: {x}, {y}"\n'
+        desc = f"点击: {x}, {y}"
         adb_cmd = f'    input tap {x} {y}\n'
 
         # 直接实例化 Pydantic 对象
-        return CompiledFragment(main_code=log_cmd + adb_cmd)
+        return CompiledFragment(main_code=self.step(task, desc, adb_cmd))
 
 
 class SwipeGenerator(ActionGenerator):
@@ -22,10 +30,10 @@ class SwipeGenerator(ActionGenerator):
         duration = 300
         x1, y1, x2, y2 = task.p1, task.p2, task.p3, task.p4
 
-        log_cmd = f'    log_info "[STEP] 滑动: {x1},{y1} -> {x2},{y2}"\n'
+        desc = f"滑动: {x1},{y1} -> {x2},{y2}"
         adb_cmd = f'    input swipe {x1} {y1} {x2} {y2} {duration}\n'
 
-        return CompiledFragment(main_code=log_cmd + adb_cmd)
+        return CompiledFragment(main_code=self.step(task, desc, adb_cmd))
 
 
 class WaitGenerator(ActionGenerator):
@@ -33,10 +41,10 @@ class WaitGenerator(ActionGenerator):
         # 处理默认值，如果 p1 没填，默认等待 1 秒
         seconds = task.p1 if task.p1 else "1"
 
-        log_cmd = f'    log_info "[STEP] 等待: {seconds}秒"\n'
+        desc = f"等待: {seconds}秒"
         adb_cmd = f'    sleep {seconds}\n'
 
-        return CompiledFragment(main_code=log_cmd + adb_cmd)
+        return CompiledFragment(main_code=self.step(task, desc, adb_cmd))
 
 
 class TextGenerator(ActionGenerator):
@@ -47,19 +55,19 @@ class TextGenerator(ActionGenerator):
         # Android input text 不支持空格，通常用 %s 代替
         clean_txt = raw_txt.replace(" ", "%s").replace("'", "").replace('"', '')
 
-        log_cmd = f'    log_info "[STEP] 输入文本: {clean_txt}"\n'
+        desc = f"输入文本: {clean_txt}"
         # 注意给文本加单引号，防止特殊字符炸裂
         adb_cmd = f"    input text '{clean_txt}'\n"
 
-        return CompiledFragment(main_code=log_cmd + adb_cmd)
+        return CompiledFragment(main_code=self.step(task, desc, adb_cmd))
 
 
 class KeyGenerator(ActionGenerator):
     def generate(self, task: TaskModel) -> CompiledFragment:
         key_code = task.p1
-        log_cmd = f'    log_info "[STEP] 按键: {key_code}"\n'
+        desc = f"按键: {key_code}"
         adb_cmd = f'    input keyevent {key_code}\n'
-        return CompiledFragment(main_code=log_cmd + adb_cmd)
+        return CompiledFragment(main_code=self.step(task, desc, adb_cmd))
 
 
 class ShellGenerator(ActionGenerator):
@@ -75,25 +83,25 @@ class ShellGenerator(ActionGenerator):
 
         clean_cmd_log = cmd.replace('"', '\\"')
 
-        log_cmd = f'    log_info "[STEP] Shell: {clean_cmd_log}"\n'
+        desc = f"Shell: {clean_cmd_log}"
         adb_cmd = f'    {cmd}\n'
-        return CompiledFragment(main_code=log_cmd + adb_cmd)
+        return CompiledFragment(main_code=self.step(task, desc, adb_cmd))
 
 
 class StopGenerator(ActionGenerator):
     def generate(self, task: TaskModel) -> CompiledFragment:
         # 使用模板里的全局变量 ${TARGET_PKG}
-        log_cmd = '    log_info "[STEP] 停止应用"\n'
+        desc = "停止应用"
         adb_cmd = '    am force-stop ${TARGET_PKG}\n'
-        return CompiledFragment(main_code=log_cmd + adb_cmd)
+        return CompiledFragment(main_code=self.step(task, desc, adb_cmd))
 
 
 class StartGenerator(ActionGenerator):
     def generate(self, task: TaskModel) -> CompiledFragment:
         # 使用模板里的全局变量 ${START_URI}
-        log_cmd = '    log_info "[STEP] 启动应用"\n'
+        desc = "启动应用"
         adb_cmd = '    am start -n ${START_URI}\n'
-        return CompiledFragment(main_code=log_cmd + adb_cmd)
+        return CompiledFragment(main_code=self.step(task, desc, adb_cmd))
 
 
 ACTION_REGISTRY: Dict[str, ActionGenerator] = {
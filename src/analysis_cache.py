@@ -0,0 +1,143 @@
+import os
+import json
+import hashlib
+import tempfile
+
+import numpy as np
+
+from src.series import TimeSeries
+
+
+class AnalysisCache:
+    """
+    日志解析结果的旁路缓存 (每份日志一个 .npz: 曲线数组 + JSON 元数据)。
+
+    - 文件名是日志身份的哈希: 第一行 (带开始时间) + 开头的 [DEVICE] 行 (带序列号)。
+      同一秒启动的多台设备第一行一样，靠序列号区分；没有 [DEVICE] 行的老日志再加上文件的绝对路径。
+      网页上传的日志每次都落到新的临时文件，有 [DEVICE] 行时不依赖路径；也不能用固定长度的开头，否则日志变长后 key 就变了
+    - 元数据记录解析时日志的大小、mtime 和结尾 64KB 的哈希:
+        大小相同且内容一致 -> 直接命中；日志变长但原来的部分没变 -> 在缓存结果上增量解析
+    - 缓存目录总大小超过 max_bytes 时，按最近使用时间淘汰
+    """
+
+    HEAD_BYTES = 4096
+    TAIL_BYTES = 64 * 1024
+
+    def __init__(self, cache_dir=None, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "dognoise_analysis_cache")
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def _hash_range(path, start, end):
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            f.seek(start)
+            h.update(f.read(end - start))
+        return h.hexdigest()
+
+    @classmethod
+    def fingerprint(cls, log_path, path_fallback=True):
+        """
+        日志身份: 第一行 + 开头 HEAD_BYTES 内第一条 [DEVICE] 行的哈希，日志变长 / 换了路径都不变。
+        开头只取完整的行；没有 [DEVICE] 行时 path_fallback 决定是否拼上绝对路径 (不会和别的设备撞)。
+        """
+        with open(log_path, "rb") as f:
+            head = f.read(cls.HEAD_BYTES)
+        lines = head[:head.rfind(b"\n") + 1].splitlines(keepends=True) or [head]
+        h = hashlib.sha1(lines[0])
+        device = next((line for line in lines[1:] if b"[DEVICE]" in line), None)
+        if device is not None:
+            h.update(device)
+        elif path_fallback:
+            h.update(os.path.abspath(log_path).encode("utf-8"))
+        return h.hexdigest()
+
+    def entry_path(self, log_path):
+        return os.path.join(self.cache_dir, f"{self.fingerprint(log_path)}.npz")
+
+    # ==========================================
+    # 读取
+    # ==========================================
+    def load(self, log_path, analyzer):
+        """
+        缓存有效时把状态导入 analyzer。
+        :return: "hit" (日志没变) / "grown" (日志只是变长了) / None (没有可用缓存)
+        """
+        path = self.entry_path(log_path)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                meta = json.loads(npz["meta"].tobytes().decode("utf-8"))
+                series = {k: TimeSeries.from_arrays(npz[f"{k}__t"], npz[f"{k}__v"])
+                          for k in analyzer.SERIES_KEYS}
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ 分析缓存损坏，忽略: {e}")
+            return None
+
+        st = os.stat(log_path)
+        cached = meta["log"]
+        if st.st_size < cached["size"]:
+            return None
+        same_file = st.st_size == cached["size"] and st.st_mtime_ns == cached["mtime_ns"]
+        if not same_file:
+            tail = self._hash_range(log_path, max(0, cached["size"] - self.TAIL_BYTES), cached["size"])
+            if tail != cached["tail"]:
+                return None
+
+        if not analyzer.import_state(meta["state"], series):
+            return None
+        # 记录一下最近使用时间，淘汰时用
+        os.utime(path)
+        return "hit" if st.st_size == cached["size"] else "grown"
+
+    # ==========================================
+    # 写入 + 淘汰
+    # ==========================================
+    def save(self, log_path, analyzer):
+        st = os.stat(log_path)
+        size = analyzer._offset
+        meta = {
+            "log": {
+                "size": size,
+                "mtime_ns": st.st_mtime_ns,
+                "tail": self._hash_range(log_path, max(0, size - self.TAIL_BYTES), size),
+            },
+            "state": analyzer.export_state(),
+        }
+        arrays = {"meta": np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"), dtype=np.uint8)}
+        for key in analyzer.SERIES_KEYS:
+            arrays[f"{key}__t"] = analyzer.data[key].epochs
+            arrays[f"{key}__v"] = analyzer.data[key].values
+
+        path = self.entry_path(log_path)
+        # 临时文件带进程号: 批量分析时多个进程可能同时写同一个条目 (开头一样的两份日志)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep=None):
+        """总大小超过上限时，从最久没用过的开始删"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            # 别的进程正在写的临时文件不算
+            if name.endswith(".npz") and ".tmp." not in name:
+                p = os.path.join(self.cache_dir, name)
+                try:
+                    entries.append((os.path.getmtime(p), os.path.getsize(p), p))
+                except OSError:
+                    continue
+        total = sum(e[1] for e in entries)
+        for _, size, p in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if p == keep:
+                continue
+            try:
+                os.remove(p)
+                total -= size
+            except OSError:
+                pass
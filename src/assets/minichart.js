@@ -0,0 +1,367 @@
+// Dognoise MiniChart: 离线报告用的极简 canvas 时间序列图 (折线 / 柱状，多 Y 轴，十字光标提示，框选放大)
+// 不依赖任何第三方库，生成报告时去掉注释和缩进后内联到 HTML 里
+(function (global) {
+    "use strict";
+
+    var TYPES = {f4: Float32Array, i2: Int16Array, i4: Int32Array};
+    var PAD = {l: 56, r: 16, t: 30, b: 28};
+    var AXIS_W = 52;
+    var charts = [];
+
+    function buffer(b64) {
+        var bin = atob(b64), n = bin.length, out = new Uint8Array(n);
+        for (var i = 0; i < n; i++) out[i] = bin.charCodeAt(i);
+        return out.buffer;
+    }
+
+    function values(pack, b64) {
+        return pack.n ? new TYPES[pack.vt](buffer(b64)) : new Float32Array(0);
+    }
+
+    // {n, t0, dt, v, vt} -> {t: 毫秒时间戳, v: 数值}; dt 是相邻点的秒级差值 (int32)
+    // 预聚合的一层另外带 w (桶宽，秒) 和 lo / hi (桶内最小 / 最大值)
+    function decode(pack) {
+        var n = pack.n, t = new Float64Array(n);
+        var out = {t: t, v: values(pack, pack.v), w: pack.w || 0};
+        if (pack.lo !== undefined) {
+            out.lo = values(pack, pack.lo);
+            out.hi = values(pack, pack.hi);
+        }
+        if (n) {
+            var dt = new Int32Array(buffer(pack.dt)), cur = pack.t0;
+            t[0] = cur * 1000;
+            for (var i = 1; i < n; i++) {
+                cur += dt[i - 1];
+                t[i] = cur * 1000;
+            }
+        }
+        return out;
+    }
+
+    function pad2(x) {
+        return (x < 10 ? "0" : "") + x;
+    }
+
+    // 时间戳按日志里的墙上时间编码，一律按 UTC 显示，不做时区换算
+    function fmtTime(ms, full) {
+        var d = new Date(ms);
+        var s = pad2(d.getUTCMonth() + 1) + "-" + pad2(d.getUTCDate()) + " " +
+            pad2(d.getUTCHours()) + ":" + pad2(d.getUTCMinutes());
+        return full ? d.getUTCFullYear() + "-" + s + ":" + pad2(d.getUTCSeconds()) : s;
+    }
+
+    function fmtNum(v) {
+        return Math.abs(v) >= 100 ? String(Math.round(v)) : String(Math.round(v * 10) / 10);
+    }
+
+    function fmtWidth(w) {
+        return w >= 3600 ? w / 3600 + " 小时" : w / 60 + " 分钟";
+    }
+
+    // 二分查找第一个 >= x 的下标
+    function lower(t, x) {
+        var lo = 0, hi = t.length;
+        while (lo < hi) {
+            var mid = (lo + hi) >> 1;
+            if (t[mid] < x) lo = mid + 1; else hi = mid;
+        }
+        return lo;
+    }
+
+    // 二分查找离 x 最近的下标
+    function nearest(t, x) {
+        if (!t.length) return -1;
+        var lo = Math.min(lower(t, x), t.length - 1);
+        return lo > 0 && x - t[lo - 1] < t[lo] - x ? lo - 1 : lo;
+    }
+
+    // 每条曲线的 data 是整场的概览 (降采样后的原始点)，data.levels 是可选的预聚合层 (细到粗)。
+    // 框选放大后按可见范围重新挑数据: 每个像素最多一个点的前提下，取可见点最多的那一份
+    function Chart(el, opt) {
+        this.el = el;
+        this.opt = opt;
+        this.series = opt.series;
+        this.tmin = Infinity;
+        this.tmax = -Infinity;
+        for (var i = 0; i < this.series.length; i++) {
+            var d = this.series[i].data;
+            if (d.t.length) {
+                this.tmin = Math.min(this.tmin, d.t[0]);
+                this.tmax = Math.max(this.tmax, d.t[d.t.length - 1]);
+            }
+        }
+        if (this.tmax <= this.tmin) this.tmax = this.tmin + 1000;
+
+        this.canvas = document.createElement("canvas");
+        this.tip = document.createElement("div");
+        this.tip.className = "mc-tip";
+        el.style.position = "relative";
+        el.appendChild(this.canvas);
+        el.appendChild(this.tip);
+
+        var self = this;
+        function px(e) {
+            return e.clientX - self.canvas.getBoundingClientRect().left;
+        }
+        el.addEventListener("mousedown", function (e) {
+            self.dragFrom = px(e);
+            e.preventDefault();
+        });
+        el.addEventListener("mousemove", function (e) {
+            self.draw(px(e));
+        });
+        el.addEventListener("mouseup", function (e) {
+            var from = self.dragFrom, to = px(e);
+            self.dragFrom = undefined;
+            if (from !== undefined && Math.abs(to - from) > 4) self.zoom(from, to); else self.draw(to);
+        });
+        el.addEventListener("dblclick", function () {
+            self.zoom();
+        });
+        el.addEventListener("mouseleave", function () {
+            self.dragFrom = undefined;
+            self.draw();
+        });
+        charts.push(this);
+        this.zoom();
+    }
+
+    // 像素区间 [a, b] 放大到对应的时间范围，不传参数时还原到整场
+    Chart.prototype.zoom = function (a, b) {
+        if (a === undefined) {
+            this.t0 = this.tmin;
+            this.t1 = this.tmax;
+        } else {
+            var L = this.layout(), lo = Math.max(L.x0, Math.min(a, b)), hi = Math.min(L.x1, Math.max(a, b));
+            var t0 = this.t0 + (lo - L.x0) / (L.x1 - L.x0) * (this.t1 - this.t0);
+            var t1 = this.t0 + (hi - L.x0) / (L.x1 - L.x0) * (this.t1 - this.t0);
+            if (t1 - t0 < 1000) return this.draw();
+            this.t0 = t0;
+            this.t1 = t1;
+        }
+        this.fit();
+        this.draw();
+    };
+
+    Chart.prototype.visible = function (d) {
+        return lower(d.t, this.t1 + 1) - lower(d.t, this.t0);
+    };
+
+    // 按当前可见范围挑每条曲线的数据，并重新计算各 Y 轴的范围
+    Chart.prototype.fit = function () {
+        var budget = Math.max(50, this.el.clientWidth), i, j, k, ax;
+        this.axes = [];
+        this.shown = [];
+        for (i = 0; i < this.series.length; i++) {
+            var s = this.series[i], a = s.axis || 0, d = s.data, most = this.visible(d), levels = d.levels || [];
+            for (k = 0; k < levels.length; k++) {
+                var n = this.visible(levels[k]);
+                if (n <= budget && n > most) {
+                    d = levels[k];
+                    most = n;
+                }
+            }
+            this.shown.push(d);
+            if (!this.axes[a]) this.axes[a] = {min: this.opt.bar ? 0 : Infinity, max: -Infinity, color: s.color};
+            ax = this.axes[a];
+            var lo = d.lo || d.v, hi = d.hi || d.v, end = Math.min(d.t.length, lower(d.t, this.t1) + 1);
+            for (j = Math.max(0, lower(d.t, this.t0) - 1); j < end; j++) {
+                if (lo[j] < ax.min) ax.min = lo[j];
+                if (hi[j] > ax.max) ax.max = hi[j];
+            }
+        }
+        if (this.opt.markY !== undefined && this.axes[0]) this.axes[0].max = Math.max(this.axes[0].max, this.opt.markY);
+        for (i = 0; i < this.axes.length; i++) {
+            ax = this.axes[i];
+            if (!ax || ax.max < ax.min) continue;
+            var span = ax.max - ax.min || Math.abs(ax.max) || 1;
+            ax.max += span * 0.05;
+            if (ax.min !== 0) ax.min -= span * 0.05;
+        }
+    };
+
+    Chart.prototype.layout = function () {
+        var ratio = global.devicePixelRatio || 1, c = this.canvas;
+        var w = this.el.clientWidth, h = this.el.clientHeight;
+        c.width = w * ratio;
+        c.height = h * ratio;
+        c.style.width = w + "px";
+        c.style.height = h + "px";
+        var g = c.getContext("2d");
+        g.setTransform(ratio, 0, 0, ratio, 0, 0);
+        var right = PAD.r + AXIS_W * Math.max(0, this.axes.length - 1);
+        return {g: g, x0: PAD.l, x1: w - right, y0: PAD.t, y1: h - PAD.b, w: w, h: h};
+    };
+
+    Chart.prototype.x = function (L, t) {
+        return L.x0 + (t - this.t0) / (this.t1 - this.t0) * (L.x1 - L.x0);
+    };
+
+    Chart.prototype.y = function (L, ax, v) {
+        return L.y1 - (v - ax.min) / (ax.max - ax.min || 1) * (L.y1 - L.y0);
+    };
+
+    Chart.prototype.draw = function (cursor) {
+        var L = this.layout(), g = L.g, i, j, k, s, ax, d;
+        g.clearRect(0, 0, L.w, L.h);
+        g.font = "11px sans-serif";
+
+        var empty = true;
+        for (i = 0; i < this.series.length; i++) if (this.series[i].data.t.length) empty = false;
+        if (empty) {
+            g.fillStyle = "#95a5a6";
+            g.textAlign = "center";
+            g.fillText("暂无数据", L.w / 2, L.h / 2);
+            return;
+        }
+
+        // 网格 + Y 轴刻度 (第一条轴在左边，其余依次排在右边)
+        g.strokeStyle = "#ecf0f1";
+        g.lineWidth = 1;
+        for (k = 0; k <= 4; k++) {
+            var gy = L.y0 + (L.y1 - L.y0) * k / 4;
+            g.beginPath();
+            g.moveTo(L.x0, gy);
+            g.lineTo(L.x1, gy);
+            g.stroke();
+            for (i = 0; i < this.axes.length; i++) {
+                ax = this.axes[i];
+                if (!ax || ax.max < ax.min) continue;
+                g.fillStyle = this.axes.length > 1 ? ax.color : "#7f8c8d";
+                g.textAlign = i ? "left" : "right";
+                var tx = i ? L.x1 + 6 + AXIS_W * (i - 1) : L.x0 - 6;
+                g.fillText(fmtNum(ax.max - (ax.max - ax.min) * k / 4), tx, gy + 4);
+            }
+        }
+
+        // X 轴时间刻度
+        g.fillStyle = "#7f8c8d";
+        g.textAlign = "center";
+        var ticks = Math.max(2, Math.floor((L.x1 - L.x0) / 120));
+        for (k = 0; k <= ticks; k++) {
+            var tt = this.t0 + (this.t1 - this.t0) * k / ticks;
+            g.fillText(fmtTime(tt), this.x(L, tt), L.y1 + 18);
+        }
+
+        // 阈值参考线 (例如 Ping 超时 1000ms)
+        if (this.opt.markY !== undefined && this.axes[0]) {
+            var my = this.y(L, this.axes[0], this.opt.markY);
+            g.strokeStyle = "#e74c3c";
+            g.setLineDash([5, 4]);
+            g.beginPath();
+            g.moveTo(L.x0, my);
+            g.lineTo(L.x1, my);
+            g.stroke();
+            g.setLineDash([]);
+            g.fillStyle = "#e74c3c";
+            g.textAlign = "right";
+            g.fillText(this.opt.markLabel || "", L.x1 - 4, my - 4);
+        }
+
+        // 曲线 / 柱子
+        g.save();
+        g.beginPath();
+        g.rect(L.x0, L.y0 - 1, L.x1 - L.x0, L.y1 - L.y0 + 2);
+        g.clip();
+        for (i = 0; i < this.series.length; i++) {
+            s = this.series[i];
+            d = this.shown[i];
+            ax = this.axes[s.axis || 0];
+            var first = Math.max(0, lower(d.t, this.t0) - 1), last = Math.min(d.t.length, lower(d.t, this.t1) + 1);
+            g.strokeStyle = g.fillStyle = s.color;
+            if (this.opt.bar) {
+                var bw = Math.max(1, Math.min(12, (L.x1 - L.x0) / Math.max(1, last - first) * 0.6));
+                for (j = first; j < last; j++) {
+                    var bx = this.x(L, d.t[j]), by = this.y(L, ax, d.v[j]);
+                    g.fillRect(bx - bw / 2, by, bw, L.y1 - by);
+                }
+            } else {
+                // 预聚合的层: 先画桶内最小 ~ 最大的半透明带，再画均值线
+                if (d.lo && last > first) {
+                    g.globalAlpha = 0.15;
+                    g.beginPath();
+                    for (j = first; j < last; j++) g.lineTo(this.x(L, d.t[j]), this.y(L, ax, d.hi[j]));
+                    for (j = last - 1; j >= first; j--) g.lineTo(this.x(L, d.t[j]), this.y(L, ax, d.lo[j]));
+                    g.fill();
+                    g.globalAlpha = 1;
+                }
+                g.lineWidth = 1.5;
+                g.beginPath();
+                for (j = first; j < last; j++) {
+                    var px = this.x(L, d.t[j]), py = this.y(L, ax, d.v[j]);
+                    if (j > first) g.lineTo(px, py); else g.moveTo(px, py);
+                }
+                g.stroke();
+            }
+        }
+        g.restore();
+
+        // 图例
+        var lx = L.x0;
+        g.textAlign = "left";
+        for (i = 0; i < this.series.length; i++) {
+            s = this.series[i];
+            g.fillStyle = s.color;
+            g.fillRect(lx, 8, 12, 10);
+            g.fillStyle = "#2c3e50";
+            g.fillText(s.name, lx + 16, 17);
+            lx += 28 + g.measureText(s.name).width;
+        }
+
+        // 右上角: 当前用的聚合粒度 + 操作提示
+        var zoomed = this.t0 > this.tmin || this.t1 < this.tmax, w = this.shown.length ? this.shown[0].w : 0;
+        g.fillStyle = "#95a5a6";
+        g.textAlign = "right";
+        g.fillText((w ? "每 " + fmtWidth(w) + "聚合 · " : "") + (zoomed ? "双击还原" : "拖动框选放大"), L.x1, 17);
+
+        // 正在框选的范围
+        if (this.dragFrom !== undefined && cursor !== undefined) {
+            g.fillStyle = "rgba(52,152,219,0.15)";
+            g.fillRect(Math.min(this.dragFrom, cursor), L.y0, Math.abs(cursor - this.dragFrom), L.y1 - L.y0);
+        }
+
+        // 十字光标 + 提示框: 每条曲线取离光标最近的点
+        if (cursor === undefined || cursor < L.x0 || cursor > L.x1) {
+            this.tip.style.display = "none";
+            return;
+        }
+        var at = this.t0 + (cursor - L.x0) / (L.x1 - L.x0) * (this.t1 - this.t0);
+        g.strokeStyle = "#95a5a6";
+        g.beginPath();
+        g.moveTo(cursor, L.y0);
+        g.lineTo(cursor, L.y1);
+        g.stroke();
+        var html = "", shown = null;
+        for (i = 0; i < this.series.length; i++) {
+            s = this.series[i];
+            d = this.shown[i];
+            j = nearest(d.t, at);
+            if (j < 0) continue;
+            if (shown === null) shown = d.t[j];
+            html += '<div><span style="color:' + s.color + '">●</span> ' + s.name + ": <b>" + fmtNum(d.v[j]) +
+                "</b>" + (d.lo ? " (" + fmtNum(d.lo[j]) + " ~ " + fmtNum(d.hi[j]) + ")" : "") + "</div>";
+        }
+        this.tip.innerHTML = "<div>" + fmtTime(shown, true) + "</div>" + html;
+        this.tip.style.display = "block";
+        this.tip.style.left = (cursor > L.w / 2 ? cursor - this.tip.offsetWidth - 12 : cursor + 12) + "px";
+        this.tip.style.top = L.y0 + "px";
+    };
+
+    global.addEventListener("resize", function () {
+        for (var i = 0; i < charts.length; i++) {
+            charts[i].fit();
+            charts[i].draw();
+        }
+    });
+
+    global.MiniChart = {
+        decode: decode,
+        line: function (id, opt) {
+            return new Chart(document.getElementById(id), opt);
+        },
+        bar: function (id, opt) {
+            opt.bar = true;
+            return new Chart(document.getElementById(id), opt);
+        }
+    };
+})(window);
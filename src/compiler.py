@@ -19,15 +19,23 @@ class StressCompiler:
         bucket_main = []  # 装 main_code (循环体内的逻辑)
 
         # === 第一阶段：遍历所有 Plan，让 Action 干活 ===
-        for plan in self.project.plans:
+        # sheet_idx / step_idx 从 1 开始，写入断点文件，续跑时据此跳过已完成的步骤
+        for sheet_idx, plan in enumerate(self.project.plans, start=1):
 
             # 生成 Sheet 之间的注释，方便阅读
             bucket_main.append(f"\n    # >>> Sheet: {plan.name} (Loop: {plan.loop_count}) <<<\n")
-            bucket_main.append(f"    sheet_count=0\n")
+            bucket_main.append(f"    sheet_idx={sheet_idx}\n")
+            bucket_main.append(f"    sheet_count=$(resume_sheet_start {sheet_idx} {plan.loop_count})\n")
+            if plan.pace_apm:
+                # 节奏控制: 目标 APM -> 每步间隔毫秒数，交给模板里的 pace_* 函数对齐截止时间
+                interval_ms = max(1, int(60000 / plan.pace_apm))
+                safe_name = plan.name.replace('"', '')
+                bucket_main.append(f"    pace_start \"{safe_name}\" {plan.pace_apm:.1f} {interval_ms}\n")
             bucket_main.append(f"    while [ $sheet_count -lt {plan.loop_count} ]; do\n")
             bucket_main.append(f"        sheet_count=$((sheet_count + 1))\n")
 
             # 遍历每一个任务
+            step_idx = 0
             for task in plan.tasks:
                 generator = ACTION_REGISTRY.get(task.action)
 
@@ -44,21 +52,31 @@ class StressCompiler:
                     bucket_setup.append(fragment.setup_code)
 
                 if fragment.main_code:
+                    step_idx += 1
+                    bucket_main.append(f"        step_idx={step_idx}\n")
+                    bucket_main.append(f"        if ! resume_skip $sheet_idx $step_idx; then\n")
                     if task.repeat>1:
                         bucket_main.append(f"        # Step Repeat: {task.repeat} times\n")
                         bucket_main.append(f"        step_i=0\n")
                         bucket_main.append(f"        while [ $step_i -lt {task.repeat} ]; do\n")
 
                         bucket_main.append(fragment.main_code)  # 核心代码放中间
+                        if plan.pace_apm:
+                            bucket_main.append(f"            pace_tick\n")
 
                         bucket_main.append(f"            step_i=$((step_i + 1))\n")
                         bucket_main.append(f"        done\n")
                     else:
                         bucket_main.append(fragment.main_code)
+                        if plan.pace_apm:
+                            bucket_main.append(f"        pace_tick\n")
                     # 自动插入哨兵检查
                     bucket_main.append("        check_health_fast\n")
+                    bucket_main.append("        fi\n")
 
             bucket_main.append("    done\n")  # 结束这个 Sheet 的循环
+            if plan.pace_apm:
+                bucket_main.append("    pace_report\n")
 
         # === 第二阶段：组装成文 ===
         # 去重：函数定义不能重复，setup 代码也不建议重复
@@ -0,0 +1,132 @@
+import re
+import hashlib
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class CrashSignature(BaseModel):
+    """同一类崩溃 (归一化后的堆栈相同) 的汇总"""
+    signature: str
+    kind: str  # JAVA_CRASH / NATIVE_CRASH
+    title: str  # 异常类 (或信号) + 栈顶一帧
+    count: int = 0
+    first_time: Optional[str] = None
+    last_time: Optional[str] = None
+    first_epoch: Optional[int] = None
+    last_epoch: Optional[int] = None
+    example: List[str] = []  # 第一次出现时的原始堆栈
+
+
+class CrashIndex:
+    """
+    崩溃堆栈索引: 逐行喂入 logcat 记录，把同一个进程的堆栈拼起来，归一化后哈希成签名。
+
+    - Java 崩溃: AndroidRuntime 的 "FATAL EXCEPTION" 开始，同 PID 的后续行是堆栈
+    - Native 崩溃: libc 的 "Fatal signal" 开始，之后 DEBUG (crash_dump) 打印的 "#00 pc ..." 是回溯
+    - 归一化去掉线程名、PID、地址、行号、匿名类编号，异常只保留类名 (消息里常带对象 id)
+
+    只保存每个签名的计数 / 首末次时间 / 一份样例，内存和不同签名的数量成正比，和崩溃次数无关。
+    """
+
+    TAGS = ("AndroidRuntime", "libc", "DEBUG")
+    # 签名只取栈顶几帧: 更深的帧多是框架 / 线程池代码，区分度低，还容易因为调用路径不同把同一个崩溃拆开
+    MAX_FRAMES = 8
+    MAX_EXAMPLE_LINES = 40
+    # 同时在拼的堆栈数上限 (logcat 里不同进程的行会交错)，超过时先结束最早的一个
+    MAX_PENDING = 16
+    NATIVE_KEY = "native"
+
+    re_java_frame = re.compile(r"^\s*at\s+([\w$.<>]+)\(([^:)]*)")
+    re_exception = re.compile(r"^(Caused by:\s*)?([\w$.]+)")
+    re_anon = re.compile(r"\$\d+")
+    re_signal = re.compile(r"Fatal signal \d+ \((\w+)\)")
+    re_native_frame = re.compile(r"#\d+\s+pc\s+[0-9a-fA-F]+\s+(\S+)(?:\s+\(([^)+]+))?")
+
+    def __init__(self):
+        self.signatures: Dict[str, CrashSignature] = {}
+        self.total = 0
+        # PID (Native 崩溃用 NATIVE_KEY) -> 正在拼的堆栈
+        self._pending = {}
+
+    def feed(self, tag, pid, msg, time=None, epoch=None):
+        """喂入一行 logcat (Tag / PID / 内容)，time / epoch 只在崩溃开始那一行需要"""
+        if tag == "AndroidRuntime":
+            if msg.startswith("FATAL EXCEPTION"):
+                self._start(pid, "JAVA_CRASH", msg, time, epoch)
+            elif pid in self._pending:
+                self._append(pid, msg)
+        elif tag == "libc" and "Fatal signal" in msg:
+            self._start(self.NATIVE_KEY, "NATIVE_CRASH", msg, time, epoch)
+        elif tag == "DEBUG" and self.NATIVE_KEY in self._pending:
+            self._append(self.NATIVE_KEY, msg)
+
+    def close(self):
+        """日志读完后，把还没结束的堆栈也记进去"""
+        for key in list(self._pending):
+            self._finish(key)
+
+    def top(self, n=10):
+        """出现次数最多的 n 个签名 (次数相同时先出现的在前)"""
+        return sorted(self.signatures.values(), key=lambda s: (-s.count, s.first_epoch or 0))[:n]
+
+    def _start(self, key, kind, msg, time, epoch):
+        if key in self._pending:
+            self._finish(key)
+        self._pending[key] = {"kind": kind, "time": time, "epoch": epoch, "lines": [msg]}
+        if len(self._pending) > self.MAX_PENDING:
+            self._finish(next(iter(self._pending)))
+
+    def _append(self, key, msg):
+        lines = self._pending[key]["lines"]
+        if len(lines) < self.MAX_EXAMPLE_LINES:
+            lines.append(msg.rstrip())
+
+    def _finish(self, key):
+        crash = self._pending.pop(key)
+        parts = (self.normalize_native if crash["kind"] == "NATIVE_CRASH" else self.normalize_java)(crash["lines"])
+        signature = hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:12]
+
+        sig = self.signatures.get(signature)
+        if sig is None:
+            title = " @ ".join(parts[:2]) if len(parts) > 1 else (parts[0] if parts else crash["kind"])
+            sig = self.signatures[signature] = CrashSignature(
+                signature=signature, kind=crash["kind"], title=title,
+                first_time=crash["time"], first_epoch=crash["epoch"], example=crash["lines"])
+        sig.count += 1
+        sig.last_time, sig.last_epoch = crash["time"], crash["epoch"]
+        self.total += 1
+
+    # ==========================================
+    # 归一化
+    # ==========================================
+    def normalize_java(self, lines):
+        """['java.lang.NullPointerException', 'at com.x.Foo.bar(Foo.java)', 'Caused by: ...', ...]"""
+        parts, frames = [], 0
+        for line in lines[1:]:
+            line = line.strip()
+            if not line or line.startswith("Process:") or line.startswith("..."):
+                continue
+            m = self.re_java_frame.match(line)
+            if m:
+                if frames < self.MAX_FRAMES:
+                    parts.append(f"at {self.re_anon.sub('$', m.group(1))}({m.group(2)})")
+                    frames += 1
+                continue
+            m = self.re_exception.match(line)
+            if m:
+                parts.append((m.group(1) or "") + self.re_anon.sub("$", m.group(2)))
+                frames = 0
+        return parts
+
+    def normalize_native(self, lines):
+        """['SIGSEGV', '/system/lib64/libc.so (abort)', ...]"""
+        m = self.re_signal.search(lines[0])
+        parts = [m.group(1) if m else "SIGNAL"]
+        for line in lines[1:]:
+            m = self.re_native_frame.search(line)
+            if m:
+                parts.append(f"{m.group(1)} ({m.group(2)})" if m.group(2) else m.group(1))
+                if len(parts) > self.MAX_FRAMES:
+                    break
+        return parts
@@ -0,0 +1,91 @@
+import hashlib
+import subprocess
+from typing import Dict, List, Optional
+
+# 旧日志的处理方式
+WIPE_MODES = ("keep", "archive", "delete")
+
+
+class ScriptDeployer:
+    """
+    部署 stress_core.sh：本地脚本的 sha256 和手机上记录的一致就不再推送。
+    旧日志是否清理单独选择：保留 / 归档 (改名为带时间戳的目录) / 删除。
+    """
+
+    def __init__(self, adb: str = "adb", serial: Optional[str] = None, sh_filename: str = "stress_core.sh",
+                 remote_log_dir: str = "/sdcard/dognoise_stress"):
+        self.adb = adb
+        self.serial = serial
+        self.remote_script = f"/data/local/tmp/{sh_filename}"
+        self.remote_hash_file = f"{self.remote_script}.sha256"
+        self.remote_log_dir = remote_log_dir
+
+    def _cmd(self, *args: str) -> List[str]:
+        cmd = [self.adb]
+        if self.serial:
+            cmd += ["-s", self.serial]
+        return cmd + list(args)
+
+    def _adb(self, *args: str) -> str:
+        res = subprocess.run(self._cmd(*args), capture_output=True, timeout=300)
+        if res.returncode != 0:
+            raise RuntimeError(res.stderr.decode("utf-8", errors="ignore").strip() or f"adb 返回 {res.returncode}")
+        return res.stdout.decode("utf-8", errors="ignore")
+
+    @staticmethod
+    def local_hash(script_path: str) -> str:
+        with open(script_path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def hash_check_cmd(self) -> str:
+        # 脚本本身不在了，记录的哈希也不算数；exec-out 不会带 \r
+        return f"[ -f {self.remote_script} ] && cat {self.remote_hash_file} 2>/dev/null; true"
+
+    def install_cmd(self, digest: str) -> str:
+        return f"chmod 777 {self.remote_script} && echo {digest} > {self.remote_hash_file}"
+
+    def wipe_cmd(self, mode: str) -> Optional[str]:
+        """旧日志处理对应的 shell 命令，keep 时为 None (同步 / 异步两种部署共用)"""
+        if mode not in WIPE_MODES:
+            raise ValueError(f"未知的日志处理方式: {mode} (可选 {', '.join(WIPE_MODES)})")
+        if mode == "keep":
+            return None
+        if mode == "archive":
+            return (f"if [ -d {self.remote_log_dir} ]; then "
+                    f"dst={self.remote_log_dir}_$(date +%Y%m%d_%H%M%S); "
+                    f"mv {self.remote_log_dir} $dst && echo $dst; fi")
+        return f"rm -rf {self.remote_log_dir}/*"
+
+    @staticmethod
+    def wipe_desc(mode: str, out: str = "") -> str:
+        if mode == "keep":
+            return "保留旧日志"
+        if mode == "archive":
+            return f"旧日志已归档到 {out.strip()}" if out.strip() else "没有旧日志"
+        return "旧日志已删除"
+
+    def remote_hash(self) -> str:
+        return self._adb("exec-out", self.hash_check_cmd()).strip().lower()
+
+    def wipe_logs(self, mode: str) -> str:
+        """返回实际执行的动作描述"""
+        cmd = self.wipe_cmd(mode)
+        if cmd is None:
+            return self.wipe_desc(mode)
+        out = self._adb("shell", cmd)
+        # 清理了日志目录，logcat 缓冲也一起清掉，避免旧崩溃混进新一轮
+        self._adb("logcat", "-c")
+        return self.wipe_desc(mode, out)
+
+    def deploy(self, script_path: str, wipe: str = "archive") -> Dict:
+        """
+        :return: {"pushed": 是否推送了脚本, "hash": 本地哈希, "wipe": 日志处理描述}
+        """
+        digest = self.local_hash(script_path)
+        pushed = False
+        if self.remote_hash() != digest:
+            self._adb("push", script_path, self.remote_script)
+            self._adb("shell", self.install_cmd(digest))
+            pushed = True
+
+        return {"pushed": pushed, "hash": digest, "wipe": self.wipe_logs(wipe)}
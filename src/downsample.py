@@ -0,0 +1,69 @@
+import numpy as np
+
+# 每张图默认最多画多少个点 (浏览器 / Streamlit 在几千点以内都很流畅)
+DEFAULT_POINT_BUDGET = 2000
+
+
+def minmax(x, y, max_points):
+    """
+    按下标分桶，每个桶保留最小值和最大值两个点 (按原顺序)。
+    峰值一定会被保留 —— 内存尖峰、Ping 超时 (1000ms) 都不会被抹掉。
+    """
+    size = len(x)
+    if max_points is None or size <= max_points or max_points < 4:
+        return x, y
+
+    buckets = max_points // 2
+    edges = np.linspace(0, size, buckets + 1).astype(np.int64)
+    keep = np.empty(buckets * 2, dtype=np.int64)
+    for i in range(buckets):
+        lo, hi = edges[i], edges[i + 1]
+        seg = y[lo:hi]
+        a, b = lo + int(np.argmin(seg)), lo + int(np.argmax(seg))
+        keep[2 * i], keep[2 * i + 1] = (a, b) if a <= b else (b, a)
+
+    keep = np.unique(keep)  # 桶内最小值和最大值可能是同一个点
+    return x[keep], y[keep]
+
+
+def lttb(x, y, max_points):
+    """
+    Largest-Triangle-Three-Buckets: 每个桶选出和前一个选中点、后一个桶均值围成三角形面积最大的点，
+    比 min/max 更贴近原曲线的形状，首尾两个点总是保留。
+    """
+    size = len(x)
+    if max_points is None or size <= max_points or max_points < 3:
+        return x, y
+
+    xf = x.astype(np.float64)
+    yf = y.astype(np.float64)
+    every = (size - 2) / (max_points - 2)
+    keep = np.empty(max_points, dtype=np.int64)
+    keep[0], keep[-1] = 0, size - 1
+
+    a = 0
+    for i in range(max_points - 2):
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        nlo = hi
+        nhi = min(int((i + 2) * every) + 1, size)
+        avg_x, avg_y = xf[nlo:nhi].mean(), yf[nlo:nhi].mean()
+
+        area = np.abs((xf[a] - avg_x) * (yf[lo:hi] - yf[a]) - (xf[a] - xf[lo:hi]) * (avg_y - yf[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+
+    return x[keep], y[keep]
+
+
+METHODS = {"minmax": minmax, "lttb": lttb}
+
+
+def downsample(x, y, max_points=DEFAULT_POINT_BUDGET, method="minmax"):
+    """
+    :param max_points: 点数上限，None 表示不降采样 (全分辨率)
+    :param method: "minmax" (保峰值，默认) 或 "lttb" (保形状)
+    """
+    if method not in METHODS:
+        raise ValueError(f"未知的降采样方法: {method} (可选 {', '.join(METHODS)})")
+    return METHODS[method](x, y, max_points)
@@ -125,6 +125,7 @@ class ExcelLoader:
         # 模糊匹配列名
         seq_col = next((c for c in df_full.columns if "执行顺序" in str(c) or "Sheet" in str(c)), None)
         loop_col = next((c for c in df_full.columns if "本轮循环" in str(c) or "Loop" in str(c)), None)
+        pace_col = next((c for c in df_full.columns if "节奏" in str(c) or "APM" in str(c).upper()), None)
 
         # 只有当找到了“执行顺序”列，才继续
         if seq_col:
@@ -132,6 +133,8 @@ class ExcelLoader:
             cols_to_use = [seq_col]
             if loop_col:
                 cols_to_use.append(loop_col)
+            if pace_col:
+                cols_to_use.append(pace_col)
 
             # 过滤掉空的 Sheet 名
             plan_df = df_full[cols_to_use].dropna(subset=[seq_col])
@@ -152,6 +155,16 @@ class ExcelLoader:
                         print(f"Sheet [{sheet_name}] 循环次数格式错误，重置为 1")
                         loop_count = 1
 
+                # 节奏 (APM) 可选，填了才开启限速
+                pace_apm = None
+                if pace_col and pd.notna(row.get(pace_col)):
+                    try:
+                        pace_apm = float(row[pace_col])
+                        if pace_apm <= 0:
+                            pace_apm = None
+                    except ValueError:
+                        print(f"Sheet [{sheet_name}] 节奏 (APM) 格式错误，已忽略")
+
                 # 读取该 Sheet 的任务
                 raw_tasks = self._load_sheet_tasks(sheet_name)
 
@@ -163,6 +176,7 @@ class ExcelLoader:
                 plan = PlanModel(
                     name=sheet_name,
                     loop_count=loop_count,
+                    pace_apm=pace_apm,
                     tasks=raw_tasks
                 )
                 plans.append(plan)
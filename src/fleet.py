@@ -0,0 +1,218 @@
+import os
+import asyncio
+import subprocess
+import time
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from src.deployer import ScriptDeployer, WIPE_MODES
+from src.log_exporter import LogExporter
+
+
+class DeviceResult(BaseModel):
+    serial: str
+    ok: bool = False
+    stage: str = ""      # 最后执行到的阶段，失败时就是出错的阶段
+    detail: str = ""
+    elapsed: float = 0.0
+
+
+def list_devices(adb: str = "adb") -> List[str]:
+    """读取 adb devices 里在线的设备序列号"""
+    try:
+        out = subprocess.run([adb, "devices"], capture_output=True, text=True, timeout=30).stdout
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print(f"读取设备列表失败: {e}")
+        return []
+
+    serials = []
+    for line in out.splitlines()[1:]:
+        parts = line.split()
+        if len(parts) >= 2 and parts[1] == "device":
+            serials.append(parts[0])
+    return serials
+
+
+class FleetOrchestrator:
+    """
+    多设备并发控制，替代逐台手点的 1_一键启动.bat / 2_停止.bat。
+    每台设备的 adb 调用都是 asyncio 子进程，信号量限制并发数，
+    每台设备整体有超时，结束后汇总成一张表。
+    """
+
+    def __init__(self, serials: List[str], adb: str = "adb", parallel: int = 4, timeout: float = 180,
+                 sh_filename: str = "stress_core.sh", remote_log_dir: str = "/sdcard/dognoise_stress"):
+        self.serials = list(serials)
+        self.adb = adb
+        self.parallel = max(1, parallel)
+        self.timeout = timeout
+        self.sh_filename = sh_filename
+        self.remote_script = f"/data/local/tmp/{sh_filename}"
+        self.remote_log_dir = remote_log_dir
+        self.lock_file = "/data/local/tmp/dognoise.lock"
+
+    # ==========================================
+    # 基础: 单条 adb 命令
+    # ==========================================
+    async def _adb(self, serial: str, *args: str) -> Tuple[int, str]:
+        proc = await asyncio.create_subprocess_exec(
+            self.adb, "-s", serial, *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        try:
+            out, _ = await proc.communicate()
+        finally:
+            # 超时被取消时，不能把 adb 子进程留在后台
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+        return proc.returncode, out.decode("utf-8", errors="ignore").strip()
+
+    async def _adb_ok(self, serial: str, *args: str) -> str:
+        code, out = await self._adb(serial, *args)
+        if code != 0:
+            raise RuntimeError(out or f"adb {' '.join(args)} 返回 {code}")
+        return out
+
+    # ==========================================
+    # 单台设备的各个阶段
+    # ==========================================
+    async def _start_one(self, serial: str, result: DeviceResult, script_path: str, wipe: str):
+        result.stage = "wait"
+        await self._adb_ok(serial, "wait-for-device")
+
+        result.stage = "clean"
+        await self._adb(serial, "shell", f"pkill -f {self.sh_filename}")
+        await self._adb(serial, "shell", f"rm -f {self.lock_file}")
+
+        result.stage = "push"
+        deployed = await self._deploy(serial, script_path, wipe)
+
+        result.stage = "start"
+        await self._adb_ok(serial, "shell", f"nohup sh {self.remote_script} > /dev/null 2>&1 &")
+
+        result.stage = "alive"
+        # 脚本启动后会写锁文件，给它几秒钟
+        for _ in range(10):
+            pid = await self._check_alive(serial)
+            if pid:
+                result.detail = f"PID {pid} | {'已推送' if deployed['pushed'] else '脚本未变'} | {deployed['wipe']}"
+                return
+            await asyncio.sleep(0.5)
+        raise RuntimeError("脚本启动后未存活")
+
+    async def _deploy(self, serial: str, script_path: str, wipe: str) -> Dict:
+        """
+        ScriptDeployer.deploy 的异步版本: 脚本没变就不推送，旧日志按 wipe 选择处理。
+        命令和 ScriptDeployer 共用，但每条都走 self._adb，超时 / 取消时 adb 子进程会被杀掉。
+        """
+        deployer = ScriptDeployer(self.adb, serial, self.sh_filename, self.remote_log_dir)
+        digest = deployer.local_hash(script_path)
+        pushed = False
+        remote = await self._adb_ok(serial, "exec-out", deployer.hash_check_cmd())
+        if remote.strip().lower() != digest:
+            await self._adb_ok(serial, "push", script_path, deployer.remote_script)
+            await self._adb_ok(serial, "shell", deployer.install_cmd(digest))
+            pushed = True
+
+        cmd = deployer.wipe_cmd(wipe)
+        out = ""
+        if cmd is not None:
+            out = await self._adb_ok(serial, "shell", cmd)
+            await self._adb_ok(serial, "logcat", "-c")
+        return {"pushed": pushed, "hash": digest, "wipe": deployer.wipe_desc(wipe, out)}
+
+    async def _check_alive(self, serial: str) -> Optional[str]:
+        _, out = await self._adb(
+            serial, "shell",
+            f'pid=$(cat {self.lock_file} 2>/dev/null); '
+            f'[ -n "$pid" ] && kill -0 $pid 2>/dev/null && echo ALIVE:$pid')
+        for line in out.splitlines():
+            if line.startswith("ALIVE:"):
+                return line[len("ALIVE:"):].strip()
+        return None
+
+    async def _status_one(self, serial: str, result: DeviceResult):
+        result.stage = "alive"
+        pid = await self._check_alive(serial)
+        if not pid:
+            raise RuntimeError("脚本未运行")
+        _, tail = await self._adb(serial, "shell", f"tail -n 1 {self.remote_log_dir}/event.log")
+        result.detail = f"PID {pid} | {tail[:60]}"
+
+    async def _stop_one(self, serial: str, result: DeviceResult):
+        result.stage = "stop"
+        # 先按锁文件里的 PID 杀 (触发 trap 写停止报告)，再兜底 pkill
+        await self._adb(serial, "shell", f'pid=$(cat {self.lock_file} 2>/dev/null); [ -n "$pid" ] && kill $pid')
+        await self._adb(serial, "shell", f"pkill -f {self.sh_filename}")
+        await self._adb(serial, "shell", f"rm -f {self.lock_file}")
+        result.detail = "已发送停止信号"
+
+    async def _pull_one(self, serial: str, result: DeviceResult, dest_root: str):
+        result.stage = "pull"
+        dest = os.path.join(dest_root, serial)
+        # 单流归档导出是同步实现，放到线程里跑，不阻塞其他设备；
+        # 线程取消不了，超时 / 取消时由 exporter.cancel() 杀掉它正在跑的 adb
+        exporter = LogExporter(self.adb, serial, self.remote_log_dir, timeout=self.timeout)
+        try:
+            summary = await asyncio.to_thread(exporter.export_or_pull, dest)
+        except asyncio.CancelledError:
+            exporter.cancel()
+            raise
+        if summary["files"] is None:
+            result.detail = f"{dest} (adb pull)"
+        else:
+            result.detail = f"{dest} (新 {summary['files']} / 跳过 {summary['skipped']})"
+
+    # ==========================================
+    # 调度: 信号量 + 单台超时
+    # ==========================================
+    async def _guarded(self, sem: asyncio.Semaphore, serial: str, stage_func, *args) -> DeviceResult:
+        result = DeviceResult(serial=serial)
+        async with sem:
+            t0 = time.monotonic()
+            try:
+                await asyncio.wait_for(stage_func(serial, result, *args), timeout=self.timeout)
+                result.ok = True
+            except asyncio.TimeoutError:
+                result.detail = f"超时 ({self.timeout:.0f}s)"
+            except Exception as e:
+                # 单台设备出什么错都只记在它自己的结果里，不能让 gather 把其他设备一起带崩
+                result.detail = str(e).splitlines()[0] if str(e) else type(e).__name__
+            result.elapsed = time.monotonic() - t0
+        print(f"{'✅' if result.ok else '❌'} [{serial}] {result.stage}: {result.detail}")
+        return result
+
+    async def _run_all(self, stage_func, *args) -> List[DeviceResult]:
+        sem = asyncio.Semaphore(self.parallel)
+        tasks = [self._guarded(sem, s, stage_func, *args) for s in self.serials]
+        return list(await asyncio.gather(*tasks))
+
+    def start(self, script_path: str, wipe: str = "archive") -> List[DeviceResult]:
+        if not os.path.exists(script_path):
+            raise FileNotFoundError(f"找不到脚本: {script_path}")
+        if wipe not in WIPE_MODES:
+            raise ValueError(f"未知的日志处理方式: {wipe}")
+        return asyncio.run(self._run_all(self._start_one, script_path, wipe))
+
+    def status(self) -> List[DeviceResult]:
+        return asyncio.run(self._run_all(self._status_one))
+
+    def stop(self) -> List[DeviceResult]:
+        return asyncio.run(self._run_all(self._stop_one))
+
+    def pull(self, dest_root: str) -> List[DeviceResult]:
+        return asyncio.run(self._run_all(self._pull_one, dest_root))
+
+    @staticmethod
+    def format_summary(results: List[DeviceResult]) -> str:
+        header = f"{'设备':<20} {'结果':<6} {'阶段':<8} {'耗时':>8}  详情"
+        lines = [header, "-" * 72]
+        for r in results:
+            lines.append(f"{r.serial:<20} {'OK' if r.ok else 'FAIL':<6} {r.stage:<8} {r.elapsed:>7.1f}s  {r.detail}")
+        ok_count = sum(1 for r in results if r.ok)
+        lines.append("-" * 72)
+        lines.append(f"成功 {ok_count} / {len(results)}")
+        return "\n".join(lines)
@@ -0,0 +1,434 @@
+import os
+import re
+import queue
+import threading
+import subprocess
+import datetime
+import time
+import uuid
+from typing import List, Optional, Tuple
+
+from src.models import ProjectModel, CompiledFragment
+from src.actions import ACTION_REGISTRY
+
+
+class AdbShellSession:
+    """
+    一个长连接的 adb shell。
+    所有命令都写进同一个 stdin 管道，靠结束标记切分每条命令的输出，
+    整个运行期间只有一个 adb 进程。
+    """
+
+    def __init__(self, adb: str = "adb", serial: Optional[str] = None):
+        self.adb = adb
+        self.serial = serial
+        self.proc: Optional[subprocess.Popen] = None
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._reader: Optional[threading.Thread] = None
+        self._seq = 0
+        # 每个会话一个随机前缀，防止命令输出里恰好出现结束标记
+        self._mark = f"__DN_END_{uuid.uuid4().hex[:8]}_"
+
+    def start(self):
+        cmd = [self.adb]
+        if self.serial:
+            cmd += ["-s", self.serial]
+        cmd.append("shell")
+
+        self.proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=0,
+        )
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    def _read_loop(self):
+        for raw in iter(self.proc.stdout.readline, b""):
+            # 老设备的 adb shell 会带 \r
+            self._lines.put(raw.decode("utf-8", errors="ignore").rstrip("\r\n"))
+        self._lines.put(None)  # EOF
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def run(self, command: str, timeout: float = 60) -> Tuple[int, str]:
+        """
+        执行一条命令，返回 (退出码, 输出)。
+        超时或会话断开时抛 RuntimeError。
+        """
+        if not self.alive:
+            raise RuntimeError("adb shell 会话未启动或已断开")
+
+        self._seq += 1
+        mark = f"{self._mark}{self._seq}__"
+        # 花括号包起来，命令里的重定向/管道不会影响结束标记
+        payload = f"{{ {command}\n}} 2>&1; echo \"{mark} $?\"\n"
+        self.proc.stdin.write(payload.encode("utf-8"))
+        self.proc.stdin.flush()
+
+        output: List[str] = []
+        deadline = time.monotonic() + timeout
+        while True:
+            remain = deadline - time.monotonic()
+            if remain <= 0:
+                raise RuntimeError(f"命令超时 ({timeout}s): {command}")
+            try:
+                line = self._lines.get(timeout=remain)
+            except queue.Empty:
+                continue
+            if line is None:
+                raise RuntimeError(f"adb shell 会话已断开: {command}")
+            if line.startswith(self._mark):
+                if line.startswith(mark):
+                    code = line[len(mark):].strip()
+                    return int(code) if code.lstrip("-").isdigit() else -1, "\n".join(output)
+                # 之前超时的命令迟到的结束标记，丢弃
+                continue
+            output.append(line)
+
+    def close(self):
+        if not self.proc:
+            return
+        try:
+            if self.alive:
+                self.proc.stdin.write(b"exit\n")
+                self.proc.stdin.close()
+            self.proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.proc.kill()
+        self.proc = None
+
+
+class HostRunner:
+    """
+    在电脑端执行 ProjectModel，不再把 stress_core.sh 推到手机上跑。
+    - 动作: 复用 ACTION_REGISTRY 生成的 Shell 片段，通过同一个 adb shell 会话下发
+    - 监控: 内存/CPU/温度/网络/ANR/报错 的解析都在电脑上完成，手机只跑最基础的命令
+    - 日志: 写到本地 event.log，格式与 stress_template.sh 完全一致，analyze_log.py 可直接分析
+    """
+
+    re_log_info = re.compile(r'^log_info\s+"(.*)"$')
+    re_step_begin = re.compile(r'^step_begin\s+(\S+)\s+"(.*)"$')
+
+    def __init__(self, project: ProjectModel, log_dir: str, adb: str = "adb", serial: Optional[str] = None,
+                 check_interval: int = 60, remote_log_dir: str = "/sdcard/dognoise_stress"):
+        self.project = project
+        self.cfg = project.config
+        self.log_dir = log_dir
+        self.check_interval = check_interval
+        self.remote_log_dir = remote_log_dir
+        self.session = AdbShellSession(adb, serial)
+
+        self.event_log = os.path.join(log_dir, "event.log")
+        self._log_fp = None
+
+        self._start_ts = 0.0
+        self._last_heavy_check = 0.0
+        self._last_net_check = 0.0
+        self._last_fatal = ""
+        self._last_shot = {}
+        self._cpu_cores = 1
+        # 全局步骤序号，和模板的 step_seq 一样整场递增
+        self._step_seq = 0
+
+    # ==========================================
+    # 日志
+    # ==========================================
+    def log_info(self, msg: str):
+        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._log_fp.write(f"[{now}] {msg}\n")
+
+    def _log_raw(self, line: str):
+        self._log_fp.write(line + "\n")
+
+    # ==========================================
+    # 主流程
+    # ==========================================
+    def run(self, duration_sec: Optional[int] = None) -> bool:
+        duration = duration_sec if duration_sec is not None else self.cfg.duration_sec
+        os.makedirs(self.log_dir, exist_ok=True)
+
+        self._log_fp = open(self.event_log, "a", encoding="utf-8", buffering=1)
+        try:
+            self.session.start()
+            self._setup_session()
+
+            self._start_ts = time.monotonic()
+            self.log_info(f"=== 压测开始: {self.cfg.target_pkg} ===")
+            self.log_device_info()
+
+            while time.monotonic() - self._start_ts < duration:
+                # Sheet 编号按位置算，和编译器的 enumerate 一致 (两个内容相同的 Sheet 也不会拿到同一个编号)
+                for sheet_idx, plan in enumerate(self.project.plans, start=1):
+                    if not self._run_plan(plan, sheet_idx, duration):
+                        break
+                time.sleep(1)
+
+            self.log_info("=== 压测结束 ===")
+            return True
+        except RuntimeError as e:
+            self.log_info(f"[ERROR] 主机端执行中断: {e}")
+            print(f"❌ 主机端执行中断: {e}")
+            return False
+        finally:
+            self.session.close()
+            self._log_fp.close()
+            self._log_fp = None
+
+    def _setup_session(self):
+        # 模板里的全局变量，Action 片段里会用到 ${TARGET_PKG} / ${START_URI}
+        self.session.run(f'TARGET_PKG="{self.cfg.target_pkg}"; START_URI="{self.cfg.start_activity}"')
+        self.session.run(f'mkdir -p "{self.remote_log_dir}/screenshots"')
+        self.session.run("svc power stayon true")
+
+        code, out = self.session.run("grep -c ^processor /proc/cpuinfo")
+        if code == 0 and out.strip().isdigit():
+            self._cpu_cores = max(1, int(out.strip()))
+
+        # 自定义函数 / 初始化代码只需要在会话里定义一次
+        functions, setups = set(), set()
+        for plan in self.project.plans:
+            for task in plan.tasks:
+                generator = ACTION_REGISTRY.get(task.action)
+                if not generator:
+                    continue
+                fragment = generator.generate(task)
+                if fragment.function_code:
+                    functions.add(fragment.function_code)
+                if fragment.setup_code:
+                    setups.add(fragment.setup_code)
+        for code_block in sorted(functions) + sorted(setups):
+            self.session.run(code_block)
+
+    def log_device_info(self):
+        """和模板一样写一行 [DEVICE]，分析器按它把结果归档到历史库 (按设备 / 版本对比)"""
+        props = {
+            "Model": "getprop ro.product.model",
+            "Serial": "getprop ro.serialno",
+            "Android": "getprop ro.build.version.release",
+            "Build": "getprop ro.build.display.id",
+            "App": f"dumpsys package {self.cfg.target_pkg} | grep versionName | head -n 1 | sed 's/.*versionName=//'",
+        }
+        parts = []
+        for key, cmd in props.items():
+            code, out = self.session.run(f"{cmd} 2>/dev/null")
+            value = out.strip().splitlines()[-1].strip() if code == 0 and out.strip() else ""
+            if key == "Model" and self.cfg.device_name:
+                value = self.cfg.device_name
+            parts.append(f"{key}:{value}")
+        self.log_info("[DEVICE] " + " | ".join(parts))
+
+    def _run_plan(self, plan, sheet_idx: int, duration: int) -> bool:
+        """执行一个 Sheet 的全部循环，时长用完返回 False"""
+        interval = 60.0 / plan.pace_apm if plan.pace_apm else 0
+        pace_t0 = time.monotonic()
+        deadline = pace_t0
+        steps = 0
+
+        for _ in range(plan.loop_count):
+            step_idx = 0
+            for task in plan.tasks:
+                generator = ACTION_REGISTRY.get(task.action)
+                if not generator:
+                    continue
+                fragment = generator.generate(task)
+                if not fragment.main_code:
+                    continue
+                # 编号规则和编译器一致: 只数有主体代码的步骤
+                step_idx += 1
+
+                for _ in range(max(1, task.repeat)):
+                    self._run_fragment(fragment, f"{sheet_idx}.{step_idx}")
+                    steps += 1
+                    if interval:
+                        # 与模板的 pace_tick 相同: 对齐绝对截止时间，落后超过一个间隔就重置
+                        deadline += interval
+                        remain = deadline - time.monotonic()
+                        if remain > 0:
+                            time.sleep(remain)
+                        elif -remain > interval:
+                            deadline = time.monotonic()
+
+                self.check_health_fast()
+                if time.monotonic() - self._start_ts >= duration:
+                    return False
+
+        if interval and steps:
+            actual = steps * 60.0 / max(time.monotonic() - pace_t0, 1e-6)
+            self.log_info(f"[PACE] Sheet:{plan.name} | Target:{plan.pace_apm:.1f}apm | "
+                          f"Actual:{actual:.1f}apm | Steps:{steps}")
+        return True
+
+    def _run_fragment(self, fragment: CompiledFragment, step_id: str = "0.0"):
+        """
+        Action 片段里的 log_info 写本地日志，其余命令发给手机。
+        step_begin / step_end 在电脑端计时 (包含 adb 往返)，写出和模板相同格式的 [STEP][#序号] 行，
+        Start / End 是电脑端的单调时钟毫秒数 (分析器只用两者之差)。
+        """
+        commands = []
+        step = None
+        for line in fragment.main_code.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            m = self.re_log_info.match(line)
+            if m:
+                self.log_info(m.group(1).replace('\\"', '"'))
+                continue
+            m = self.re_step_begin.match(line)
+            if m:
+                self._run_commands(commands)
+                self._step_seq += 1
+                step = (m.group(1), m.group(2).replace('\\"', '"'), int(time.monotonic() * 1000))
+            elif line == "step_end" and step:
+                self._run_commands(commands)
+                action, desc, t0 = step
+                self.log_info(f"[STEP][#{self._step_seq}] {step_id} {action} {desc} | "
+                              f"Start:{t0} | End:{int(time.monotonic() * 1000)}")
+                step = None
+            else:
+                commands.append(line)
+        self._run_commands(commands)
+
+    def _run_commands(self, commands):
+        """把攒下的命令一次发给手机 (并清空列表)"""
+        if commands:
+            self.session.run("\n".join(commands), timeout=300)
+            commands.clear()
+
+    # ==========================================
+    # 电脑端监控 (对应模板里的 check_health_fast)
+    # ==========================================
+    def check_health_fast(self):
+        now = time.monotonic()
+        if now - self._last_heavy_check >= self.check_interval:
+            self.check_fatal_logs()
+            if self.check_anr_state():
+                self.monitor_performance()
+            self._last_heavy_check = now
+
+        if now - self._last_net_check >= self.check_interval:
+            self.check_network()
+            self._last_net_check = now
+
+    def take_snapshot(self, type_name: str):
+        ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.session.run(f'screencap -p "{self.remote_log_dir}/screenshots/{type_name}_{ts}.png"')
+        self._log_raw(f"    [SNAPSHOT] {type_name}")
+
+    def check_network(self):
+        code, out = self.session.run(f"ping -c 1 -w 3 -W 2 {self.cfg.ping_target}", timeout=10)
+        m = re.search(r"time=([\d\.]+)", out)
+        if code == 0 and m:
+            self.log_info(f"[NETWORK] Ping:{m.group(1)}ms")
+        else:
+            self.log_info(f"[NETWORK] Ping:FAIL (Exit:{code})")
+
+    def check_fatal_logs(self):
+        _, out = self.session.run('logcat -d -t 5000 | grep -E "lowmemorykiller|FATAL EXCEPTION"')
+        lines = [l for l in out.splitlines() if l.strip() and "permissive=1" not in l]
+        if not lines or lines[-1] == self._last_fatal:
+            return
+
+        fatal_log = lines[-1]
+        self._last_fatal = fatal_log
+        err_type = "OOM"
+        self.log_info(f"[CRITICAL_{err_type}] 发现严重征兆")
+        self.log_info(fatal_log)
+
+        # 截图冷却 (1200 秒)
+        now = time.monotonic()
+        if now - self._last_shot.get(err_type, -1200) >= 1200:
+            self.take_snapshot(f"SYS_{err_type}")
+            self._last_shot[err_type] = now
+            self.log_info(f"[SNAPSHOT] 已截图 (类型: {err_type})")
+        else:
+            self.log_info(f"[COOLDOWN] {err_type} 正在冷却中，跳过截图")
+
+    def check_anr_state(self) -> bool:
+        """返回 True 表示应用正常 (没有发生 ANR 重启)"""
+        _, out = self.session.run("logcat -b events -d -t 100")
+        if not any("am_anr" in l and self.cfg.target_pkg in l for l in out.splitlines()):
+            return True
+
+        self.log_info("!!![ANR_DETECTED]!!!")
+        self.take_snapshot("ANR")
+        self.recover_app("ANR")
+        return False
+
+    def is_app_ready(self) -> bool:
+        code, out = self.session.run(f"pidof {self.cfg.target_pkg}")
+        if code != 0 or not out.strip():
+            return False
+        _, out = self.session.run("dumpsys window | grep -E 'mCurrentFocus|mFocusedApp'")
+        activity = self.cfg.start_activity.split("/")[-1]
+        return self.cfg.target_pkg in out or activity in out
+
+    def recover_app(self, kind: str, timeout: int = 30) -> bool:
+        t0 = time.monotonic()
+        self.session.run(f"am force-stop {self.cfg.target_pkg}")
+        try:
+            self.session.run(f"am start -W -n {self.cfg.start_activity}", timeout=timeout)
+        except RuntimeError:
+            # am start -W 卡住不要紧，下面的就绪轮询会兜底；会话断了才需要上抛
+            if not self.session.alive:
+                raise
+
+        ok = False
+        while time.monotonic() - t0 < timeout:
+            if self.is_app_ready():
+                ok = True
+                break
+            time.sleep(0.2)
+
+        cost = int((time.monotonic() - t0) * 1000)
+        self.log_info(f"[RECOVERY] {kind} | Latency:{cost}ms | Result:{'OK' if ok else 'TIMEOUT'}")
+        return ok
+
+    def monitor_performance(self):
+        pkg = self.cfg.target_pkg
+        code, pid = self.session.run(f"pidof {pkg}")
+        if code != 0 or not pid.strip():
+            return
+
+        # 1. 内存 (PSS, MB)
+        _, out = self.session.run(f"dumpsys meminfo {pkg}")
+        m = re.search(r"TOTAL PSS:\s*(\d+)", out)
+        if m:
+            mem = int(m.group(1)) // 1024
+        else:
+            _, out = self.session.run(f"grep VmRSS /proc/{pid.split()[0]}/status")
+            m = re.search(r"(\d+)", out)
+            mem = int(m.group(1)) // 1024 if m else 0
+
+        # 2. CPU (按核数归一化)
+        cpu_val = 0.0
+        _, out = self.session.run("top -n 1 -b")
+        for line in out.splitlines():
+            if pkg in line.split():
+                m = re.search(r"([\d\.]+)%", line)
+                fields = line.split()
+                try:
+                    raw = float(m.group(1)) if m else float(fields[8])
+                    cpu_val = raw / self._cpu_cores
+                except (ValueError, IndexError):
+                    pass
+                break
+
+        # 3. 温度
+        temp_val = 0
+        _, out = self.session.run(
+            'for z in /sys/class/thermal/thermal_zone*; do echo "$(cat $z/type 2>/dev/null) $(cat $z/temp 2>/dev/null)"; done')
+        for line in out.splitlines():
+            parts = line.split()
+            if len(parts) == 2 and re.search(r"cpu|battery|tsens_tz_sensor|soc-thermal|gpu-thermal", parts[0]):
+                if parts[1].lstrip("-").isdigit():
+                    t = int(parts[1])
+                    temp_val = t // 1000 if t > 10000 else t
+                break
+
+        self.log_info(f"[STATUS] Mem:{mem}MB | CPU:{cpu_val:.1f}% | Temp:{temp_val}C")
@@ -0,0 +1,207 @@
+import os
+import json
+import base64
+import datetime
+from html import escape
+
+import numpy as np
+
+from src.downsample import DEFAULT_POINT_BUDGET
+
+_ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+_STYLE = """
+body { font-family: 'Segoe UI', sans-serif; background: #f4f6f9; margin: 0; padding: 20px; }
+.container { max-width: 1200px; margin: 0 auto; background: #fff; padding: 30px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.05); }
+h1 { color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 15px; }
+h3 { color: #34495e; margin-top: 30px; border-left: 4px solid #3498db; padding-left: 10px; }
+.card-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin-bottom: 30px; }
+.card { background: #f8f9fa; padding: 20px; border-radius: 8px; text-align: center; border: 1px solid #e9ecef; }
+.card h4 { margin: 0; color: #7f8c8d; font-size: 14px; text-transform: uppercase; }
+.card p { margin: 10px 0 0; font-size: 28px; font-weight: bold; color: #2c3e50; }
+.chart-box { height: 400px; width: 100%; margin-bottom: 20px; }
+.danger { color: #e74c3c !important; }
+table { border-collapse: collapse; width: 100%; }
+th, td { border: 1px solid #e9ecef; padding: 8px; text-align: center; }
+.mc-tip { display: none; position: absolute; pointer-events: none; background: rgba(44,62,80,0.9); color: #fff; font-size: 12px; padding: 6px 10px; border-radius: 4px; white-space: nowrap; }
+.err-row { display: flex; align-items: center; margin: 6px 0; }
+.err-name { width: 220px; text-align: right; padding-right: 10px; color: #34495e; }
+.err-bar { height: 18px; background: #e74c3c; border-radius: 3px; margin-right: 8px; }
+"""
+
+
+class HtmlReportWriter:
+    """
+    离线 HTML 报告: 不依赖 CDN，单个文件拷到内网 / 没网的机器上也能打开。
+
+    - 图表运行时 (src/assets/minichart.js) 去掉注释和缩进后只内联一次
+    - 曲线数据按二进制打包: 首个 epoch + 相邻点的秒级差值 (int32) + 原始数值类型，
+      各自 base64 后交给浏览器用 TypedArray 解码，比 "[毫秒, 值]" 文本数组小得多
+    - 边生成边写文件，全分辨率导出大日志时也不会在内存里拼出一个巨大的字符串
+    """
+
+    # numpy dtype -> 浏览器端 TypedArray 的代号 (见 minichart.js 的 TYPES)
+    VALUE_TYPES = {"float32": "f4", "int16": "i2", "int32": "i4"}
+    # base64 按 3 字节对齐分块编码，拼起来和整体编码结果一致
+    B64_CHUNK = 3 * 64 * 1024
+
+    _runtime = None
+
+    def __init__(self, analyzer, max_points=DEFAULT_POINT_BUDGET):
+        self.analyzer = analyzer
+        self.max_points = max_points
+
+    @classmethod
+    def runtime(cls):
+        """压缩后的图表运行时 (去掉整行注释、缩进和空行)"""
+        if cls._runtime is None:
+            with open(os.path.join(_ASSET_DIR, "minichart.js"), encoding="utf-8") as f:
+                lines = (line.strip() for line in f)
+                cls._runtime = "\n".join(line for line in lines if line and not line.startswith("//"))
+        return cls._runtime
+
+    # ==========================================
+    # 数据打包
+    # ==========================================
+    @classmethod
+    def pack_arrays(cls, epochs, values):
+        """
+        (epochs, values) -> 打包描述 + 两段原始字节:
+        ({"n", "t0", "vt"}, epoch 差值的 int32 小端字节, 数值的小端字节)
+        """
+        vt = cls.VALUE_TYPES.get(values.dtype.name)
+        if vt is None:
+            values, vt = values.astype(np.float32), "f4"
+        head = {"n": len(epochs), "t0": int(epochs[0]) if len(epochs) else 0, "vt": vt}
+        deltas = np.diff(epochs).astype("<i4")
+        return head, deltas, values.astype(values.dtype.newbyteorder("<"), copy=False)
+
+    def _write_b64(self, f, arr):
+        raw = memoryview(np.ascontiguousarray(arr)).cast("B")
+        for pos in range(0, len(raw), self.B64_CHUNK):
+            f.write(base64.b64encode(raw[pos:pos + self.B64_CHUNK]).decode("ascii"))
+
+    def _write_pack(self, f, epochs, values, width=0, lo=None, hi=None):
+        """写一个 MiniChart.decode({...}) 表达式；预聚合的层带桶宽和桶内最小 / 最大值"""
+        head, deltas, values = self.pack_arrays(epochs, values)
+        if width:
+            head["w"] = width
+        f.write("MiniChart.decode({")
+        f.write(json.dumps(head)[1:-1])
+        f.write(',"dt":"')
+        self._write_b64(f, deltas)
+        for key, arr in (("v", values), ("lo", lo), ("hi", hi)):
+            if arr is not None:
+                f.write(f'","{key}":"')
+                self._write_b64(f, arr.astype(values.dtype))
+        f.write('"})')
+
+    def _write_series(self, f, name, series):
+        """降采样后的整条曲线 (概览)，返回写入的点数"""
+        t, v = series.downsample(self.max_points)
+        f.write(f"<script>D.{name}=")
+        self._write_pack(f, t, v)
+        f.write(";</script>\n")
+        return len(t)
+
+    def _write_levels(self, f, name, metric, counts=False):
+        """
+        多粒度索引的每一层 (每分钟 / 10 分钟 / 1 小时) 挂到 D.{name}.levels，
+        浏览器里框选放大时按可见范围挑粒度，不用把原始点全部塞进报告。
+        counts=True 时画的是每个桶的点数 (错误数)，否则是均值 + 最小 / 最大值
+        """
+        index = self.analyzer.range_index
+        f.write(f"<script>D.{name}.levels=[")
+        for i, width in enumerate(index.levels):
+            b = index.level(metric, width)
+            if i:
+                f.write(",")
+            if counts:
+                self._write_pack(f, b.starts, b.count.astype(np.int32), width)
+            else:
+                self._write_pack(f, b.starts, b.mean.astype(np.float32), width, b.min, b.max)
+        f.write("];</script>\n")
+
+    # ==========================================
+    # 页面
+    # ==========================================
+    def write(self, output_file):
+        d = self.analyzer.data
+        total_errors = sum(d['errors'].values())
+        max_mem = d['mem_records'].values.max() if len(d['mem_records']) else 0
+
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write('<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n')
+            f.write('<title>Dognoise Stress Report</title>\n<style>')
+            f.write(_STYLE)
+            f.write('</style>\n</head>\n<body>\n<div class="container">\n')
+            f.write('<h1>🐕 Dognoise 压测报告</h1>\n')
+            f.write(f"<p>Target: <strong>{escape(str(d['target_pkg']))}</strong> | "
+                    f"Generated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}</p>\n")
+
+            f.write('<div class="card-grid">\n')
+            for title, value, danger in (
+                    ("执行动作 (Steps)", d['total_actions'], False),
+                    ("内存峰值 (MB)", max_mem, False),
+                    ("网络超时 (次)", d['net_failures'], d['net_failures'] > 0),
+                    ("严重错误 (个)", total_errors, total_errors > 0)):
+                cls = ' class="danger"' if danger else ""
+                f.write(f'<div class="card"><h4>{title}</h4><p{cls}>{value}</p></div>\n')
+            f.write('</div>\n')
+
+            f.write('<h3>📈 全能监控趋势 (CPU / Temp / Mem)</h3>\n<div id="comboChart" class="chart-box"></div>\n')
+            f.write('<h3>📡 网络延迟 (Ping)</h3>\n<div id="netChart" class="chart-box"></div>\n')
+            f.write('<h3>⏱️ ANR 自救耗时 (Recovery)</h3>\n<div id="recChart" class="chart-box"></div>\n')
+            f.write('<h3>🐢 步骤耗时 (Step)</h3>\n<div id="stepChart" class="chart-box"></div>\n')
+
+            f.write('<h3>⏲️ 节奏控制 (APM)</h3>\n<table>\n')
+            f.write('<tr><th>Sheet</th><th>目标 APM</th><th>实际 APM</th><th>步数</th></tr>\n')
+            pace_summary = self.analyzer.get_pace_summary()
+            for sheet, p in pace_summary.items():
+                f.write(f"<tr><td>{escape(sheet)}</td><td>{p['target']:.1f}</td>"
+                        f"<td>{p['actual']:.1f}</td><td>{p['steps']}</td></tr>\n")
+            if not pace_summary:
+                f.write("<tr><td colspan='4'>未开启节奏控制</td></tr>\n")
+            f.write('</table>\n')
+
+            f.write('<h3>🚫 异常统计</h3>\n<div id="errChart" class="chart-box"></div>\n')
+            top = max(d['errors'].values(), default=0)
+            for err, count in sorted(d['errors'].items(), key=lambda kv: -kv[1]):
+                f.write(f'<div class="err-row"><span class="err-name">{escape(err)}</span>'
+                        f'<span class="err-bar" style="width:{count * 60 / top:.1f}%"></span>{count}</div>\n')
+            if not top:
+                f.write('<p>🎉 日志中未发现严重错误。</p>\n')
+            f.write('</div>\n')
+
+            f.write('<script>\n')
+            f.write(self.runtime())
+            f.write('\n</script>\n<script>var D={};</script>\n')
+            # 数据可能在解析之后被改过 (或根本没解析)，写之前让索引跟上
+            index = self.analyzer.update_range_index()
+            for key in self.analyzer.CURVE_KEYS:
+                name = key.replace("_records", "")
+                # 概览本身就是全部原始点时 (点数少 / 全分辨率)，放大也不会更细，不用附加预聚合层
+                if self._write_series(f, name, d[key]) < len(d[key]):
+                    self._write_levels(f, name, name)
+            # 错误按时间分桶计数: 概览取放得下点数预算的那一层
+            errors = index.query(index.ERRORS, max_points=self.max_points)
+            f.write("<script>D.errors=")
+            self._write_pack(f, errors.epochs, errors.count.astype(np.int32), errors.level)
+            f.write(";</script>\n")
+            self._write_levels(f, "errors", index.ERRORS, counts=True)
+
+            f.write("""<script>
+MiniChart.line('comboChart', {series: [
+    {name: 'Memory (MB)', data: D.mem, color: '#5470C6', axis: 0},
+    {name: 'CPU (%)', data: D.cpu, color: '#91CC75', axis: 1},
+    {name: 'Temp (°C)', data: D.temp, color: '#EE6666', axis: 2}]});
+MiniChart.line('netChart', {series: [{name: 'Ping (ms)', data: D.net, color: '#2ecc71'}],
+    markY: 1000, markLabel: 'Timeout'});
+MiniChart.bar('recChart', {series: [{name: 'Recovery (ms)', data: D.recovery, color: '#F39C12'}]});
+MiniChart.line('stepChart', {series: [{name: 'Step (ms)', data: D.step, color: '#9B59B6'}]});
+MiniChart.bar('errChart', {series: [{name: 'Errors', data: D.errors, color: '#e74c3c'}]});
+</script>
+</body>
+</html>
+""")
+        return output_file
@@ -16,19 +16,22 @@ class LauncherGenerator:
             raise ValueError("本地生成模式必须提供 dist_dir！")
 
             # 1. 调用上面的方法拿内容
-        start_content , stop_content= self.generate_all_content(sh_filename, remote_log_dir)
+        start_content , stop_content, resume_content = self.generate_all_content(sh_filename, remote_log_dir)
 
         # 2. 写入硬盘
         self._write_file(os.path.join(self.dist_dir, "1_一键启动.bat"), start_content)
         print(f"✅ 启动脚本已生成: {os.path.basename(self.dist_dir)}")
         self._write_file(os.path.join(self.dist_dir, "2_停止.bat"), stop_content)
         print(f"✅ 结束脚本已生成: {os.path.basename(self.dist_dir)}")
+        self._write_file(os.path.join(self.dist_dir, "3_断点续跑.bat"), resume_content)
+        print(f"✅ 续跑脚本已生成: {os.path.basename(self.dist_dir)}")
 
     def generate_all_content(self, sh_filename: str, remote_log_dir: str = "/sdcard/dognoise_stress"):
         start_content = self._create_start_bat(sh_filename)
         stop_content = self._create_stop_pull_bat(sh_filename, remote_log_dir)
+        resume_content = self._create_resume_bat(sh_filename, remote_log_dir)
 
-        return start_content, stop_content
+        return start_content, stop_content, resume_content
 
     def _create_start_bat(self, sh_filename: str):
         """生成 [一键启动.bat]"""
@@ -45,21 +48,46 @@ adb remount
 
 echo.
 echo [1/3] 清理旧的进程...
-adb shell "pkill -f stress_core.sh"
+adb shell "pkill -f {sh_filename}"
 adb shell "rm -f /data/local/tmp/dognoise.lock"
-adb logcat -c
-adb shell "rm -rf /sdcard/dognoise_stress/*"
 
 echo.
-echo [2/3] 推送脚本到设备...
-adb push stress_core.sh /data/local/tmp/stress_core.sh
-adb shell chmod 777 /data/local/tmp/stress_core.sh
+echo 旧日志处理: [K] 保留  [A] 归档 (改名保存)  [D] 删除
+choice /C KAD /N /T 10 /D A /M "请选择 (10 秒后默认归档): "
+if errorlevel 3 (
+    adb shell "rm -rf /sdcard/dognoise_stress/*"
+    adb logcat -c
+    echo 旧日志已删除
+) else if errorlevel 2 (
+    adb shell "[ -d /sdcard/dognoise_stress ] && mv /sdcard/dognoise_stress /sdcard/dognoise_stress_$(date +%%Y%%m%%d_%%H%%M%%S)"
+    adb logcat -c
+    echo 旧日志已归档
+) else (
+    echo 保留旧日志
+)
 
+echo.
+echo [2/3] 检查脚本是否需要推送...
+rem 本地脚本的 sha256 和手机上记录的一致就跳过推送
+set "LOCAL_HASH="
+for /f "delims=" %%h in ('certutil -hashfile {sh_filename} SHA256 ^| findstr /v ":"') do if not defined LOCAL_HASH set "LOCAL_HASH=%%h"
+if defined LOCAL_HASH set "LOCAL_HASH=%LOCAL_HASH: =%"
+set "REMOTE_HASH="
+for /f "delims=" %%h in ('adb exec-out "[ -f /data/local/tmp/{sh_filename} ] && cat /data/local/tmp/{sh_filename}.sha256 2>/dev/null"') do set "REMOTE_HASH=%%h"
+if defined LOCAL_HASH if /i "%LOCAL_HASH%"=="%REMOTE_HASH%" (
+    echo 脚本未变化，跳过推送
+    goto :start_test
+)
+adb push {sh_filename} /data/local/tmp/{sh_filename}
+adb shell chmod 777 /data/local/tmp/{sh_filename}
+if defined LOCAL_HASH adb shell "echo %LOCAL_HASH% > /data/local/tmp/{sh_filename}.sha256"
+
+:start_test
 echo.
 echo [3/3] 开始压测...
 echo Log Path: /sdcard/dognoise_stress/event.log
 echo ------------------------------------------
-adb shell "nohup sh /data/local/tmp/stress_core.sh > /dev/null 2>&1 &"
+adb shell "nohup sh /data/local/tmp/{sh_filename} > /dev/null 2>&1 &"
 
 echo.
 echo 开始成功，可以关闭该窗口.
@@ -70,6 +98,37 @@ pause
 
 
 
+    def _create_resume_bat(self, sh_filename: str, remote_log_dir: str):
+        """生成 [断点续跑.bat]"""
+        # 和一键启动的区别：
+        # 1. 不清空日志目录 (断点文件 checkpoint.state 就在里面)
+        # 2. 不重新推送脚本，保证续跑的还是同一份计划
+        # 3. 以 resume 模式启动
+
+        content = f"""@echo off
+chcp 65001
+title Dognoise Stress Resume
+echo.
+echo [Dognoise] 断点续跑...
+adb wait-for-device
+
+echo.
+echo [1/2] 清理残留进程...
+adb shell "pkill -f {sh_filename}"
+adb shell "rm -f /data/local/tmp/dognoise.lock"
+
+echo.
+echo [2/2] 从断点继续压测...
+echo Checkpoint: {remote_log_dir}/checkpoint.state
+echo ------------------------------------------
+adb shell "nohup sh /data/local/tmp/{sh_filename} resume > /dev/null 2>&1 &"
+
+echo.
+echo 续跑已启动，可以关闭该窗口.
+pause
+"""
+        return content
+
     def _create_stop_pull_bat(self, sh_filename: str, remote_log_dir: str):
         """生成 [停止并导出日志.bat]"""
         # file_path = os.path.join(self.dist_dir, "2_停止并导出日志.bat")
@@ -77,7 +136,9 @@ pause
         # 这里的逻辑是：
         # 1. 杀掉脚本进程 (pkill)
         # 2. 删掉锁文件 (双重保险)
-        # 3. adb pull 把手机里的日志拉到电脑当前目录
+        # 3. 手机端打包成一个压缩包经 exec-out 传回 (失败时 adb pull)，放到当前目录下带时间戳的新文件夹
+        #    每次都是新文件夹、整目录导出，没有 LogExporter 那种按大小 / md5 清单跳过已有文件的增量导出；
+        #    需要增量时用 python host_main.py export
 
         content = f"""@echo off
 chcp 65001
@@ -107,7 +168,17 @@ set "CURRENT_DATE=%CURRENT_DATE: =0%"
 set "EXPORT_DIR=logs_%CURRENT_DATE%"
 
 mkdir "%EXPORT_DIR%"
-adb pull {remote_log_dir}/. "%EXPORT_DIR%/"
+
+REM 优先: 手机端打成一个压缩包，通过一条 exec-out 流传回 (比逐个文件 pull 快得多)
+REM 每次导出到新文件夹，整个目录都会传; 只想传新增/变化的文件请用 python host_main.py export
+adb exec-out "cd {remote_log_dir} && tar -czf - ." > "%EXPORT_DIR%.tar.gz"
+tar -xzf "%EXPORT_DIR%.tar.gz" -C "%EXPORT_DIR%"
+if errorlevel 1 (
+    echo 归档导出失败，改用逐个文件拉取...
+    adb pull {remote_log_dir}/. "%EXPORT_DIR%/"
+) else (
+    del "%EXPORT_DIR%.tar.gz"
+)
 
 echo.
 echo 操作完成！
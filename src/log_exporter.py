@@ -0,0 +1,236 @@
+import os
+import json
+import hashlib
+import tarfile
+import datetime
+import subprocess
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+class LogExporter:
+    """
+    把手机上的日志目录打成一个压缩包，通过一条 exec-out 流传回电脑，
+    代替 adb pull 一个个文件地拉 (几百张截图 + 20 个轮转 logcat 在 USB2 Hub 上要好几分钟)。
+
+    本地已经有、且大小和 md5 都一致的文件会被跳过，只打包需要的文件。
+
+    每条 adb 命令 (包括归档流) 最多跑 timeout 秒，超时就杀掉；
+    放在线程里跑时可以从外面调 cancel()，正在跑的 adb 子进程会被立刻杀掉，后面的命令不再启动。
+    """
+
+    REMOTE_LIST = "/data/local/tmp/dognoise_export.lst"
+    # keep_archive 时本地没有解开的文件，归档里每个文件的大小和 md5 记在这里，下次 plan 照样能跳过
+    MANIFEST = ".dognoise_manifest.json"
+
+    def __init__(self, adb: str = "adb", serial: Optional[str] = None,
+                 remote_log_dir: str = "/sdcard/dognoise_stress", timeout: float = 600):
+        self.adb = adb
+        self.serial = serial
+        self.remote_log_dir = remote_log_dir
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._proc: Optional[subprocess.Popen] = None
+        self._cancelled = False
+
+    def _cmd(self, *args: str) -> List[str]:
+        cmd = [self.adb]
+        if self.serial:
+            cmd += ["-s", self.serial]
+        return cmd + list(args)
+
+    def _spawn(self, *args: str, stderr=subprocess.PIPE) -> subprocess.Popen:
+        with self._lock:
+            if self._cancelled:
+                raise RuntimeError("导出已取消")
+            self._proc = subprocess.Popen(self._cmd(*args), stdout=subprocess.PIPE, stderr=stderr)
+            return self._proc
+
+    def cancel(self):
+        """杀掉正在跑的 adb 子进程 (可以从别的线程调用)"""
+        with self._lock:
+            self._cancelled = True
+            if self._proc is not None and self._proc.poll() is None:
+                self._proc.kill()
+
+    def _adb(self, *args: str) -> str:
+        proc = self._spawn(*args)
+        try:
+            out, err = proc.communicate(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            raise
+        if proc.returncode != 0:
+            raise RuntimeError(err.decode("utf-8", errors="ignore").strip() or f"adb 返回 {proc.returncode}")
+        return out.decode("utf-8", errors="ignore")
+
+    # ==========================================
+    # 清单对比
+    # ==========================================
+    def remote_sizes(self) -> Dict[str, int]:
+        out = self._adb("shell", f"cd {self.remote_log_dir} && find . -type f -exec stat -c '%s %n' {{}} +")
+        sizes = {}
+        for line in out.splitlines():
+            size, _, name = line.strip().partition(" ")
+            if size.isdigit() and name:
+                sizes[os.path.normpath(name)] = int(size)
+        return sizes
+
+    def remote_md5(self, names: List[str]) -> Dict[str, str]:
+        """只对本地同名同大小的文件算 md5，避免在手机上把几百张截图都哈希一遍"""
+        if not names:
+            return {}
+        self._push_list(names)
+        out = self._adb("shell", f"cd {self.remote_log_dir} && xargs md5sum < {self.REMOTE_LIST}")
+        hashes = {}
+        for line in out.splitlines():
+            digest, _, name = line.strip().partition(" ")
+            if name:
+                hashes[os.path.normpath(name.strip().lstrip("*"))] = digest
+        return hashes
+
+    @staticmethod
+    def local_md5(path: str) -> str:
+        h = hashlib.md5()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(block)
+        return h.hexdigest()
+
+    def plan(self, dest_dir: str) -> Tuple[List[str], int]:
+        """返回 (需要传输的文件列表, 跳过的文件数)"""
+        sizes = self.remote_sizes()
+        manifest = self.load_manifest(dest_dir)
+        local = {}
+        for name, size in sizes.items():
+            local_path = os.path.join(dest_dir, name)
+            if os.path.isfile(local_path) and os.path.getsize(local_path) == size:
+                local[name] = None  # md5 用到时再算
+            elif name in manifest and manifest[name][0] == size:
+                local[name] = manifest[name][1]
+
+        remote_hashes = self.remote_md5(sorted(local))
+        same = {n for n, digest in local.items()
+                if remote_hashes.get(n) and remote_hashes[n] == (digest or self.local_md5(os.path.join(dest_dir, n)))}
+
+        needed = sorted(n for n in sizes if n not in same)
+        return needed, len(same)
+
+    def _push_list(self, names: List[str]):
+        with tempfile.NamedTemporaryFile("w", suffix=".lst", delete=False, encoding="utf-8", newline="\n") as f:
+            f.write("\n".join(f"./{n}" for n in names) + "\n")
+            list_path = f.name
+        try:
+            self._adb("push", list_path, self.REMOTE_LIST)
+        finally:
+            os.unlink(list_path)
+
+    # ==========================================
+    # 导出
+    # ==========================================
+    def export(self, dest_dir: str, keep_archive: bool = False) -> Dict:
+        """
+        :param keep_archive: True 时只保存 .tar.gz 不解包 (归档内容记进 MANIFEST，下次导出照样跳过)
+        :return: 统计信息 {files, skipped, bytes, archive}
+        """
+        os.makedirs(dest_dir, exist_ok=True)
+        needed, skipped = self.plan(dest_dir)
+        summary = {"files": len(needed), "skipped": skipped, "bytes": 0, "archive": None}
+        if not needed:
+            print(f"✅ 本地日志已是最新 (跳过 {skipped} 个文件)")
+            return summary
+
+        self._push_list(needed)
+        proc = self._spawn("exec-out", f"cd {self.remote_log_dir} && tar -czf - -T {self.REMOTE_LIST}",
+                           stderr=subprocess.DEVNULL)
+        # 流式读取没有 communicate 的超时，到点直接杀进程，读端随即拿到 EOF
+        watchdog = threading.Timer(self.timeout, proc.kill)
+        watchdog.start()
+        try:
+            if keep_archive:
+                ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+                archive = os.path.join(dest_dir, f"logs_{ts}.tar.gz")
+                # 同一秒里导出两次不能覆盖前一个归档 (清单还指着它里面的文件)
+                n = 1
+                while os.path.exists(archive):
+                    archive = os.path.join(dest_dir, f"logs_{ts}_{n}.tar.gz")
+                    n += 1
+                with open(archive, "wb") as f:
+                    for block in iter(lambda: proc.stdout.read(1024 * 1024), b""):
+                        f.write(block)
+                        summary["bytes"] += len(block)
+                summary["archive"] = archive
+                self._update_manifest(dest_dir, archive)
+            else:
+                summary["bytes"] = self._extract_stream(proc.stdout, dest_dir)
+        except tarfile.TarError as e:
+            raise RuntimeError(f"归档流解包失败: {e}")
+        finally:
+            watchdog.cancel()
+            proc.stdout.close()
+            proc.wait()
+
+        if self._cancelled:
+            raise RuntimeError("导出已取消")
+        if proc.returncode != 0:
+            raise RuntimeError(f"手机端打包失败 (exit {proc.returncode})")
+
+        print(f"✅ 导出 {len(needed)} 个文件 ({summary['bytes'] / 1024:.0f} KB)，跳过 {skipped} 个已存在文件")
+        return summary
+
+    @classmethod
+    def load_manifest(cls, dest_dir: str) -> Dict[str, Tuple[int, str]]:
+        """{文件名: (大小, md5)}，没有或损坏时为空"""
+        try:
+            with open(os.path.join(dest_dir, cls.MANIFEST), encoding="utf-8") as f:
+                return {name: tuple(entry) for name, entry in json.load(f).items()}
+        except (OSError, ValueError):
+            return {}
+
+    def _update_manifest(self, dest_dir: str, archive: str):
+        """把刚保存的归档里的文件并进清单 (新的覆盖旧的)"""
+        manifest = self.load_manifest(dest_dir)
+        with tarfile.open(archive, "r:gz") as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                h = hashlib.md5()
+                f = tar.extractfile(member)
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    h.update(block)
+                manifest[os.path.normpath(member.name)] = (member.size, h.hexdigest())
+        path = os.path.join(dest_dir, self.MANIFEST)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def _extract_stream(stream, dest_dir: str) -> int:
+        """边收边解 (r|gz 流模式)，不在本地落地整个压缩包"""
+        total = 0
+        dest_root = os.path.realpath(dest_dir)
+        # filter 参数要 3.12 或带安全补丁的 3.8 ~ 3.11；没有时靠下面的路径检查兜底
+        extract_kwargs = {"filter": "data"} if hasattr(tarfile, "data_filter") else {}
+        with tarfile.open(fileobj=stream, mode="r|gz") as tar:
+            for member in tar:
+                target = os.path.realpath(os.path.join(dest_root, member.name))
+                # 防御: 不允许解压到目标目录之外
+                if not target.startswith(dest_root + os.sep) or not (member.isfile() or member.isdir()):
+                    continue
+                tar.extract(member, dest_root, **extract_kwargs)
+                total += member.size
+        return total
+
+    def export_or_pull(self, dest_dir: str, keep_archive: bool = False) -> Dict:
+        """归档导出失败 (比如手机 tar 不支持 -z) 时回退到 adb pull"""
+        try:
+            return self.export(dest_dir, keep_archive)
+        except (RuntimeError, subprocess.TimeoutExpired) as e:
+            if self._cancelled:
+                raise
+            print(f"⚠️ 归档导出失败，改用 adb pull: {e}")
+            os.makedirs(dest_dir, exist_ok=True)
+            self._adb("pull", f"{self.remote_log_dir}/.", dest_dir)
+            return {"files": None, "skipped": 0, "bytes": None, "archive": None}
@@ -0,0 +1,157 @@
+import os
+import json
+import subprocess
+import time
+from typing import Callable, Dict, Optional
+
+
+class LogFollower:
+    """
+    压测进行中，增量拉取手机上的日志 (只拉新追加的字节)。
+
+    - 每个文件在本地记录已拉取的偏移量和 inode，保存在 .follow_state.json，工具重启后可以接着拉
+    - 文件被轮转 (inode 变了或者变短了) 时，先把旧文件 (.1) 剩下的尾巴补齐，再从新文件 0 偏移开始
+    - 新数据追加到本地同名文件，并回调 on_data(文件名, bytes)，可以直接喂给增量分析器
+    """
+
+    FILES = ("event.log", "crash_stack.log", "anr_history.log")
+    STATE_FILE = ".follow_state.json"
+
+    def __init__(self, local_dir: str, adb: str = "adb", serial: Optional[str] = None,
+                 remote_log_dir: str = "/sdcard/dognoise_stress",
+                 on_data: Optional[Callable[[str, bytes], None]] = None):
+        self.local_dir = local_dir
+        self.adb = adb
+        self.serial = serial
+        self.remote_log_dir = remote_log_dir
+        self.on_data = on_data
+
+        os.makedirs(local_dir, exist_ok=True)
+        self.state_path = os.path.join(local_dir, self.STATE_FILE)
+        self.state: Dict[str, Dict] = self._load_state()
+
+    # ==========================================
+    # 状态持久化
+    # ==========================================
+    def _load_state(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            print(f"⚠️ 跟踪状态文件损坏，重新从头拉取: {self.state_path}")
+            return {}
+
+    def _save_state(self):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    # ==========================================
+    # adb
+    # ==========================================
+    def _adb(self, *args: str) -> bytes:
+        cmd = [self.adb]
+        if self.serial:
+            cmd += ["-s", self.serial]
+        cmd += list(args)
+        res = subprocess.run(cmd, capture_output=True, timeout=300)
+        if res.returncode != 0:
+            raise RuntimeError(res.stderr.decode("utf-8", errors="ignore").strip() or f"adb 返回 {res.returncode}")
+        return res.stdout
+
+    def _remote_stat(self) -> Dict[str, Dict]:
+        """一次 adb 调用拿到所有文件 (含 .1 轮转文件) 的大小和 inode"""
+        names = []
+        for name in self.FILES:
+            names += [name, f"{name}.1"]
+        script = (f"cd {self.remote_log_dir} 2>/dev/null && "
+                  f"for f in {' '.join(names)}; do [ -f $f ] && stat -c '%n %s %i' $f; done; true")
+        out = self._adb("shell", script).decode("utf-8", errors="ignore")
+
+        stats = {}
+        for line in out.splitlines():
+            parts = line.split()
+            if len(parts) == 3 and parts[1].isdigit():
+                stats[parts[0]] = {"size": int(parts[1]), "inode": parts[2]}
+        return stats
+
+    def _read_range(self, name: str, offset: int, length: int) -> bytes:
+        # exec-out 是二进制安全的；tail -c +N 从第 N 个字节 (1 开始) 读
+        path = f"{self.remote_log_dir}/{name}"
+        return self._adb("exec-out", f"tail -c +{offset + 1} {path} | head -c {length}")
+
+    # ==========================================
+    # 增量拉取
+    # ==========================================
+    def _emit(self, name: str, chunk: bytes, st: Dict):
+        """
+        追加到本地文件 -> 落盘新的偏移量 st -> 回调 on_data。
+        每段都先存偏移量再回调: 拉取或分析中途 Ctrl+C，已经追加到本地的字节下次不会再追加、再喂一遍。
+        """
+        if chunk:
+            with open(os.path.join(self.local_dir, name), "ab") as f:
+                f.write(chunk)
+        self.state[name] = st
+        self._save_state()
+        if chunk and self.on_data:
+            self.on_data(name, chunk)
+
+    def poll_once(self) -> Dict[str, int]:
+        """拉一次，返回每个文件本次新增的字节数"""
+        stats = self._remote_stat()
+        appended = {}
+
+        for name in self.FILES:
+            cur = stats.get(name)
+            if not cur:
+                continue
+            st = dict(self.state.get(name, {"offset": 0, "inode": cur["inode"]}))
+            got = 0
+
+            rotated = st["inode"] != cur["inode"] or cur["size"] < st["offset"]
+            if rotated:
+                # 旧文件被改名成 .1 了，先把上次没拉完的尾巴补上
+                old = stats.get(f"{name}.1")
+                chunk = b""
+                if old and old["inode"] == st["inode"] and old["size"] > st["offset"]:
+                    chunk = self._read_range(f"{name}.1", st["offset"], old["size"] - st["offset"])
+                print(f"🔄 [{name}] 检测到日志轮转，从新文件开头继续")
+                st = {"offset": 0, "inode": cur["inode"]}
+                self._emit(name, chunk, st)
+                got += len(chunk)
+
+            if cur["size"] > st["offset"]:
+                chunk = self._read_range(name, st["offset"], cur["size"] - st["offset"])
+                st = {"offset": st["offset"] + len(chunk), "inode": cur["inode"]}
+                self._emit(name, chunk, st)
+                got += len(chunk)
+            else:
+                self.state[name] = st
+
+            appended[name] = got
+
+        self._save_state()
+        return appended
+
+    def follow(self, interval: float = 60, max_polls: Optional[int] = None,
+               on_poll: Optional[Callable[[Dict[str, int]], None]] = None):
+        """循环拉取，直到 Ctrl+C 或达到 max_polls 次"""
+        polls = 0
+        try:
+            while max_polls is None or polls < max_polls:
+                try:
+                    appended = self.poll_once()
+                    if on_poll:
+                        on_poll(appended)
+                except (RuntimeError, subprocess.TimeoutExpired) as e:
+                    # 设备临时掉线不退出，下一轮再试
+                    print(f"⚠️ 拉取失败，稍后重试: {e}")
+                polls += 1
+                if max_polls is None or polls < max_polls:
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            self._save_state()
+            print("\n已停止跟踪，偏移量已保存，下次会接着拉取。")
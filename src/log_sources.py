@@ -0,0 +1,106 @@
+import os
+import re
+from collections import Counter
+
+from src.series import parse_epoch
+
+
+def rotated_paths(log_dir, name):
+    """
+    logcat -f name -r -n 轮转出的一组文件，按时间从旧到新排列:
+    name.20 (最旧) ... name.1, name (正在写的)
+    """
+    re_rotated = re.compile(re.escape(name) + r"\.(\d+)$")
+    rotated = []
+    if os.path.isdir(log_dir):
+        for entry in os.listdir(log_dir):
+            m = re_rotated.match(entry)
+            if m:
+                rotated.append((int(m.group(1)), entry))
+    paths = [os.path.join(log_dir, entry) for _, entry in sorted(rotated, reverse=True)]
+    base = os.path.join(log_dir, name)
+    if os.path.exists(base):
+        paths.append(base)
+    return paths
+
+
+class LogcatSource:
+    """
+    logcat -v time 格式的日志流 ("MM-DD HH:MM:SS.mmm E/Tag( pid): msg")。
+
+    - 多个文件依次逐行读取 (轮转文件本身就是按时间接续的)，不整体载入内存
+    - 只有能归类的事件 (崩溃 / ANR / OOM) 产出到时间线，其余错误行只按 Tag 计数
+    - logcat 的时间不带年份: 从压测开始的年份算起，月份倒退 (12 月 -> 1 月) 时年份 +1
+    """
+
+    re_line = re.compile(r"^(\d{2})-(\d{2}) (\d{2}:\d{2}):(\d{2})\.\d+\s+[VDIWEFA]/(.+?)\(\s*(\d+)\):\s?(.*)$")
+
+    # (类型, 关键字)，按顺序匹配 Tag + 内容
+    KINDS = (
+        ("JAVA_CRASH", "FATAL EXCEPTION"),
+        ("NATIVE_CRASH", "Fatal signal"),
+        ("ANR", "am_anr"),
+        ("ANR", "ANR in"),
+        ("OOM", "OutOfMemoryError"),
+        ("LMK", "lowmemorykiller"),
+    )
+
+    def __init__(self, paths, source, year, crash_index=None):
+        self.paths = paths
+        self.source = source
+        self.year = year
+        # 可选的 CrashIndex: 崩溃相关 Tag 的每一行都喂给它，用来拼堆栈、归类签名
+        self.crash_index = crash_index
+        # 没归类的错误行，按 Tag 计数
+        self.tags = Counter()
+        self.lines = 0
+        self._month = None
+        self._minute_key = None
+        self._minute_epoch = 0
+
+    def _to_epoch(self, month, day, hm, sec):
+        key = (month, day, hm)
+        if key != self._minute_key:
+            if self._month is not None and int(month) < self._month:
+                self.year += 1
+            self._month = int(month)
+            self._minute_key = key
+            self._minute_epoch = parse_epoch(f"{self.year}-{month}-{day} {hm}:00")
+        return self._minute_epoch + int(sec)
+
+    def events(self):
+        """按时间顺序产出 {"time", "epoch", "source", "type", "msg"}"""
+        for path in self.paths:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    m = self.re_line.match(line)
+                    if not m:
+                        continue
+                    self.lines += 1
+                    month, day, hm, sec, tag, pid, msg = m.groups()
+                    tag = tag.strip()
+                    msg = msg.rstrip()
+                    text = f"{tag}: {msg}"
+                    for kind, keyword in self.KINDS:
+                        if keyword in text:
+                            break
+                    else:
+                        kind = None
+                        self.tags[tag] += 1
+
+                    event = None
+                    if kind:
+                        try:
+                            event = {
+                                "epoch": self._to_epoch(month, day, hm, sec),
+                                "time": f"{self.year}-{month}-{day} {hm}:{sec}",
+                                "source": self.source,
+                                "type": kind,
+                                "msg": text,
+                            }
+                        except ValueError:
+                            pass
+                    if self.crash_index is not None and tag in self.crash_index.TAGS:
+                        self.crash_index.feed(tag, pid, msg, event and event["time"], event and event["epoch"])
+                    if event:
+                        yield event
@@ -41,6 +41,8 @@ class TaskModel(BaseModel):
 class PlanModel(BaseModel):
     name: str
     loop_count: int = 1
+    # 节奏控制: 每分钟目标动作数 (APM)，为空表示不限速，按动作自身耗时执行
+    pace_apm: Optional[float] = None
     tasks: List[TaskModel] = []
 
 
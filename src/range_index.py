@@ -0,0 +1,175 @@
+import numpy as np
+
+from src.downsample import DEFAULT_POINT_BUDGET
+
+# 预聚合的时间粒度 (秒): 每分钟 / 每 10 分钟 / 每小时，从细到粗
+LEVELS = (60, 600, 3600)
+
+
+class Buckets:
+    """
+    一个指标在一个粒度上的时间桶，按列存储: 桶起点 epoch + 点数 / 总和 / 最小值 / 最大值。
+    同一个桶可以分几次并进来 (增量解析)，统计量都可以直接合并。
+    """
+
+    def __init__(self, width):
+        self.width = width
+        self.starts = np.zeros(0, dtype=np.int64)
+        self.count = np.zeros(0, dtype=np.int64)
+        self.total = np.zeros(0, dtype=np.float64)
+        self.min = np.zeros(0, dtype=np.float64)
+        self.max = np.zeros(0, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def mean(self):
+        return self.total / np.maximum(self.count, 1)
+
+    @staticmethod
+    def group(keys, count, total, lo, hi):
+        """按 keys 分组合并统计量，返回按 key 排序的 (keys, count, total, min, max)"""
+        uniq, inv = np.unique(keys, return_inverse=True)
+        if len(uniq) == len(keys):
+            order = np.argsort(keys, kind="stable")
+            return uniq, count[order], total[order], lo[order], hi[order]
+        out_lo = np.full(len(uniq), np.inf)
+        out_hi = np.full(len(uniq), -np.inf)
+        np.minimum.at(out_lo, inv, lo)
+        np.maximum.at(out_hi, inv, hi)
+        return (uniq, np.bincount(inv, weights=count, minlength=len(uniq)).astype(np.int64),
+                np.bincount(inv, weights=total, minlength=len(uniq)), out_lo, out_hi)
+
+    def add(self, starts, count, total, lo, hi):
+        """并入一批桶 (starts 已经按本粒度对齐，可以和已有的桶重叠)"""
+        if not len(starts):
+            return
+        columns = ("starts", "count", "total", "min", "max")
+        new = (starts, count, total, lo, hi)
+        if not len(self) or starts[0] > self.starts[-1]:
+            # 日志按时间写入，新的桶通常都在已有的之后，直接接在后面
+            merged = [np.concatenate([getattr(self, name), arr]) for name, arr in zip(columns, new)]
+        else:
+            # 和最后几个桶重叠 (同一分钟分两次解析) 或时间回退: 整体重新分组
+            merged = self.group(*(np.concatenate([getattr(self, name), arr]) for name, arr in zip(columns, new)))
+        for name, arr in zip(columns, merged):
+            setattr(self, name, arr)
+
+    def between(self, start=None, end=None):
+        """和 [start, end] 有交集的桶的下标范围 (lo, hi)"""
+        lo = 0 if start is None else int(np.searchsorted(self.starts, start - self.width, side="right"))
+        hi = len(self) if end is None else int(np.searchsorted(self.starts, end, side="right"))
+        return lo, hi
+
+
+class RangeView:
+    """
+    一次范围查询的结果: level 是桶宽 (秒)，0 表示原始点 (此时 min = max = mean，count 全为 1)。
+    """
+
+    def __init__(self, level, epochs, mean, lo, hi, count):
+        self.level = level
+        self.epochs = epochs
+        self.mean = mean
+        self.min = lo
+        self.max = hi
+        self.count = count
+
+    def __len__(self):
+        return len(self.epochs)
+
+    def __repr__(self):
+        return f"RangeView(level={self.level}, len={len(self)})"
+
+    def to_frame(self, name="value"):
+        """pandas DataFrame (时间索引)；预聚合的结果多两列 "最小" / "最大"，画图时能看出桶内的波动"""
+        import pandas as pd
+        columns = {name: self.mean}
+        if self.level:
+            columns[f"{name} 最小"] = self.min
+            columns[f"{name} 最大"] = self.max
+        return pd.DataFrame(columns, index=pd.Index(self.epochs.view("datetime64[s]"), name="Time"))
+
+
+class RangeIndex:
+    """
+    监控曲线的多粒度预聚合索引 (每分钟 / 10 分钟 / 1 小时的 min / max / mean / count，外加每个桶的错误数)。
+
+    - 解析过程中增量维护: 每次 update 只聚合上次之后新追加的点，先聚合到分钟，再由分钟桶合成更粗的粒度
+    - 范围查询 (网页缩放 / 报告下钻) 不扫原始数据: 原始点放得下预算就给原始点，否则从细到粗找第一个
+      桶数不超过预算的粒度，都放不下时用最粗的一层
+    """
+
+    ERRORS = "errors"
+
+    def __init__(self, levels=LEVELS):
+        self.levels = tuple(levels)
+        self.buckets = {}
+        # 每个指标已经聚合到第几个点
+        self._seen = {}
+        # 每个指标的源数据 (TimeSeries / 错误列表)，查询细粒度时直接在原始曲线上二分
+        self._sources = {}
+
+    def __contains__(self, metric):
+        return metric in self.buckets
+
+    def metrics(self):
+        return list(self.buckets)
+
+    def update(self, series, error_events=()):
+        """
+        :param series: {指标名: TimeSeries}，同一条曲线只会往后追加；换成另一条曲线 (重新解析) 时该指标从头重建
+        :param error_events: 错误列表 [{"epoch", ...}] (error_timeline，同样只追加)
+        """
+        for metric, ts in series.items():
+            seen = self._start(metric, ts, len(ts))
+            self._fold(metric, ts.epochs[seen:], ts.values[seen:])
+        seen = self._start(self.ERRORS, error_events, len(error_events))
+        epochs = np.array([e["epoch"] for e in error_events[seen:]], dtype=np.int64)
+        self._fold(self.ERRORS, epochs, np.ones(len(epochs)))
+
+    def _start(self, metric, source, size):
+        """这次从第几个点开始聚合 (源数据被换掉或变短时清空该指标，从 0 开始)"""
+        seen = self._seen.get(metric, 0)
+        if self._sources.get(metric) is not source or size < seen:
+            self.buckets[metric] = {width: Buckets(width) for width in self.levels}
+            self._sources[metric] = source
+            seen = 0
+        self._seen[metric] = size
+        return seen
+
+    def _fold(self, metric, t, v):
+        """新增的点先聚合到最细的一层，再由这一层的桶合成更粗的粒度"""
+        if not len(t):
+            return
+        v = np.asarray(v, dtype=np.float64)
+        parts = (t, np.ones(len(t), dtype=np.int64), v, v, v)
+        for width in self.levels:
+            parts = Buckets.group(parts[0] - parts[0] % width, *parts[1:])
+            self.buckets[metric][width].add(*parts)
+
+    def query(self, metric, start=None, end=None, max_points=DEFAULT_POINT_BUDGET):
+        """
+        [start, end] 范围内的曲线，点数不超过 max_points (None = 不限，直接给原始点)。
+        metric 为 RangeIndex.ERRORS 时给的是每个桶的错误数 (看 count)。
+        """
+        source = self._sources.get(metric)
+        if metric != self.ERRORS and source is not None:
+            t, v = source.between(start, end)
+            if max_points is None or len(t) <= max_points:
+                v = v.astype(np.float64)
+                return RangeView(0, t, v, v, v, np.ones(len(t), dtype=np.int64))
+
+        levels = self.buckets.get(metric)
+        if levels is None:
+            raise KeyError(f"没有建立索引的指标: {metric}")
+        for width in self.levels:
+            b = levels[width]
+            lo, hi = b.between(start, end)
+            if max_points is None or hi - lo <= max_points or width == self.levels[-1]:
+                return RangeView(width, b.starts[lo:hi], b.mean[lo:hi], b.min[lo:hi], b.max[lo:hi], b.count[lo:hi])
+
+    def level(self, metric, width):
+        """某个粒度的全部桶 (HTML 报告按粒度整层打包)"""
+        return self.buckets[metric][width]
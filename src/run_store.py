@@ -0,0 +1,279 @@
+import os
+import json
+import time
+import sqlite3
+
+import numpy as np
+
+from src.analysis_cache import AnalysisCache
+from src.series import TimeSeries, format_epoch
+from src.sketches import TDigest
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fingerprint TEXT NOT NULL UNIQUE,
+    package TEXT NOT NULL,
+    device TEXT NOT NULL DEFAULT '',
+    serial TEXT NOT NULL DEFAULT '',
+    build TEXT NOT NULL DEFAULT '',
+    started_at INTEGER,
+    ended_at INTEGER,
+    log_path TEXT,
+    analyzed_at INTEGER NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_package ON runs(package, started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_device ON runs(device, started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_build ON runs(package, build);
+CREATE INDEX IF NOT EXISTS idx_runs_started ON runs(started_at);
+
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    metric TEXT NOT NULL,
+    count INTEGER, mean REAL, min REAL, max REAL, p50 REAL, p95 REAL, p99 REAL,
+    sketch TEXT,
+    PRIMARY KEY (run_id, metric)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS series (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    metric TEXT NOT NULL,
+    dtype TEXT NOT NULL,
+    epochs BLOB NOT NULL,
+    vals BLOB NOT NULL,
+    PRIMARY KEY (run_id, metric)
+) WITHOUT ROWID;
+"""
+
+STATS = ("count", "mean", "min", "max", "p50", "p95", "p99")
+
+# 对比时每个指标的回归判定: (统计量, 相对阈值, 绝对阈值)，数值越大越差
+REGRESSION_RULES = {
+    "mem": (("p50", 0.10, 20), ("p95", 0.10, 20), ("max", 0.15, 50)),
+    "cpu": (("p50", 0.15, 5), ("p95", 0.15, 5)),
+    "ping": (("p50", 0.20, 10), ("p95", 0.20, 20), ("p99", 0.25, 30)),
+}
+# 计数类指标 (summary 里)，变多就算回归
+COUNTERS = ("errors", "net_failures", "recovery_failures", "crashes")
+
+
+class RunStore:
+    """
+    本地历史库 (SQLite): 每次分析完把这一场的概要、分位数草图和降采样曲线存进去，
+    之后可以按包名 / 设备 / 版本 / 时间查询，或者对比两场的指标回归。
+
+    - runs 表按 (package, started_at)、(device, started_at)、(package, build) 建索引，
+      "某个包最近 10 场的内存 p95" 这类查询只走索引 + 主键
+    - 同一份日志 (第一行哈希相同) 重复分析时覆盖原记录
+    """
+
+    SERIES_POINTS = 500
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(os.path.expanduser("~"), ".dognoise", "runs.db")
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ==========================================
+    # 写入
+    # ==========================================
+    def save_run(self, analyzer, sketches=None, crashes=0):
+        """
+        保存一场分析结果，返回 run id。
+        :param sketches: analyzer.build_sketches() 的结果，不传则现算
+        :param crashes: 崩溃次数 (目录分析时由 LogDirectoryAnalyzer 提供)
+        """
+        d = analyzer.data
+        info = d.get("run_info", {})
+        sketches = sketches if sketches is not None else analyzer.build_sketches()
+        mem_trend = analyzer.analyze_trends()["mem"]
+        summary = {
+            "duration": d["duration"],
+            "total_actions": d["total_actions"],
+            "errors": sum(d["errors"].values()),
+            "error_types": dict(d["errors"]),
+            "net_failures": d["net_failures"],
+            "recovery_failures": d["recovery_failures"],
+            "warnings": d["warnings"],
+            "crashes": crashes,
+            "mem_slope_per_hour": mem_trend.slope_per_hour,
+            "mem_verdict": mem_trend.verdict,
+            "run_info": info,
+        }
+
+        with self.conn:
+            # 指纹里已经有 [DEVICE] 行 (同时启动的多台设备靠序列号区分)；不拼路径:
+            # 同一份日志换个位置 (网页上传的临时文件) 再分析还是同一场
+            fingerprint = AnalysisCache.fingerprint(analyzer.log_path, path_fallback=False)
+            self.conn.execute("DELETE FROM runs WHERE fingerprint = ?", (fingerprint,))
+            cur = self.conn.execute(
+                "INSERT INTO runs (fingerprint, package, device, serial, build, started_at, ended_at, "
+                "log_path, analyzed_at, summary) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                # build 列记被测 App 的版本号 (版本间对比最常用)，系统版本在 summary.run_info 里
+                (fingerprint, d["target_pkg"], info.get("model", ""), info.get("serial", ""), info.get("app", ""),
+                 d["start_epoch"], d["end_epoch"], os.path.abspath(analyzer.log_path), int(time.time()),
+                 json.dumps(summary, ensure_ascii=False)))
+            run_id = cur.lastrowid
+
+            for name, sketch in sketches.items():
+                s = sketch.run.summary()
+                self.conn.execute(
+                    "INSERT INTO metrics (run_id, metric, count, mean, min, max, p50, p95, p99, sketch) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (run_id, name, *[None if s[k] != s[k] else s[k] for k in STATS],
+                     json.dumps(sketch.run.to_state())))
+
+            for key in analyzer.CURVE_KEYS:
+                t, v = d[key].downsample(self.SERIES_POINTS)
+                self.conn.execute(
+                    "INSERT INTO series (run_id, metric, dtype, epochs, vals) VALUES (?, ?, ?, ?, ?)",
+                    (run_id, key.replace("_records", ""), v.dtype.str, t.astype("<i8").tobytes(), v.tobytes()))
+        return run_id
+
+    # ==========================================
+    # 查询
+    # ==========================================
+    def get_run(self, run_id):
+        row = self.conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return self._run_dict(row) if row else None
+
+    def list_runs(self, package=None, device=None, build=None, since=None, limit=20):
+        """按条件列出最近的几场 (新的在前)"""
+        where, args = [], []
+        for column, value in (("package", package), ("device", device), ("build", build)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                args.append(value)
+        if since is not None:
+            where.append("started_at >= ?")
+            args.append(since)
+        sql = "SELECT * FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY started_at DESC, id DESC LIMIT ?"
+        return [self._run_dict(r) for r in self.conn.execute(sql, (*args, limit))]
+
+    def history(self, package, metric="mem", stat="p95", limit=10, device=None):
+        """
+        某个包最近几场的某项指标，例如 history("com.x", "mem", "p95", 10)。
+        :return: [{"id", "started_at", "build", "device", "value"}]，新的在前
+        """
+        if stat not in STATS:
+            raise ValueError(f"未知的统计量: {stat} (可选 {', '.join(STATS)})")
+        sql = (f"SELECT r.id, r.started_at, r.build, r.device, m.{stat} AS value FROM runs r "
+               "JOIN metrics m ON m.run_id = r.id AND m.metric = ? WHERE r.package = ?")
+        args = [metric, package]
+        if device is not None:
+            sql += " AND r.device = ?"
+            args.append(device)
+        sql += " ORDER BY r.started_at DESC, r.id DESC LIMIT ?"
+        return [dict(r) for r in self.conn.execute(sql, (*args, limit))]
+
+    def previous_run(self, run_id):
+        """同一个包 (有设备信息时同一台设备) 在这一场之前的最近一场，用于自动对比"""
+        run = self.get_run(run_id)
+        if not run:
+            return None
+        sql = "SELECT id FROM runs WHERE package = ? AND id != ? AND started_at < ?"
+        args = [run["package"], run_id, run["started_at"] or 0]
+        if run["device"]:
+            sql += " AND device = ?"
+            args.append(run["device"])
+        row = self.conn.execute(sql + " ORDER BY started_at DESC LIMIT 1", args).fetchone()
+        return row["id"] if row else None
+
+    def metrics(self, run_id):
+        rows = self.conn.execute("SELECT * FROM metrics WHERE run_id = ?", (run_id,))
+        return {r["metric"]: {k: r[k] for k in STATS} for r in rows}
+
+    def sketch(self, run_id, metric):
+        """某场某指标的整场 TDigest (可以和其他场合并，算多场的整体分位数)"""
+        row = self.conn.execute("SELECT sketch FROM metrics WHERE run_id = ? AND metric = ?",
+                                (run_id, metric)).fetchone()
+        return TDigest.from_state(json.loads(row["sketch"])) if row else None
+
+    def load_series(self, run_id, metric):
+        """降采样后存下来的曲线 (TimeSeries)，没有时返回 None"""
+        row = self.conn.execute("SELECT dtype, epochs, vals FROM series WHERE run_id = ? AND metric = ?",
+                                (run_id, metric)).fetchone()
+        if not row:
+            return None
+        return TimeSeries.from_arrays(np.frombuffer(row["epochs"], dtype="<i8"),
+                                      np.frombuffer(row["vals"], dtype=row["dtype"]), row["dtype"])
+
+    @staticmethod
+    def _run_dict(row):
+        run = dict(row)
+        run["summary"] = json.loads(run["summary"])
+        return run
+
+    # ==========================================
+    # 对比
+    # ==========================================
+    def diff(self, base_id, current_id):
+        """
+        对比两场 (base 为基准)，返回逐项结果:
+        [{"metric", "stat", "base", "current", "change", "regression"}]
+        """
+        base_m, cur_m = self.metrics(base_id), self.metrics(current_id)
+        rows = []
+        for metric, rules in REGRESSION_RULES.items():
+            if metric not in base_m or metric not in cur_m:
+                continue
+            for stat, rel, abs_min in rules:
+                b, c = base_m[metric][stat], cur_m[metric][stat]
+                if b is None or c is None:
+                    continue
+                delta = c - b
+                rows.append({
+                    "metric": metric, "stat": stat, "base": b, "current": c,
+                    "change": delta / b if b else None,
+                    "regression": delta > abs_min and delta > abs(b) * rel,
+                })
+
+        base_s, cur_s = self.get_run(base_id)["summary"], self.get_run(current_id)["summary"]
+        for counter in COUNTERS:
+            b, c = base_s.get(counter, 0), cur_s.get(counter, 0)
+            rows.append({"metric": counter, "stat": "count", "base": b, "current": c,
+                         "change": (c - b) / b if b else None, "regression": c > b})
+
+        b, c = base_s.get("mem_slope_per_hour", 0), cur_s.get("mem_slope_per_hour", 0)
+        rows.append({"metric": "mem", "stat": "slope/h", "base": b, "current": c, "change": None,
+                     "regression": cur_s.get("mem_verdict") == "LEAK" and base_s.get("mem_verdict") != "LEAK"})
+        return rows
+
+    def format_diff(self, base_id, current_id):
+        """文本版对比报告，回归项标 ❌"""
+        base, cur = self.get_run(base_id), self.get_run(current_id)
+        lines = [
+            "=" * 60,
+            f"📊 历史对比: #{base_id} -> #{current_id} ({cur['package']})",
+            f"   基准: {format_epoch(base['started_at']) if base['started_at'] else '-'} | "
+            f"版本 {base['build'] or '-'} | {base['device'] or '-'}",
+            f"   本次: {format_epoch(cur['started_at']) if cur['started_at'] else '-'} | "
+            f"版本 {cur['build'] or '-'} | {cur['device'] or '-'}",
+            "-" * 60,
+        ]
+        rows = self.diff(base_id, current_id)
+        for r in rows:
+            change = f"{r['change']:+.1%}" if r["change"] is not None else ""
+            mark = "❌" if r["regression"] else "  "
+            lines.append(f"{mark} {r['metric']:<18} {r['stat']:<7} {r['base']:>10.1f} -> {r['current']:>10.1f} {change}")
+        regressions = sum(r["regression"] for r in rows)
+        lines.append("-" * 60)
+        lines.append(f"{'❌ 发现 ' + str(regressions) + ' 项回归' if regressions else '✅ 没有指标回归'}")
+        return "\n".join(lines)
@@ -0,0 +1,158 @@
+import datetime
+
+import numpy as np
+
+from src.downsample import DEFAULT_POINT_BUDGET, downsample
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def parse_epoch(time_str):
+    """'YYYY-MM-DD HH:MM:SS' -> epoch 秒 (日志里的时间没有时区，按 UTC 墙上时间换算，不受本机时区影响)"""
+    return int((datetime.datetime.strptime(time_str, "%Y-%m-%d %H:%M:%S") - _EPOCH).total_seconds())
+
+
+def format_epoch(sec):
+    """epoch 秒 -> 'YYYY-MM-DD HH:MM:SS'，parse_epoch 的逆运算"""
+    return (_EPOCH + datetime.timedelta(seconds=int(sec))).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class TimeSeries:
+    """
+    一条监控曲线，按列存储: epoch 秒 (int64) + 数值 (float32 / int16 等紧凑类型)。
+
+    底层是按容量翻倍增长的 numpy 数组，epochs / values 返回的是切片视图 (不拷贝)；
+    扩容时换新数组，之前拿到的视图仍然有效，只是看不到之后追加的数据。
+    追加时顺带记录时间是否一直不减 (手机改时间会让日志时间回退)，范围查询据此决定能不能二分。
+    """
+
+    def __init__(self, dtype="float32", capacity=256):
+        self.dtype = np.dtype(dtype)
+        self._t = np.empty(capacity, dtype=np.int64)
+        self._v = np.empty(capacity, dtype=self.dtype)
+        self._n = 0
+        self._sorted = True
+
+    def append(self, epoch, value):
+        if self._n == len(self._t):
+            self._grow()
+        if self._n and epoch < self._t[self._n - 1]:
+            self._sorted = False
+        self._t[self._n] = epoch
+        self._v[self._n] = value
+        self._n += 1
+
+    def extend(self, other):
+        """把另一条同类型曲线接在后面 (并行解析合并用)"""
+        self.extend_arrays(other.epochs, other.values)
+
+    def extend_arrays(self, epochs, values):
+        """批量追加 (epoch 数组, 数值数组)"""
+        n = len(epochs)
+        while self._n + n > len(self._t):
+            self._grow()
+        if n and self._sorted:
+            self._sorted = not ((self._n and epochs[0] < self._t[self._n - 1]) or np.any(np.diff(epochs) < 0))
+        self._t[self._n:self._n + n] = epochs
+        self._v[self._n:self._n + n] = values
+        self._n += n
+
+    def _grow(self):
+        cap = max(256, len(self._t) * 2)
+        t = np.empty(cap, dtype=np.int64)
+        v = np.empty(cap, dtype=self.dtype)
+        t[:self._n] = self._t[:self._n]
+        v[:self._n] = self._v[:self._n]
+        self._t, self._v = t, v
+
+    def __len__(self):
+        return self._n
+
+    def __eq__(self, other):
+        if not isinstance(other, TimeSeries):
+            return NotImplemented
+        return (self.dtype == other.dtype and np.array_equal(self.epochs, other.epochs)
+                and np.array_equal(self.values, other.values))
+
+    def __repr__(self):
+        return f"TimeSeries(dtype={self.dtype}, len={self._n})"
+
+    @property
+    def epochs(self):
+        return self._t[:self._n]
+
+    @property
+    def values(self):
+        return self._v[:self._n]
+
+    def last(self):
+        """最后一个点 (epoch, value)，没有数据时返回 None"""
+        if not self._n:
+            return None
+        return int(self._t[self._n - 1]), self._v[self._n - 1].item()
+
+    @property
+    def is_sorted(self):
+        """epochs 是否不减"""
+        return self._sorted
+
+    def between(self, start=None, end=None):
+        """
+        [start, end] 时间范围内的 (epochs, values)。
+        epochs 有序时直接二分查找，返回视图；时间回退过时按掩码过滤，结果按时间排序 (拷贝)。
+        """
+        t = self.epochs
+        if not self._sorted:
+            keep = np.ones(len(t), dtype=bool)
+            if start is not None:
+                keep &= t >= start
+            if end is not None:
+                keep &= t <= end
+            idx = np.flatnonzero(keep)
+            idx = idx[np.argsort(t[idx], kind="stable")]
+            return t[idx], self.values[idx]
+        lo = 0 if start is None else int(np.searchsorted(t, start, side="left"))
+        hi = len(t) if end is None else int(np.searchsorted(t, end, side="right"))
+        return t[lo:hi], self.values[lo:hi]
+
+    def times(self):
+        """时间轴的 datetime64[s] 视图 (不拷贝)"""
+        return self.epochs.view("datetime64[s]")
+
+    def time_strings(self):
+        """'YYYY-MM-DD HH:MM:SS' 字符串列表，生成 HTML 报告用"""
+        return [s.replace("T", " ") for s in np.datetime_as_string(self.times(), unit="s")]
+
+    def downsample(self, max_points=DEFAULT_POINT_BUDGET, method="minmax"):
+        """降采样后的 (epochs, values)，max_points=None 时返回全分辨率视图"""
+        return downsample(self.epochs, self.values, max_points, method)
+
+    def to_frame(self, name="value", max_points=None, method="minmax"):
+        """
+        pandas DataFrame，以时间为索引。
+        不降采样时列直接引用底层数组；画图时传 max_points 控制点数。
+        """
+        import pandas as pd
+        t, v = self.downsample(max_points, method)
+        return pd.DataFrame({name: v}, index=pd.Index(t.view("datetime64[s]"), name="Time"), copy=False)
+
+    # ==========================================
+    # 序列化 (增量状态文件用)
+    # ==========================================
+    def to_state(self):
+        return {"dtype": self.dtype.str, "t": self.epochs.tolist(), "v": self.values.tolist()}
+
+    @classmethod
+    def from_state(cls, state):
+        return cls.from_arrays(state["t"], state["v"], state["dtype"])
+
+    @classmethod
+    def from_arrays(cls, epochs, values, dtype=None):
+        values = np.asarray(values, dtype=dtype)
+        n = len(values)
+        ts = cls(values.dtype, capacity=max(256, n))
+        ts._t[:n] = epochs
+        ts._v[:n] = values
+        ts._n = n
+        ts._sorted = not np.any(np.diff(ts._t[:n]) < 0)
+        return ts
@@ -0,0 +1,191 @@
+import math
+
+import numpy as np
+
+from src.series import format_epoch
+
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+
+
+class TDigest:
+    """
+    t-digest 分位数草图: 数据压缩成最多约 compression / 2 个质心 (均值 + 权重)，
+    两端 (p1 / p99) 的质心很小、中间的很大，所以尾部分位数依然准确；内存和数据量无关。
+
+    - add_many 先攒到缓冲区，满了再一次性压缩 (排序 + 按 k1 尺度函数分组，全部是 numpy 运算)
+    - merge 把两个草图的质心放在一起重新压缩，多段 / 多台设备的结果可以任意合并
+    """
+
+    def __init__(self, compression=200, buffer_size=None):
+        self.compression = compression
+        self.buffer_size = buffer_size or compression * 20
+        self._means = np.zeros(0)
+        self._weights = np.zeros(0)
+        self._buffer = []
+        self._buffered = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return f"TDigest(count={self.count}, centroids={len(self._means)})"
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else math.nan
+
+    def add(self, value):
+        self.add_many(np.array([value]))
+
+    def add_many(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not len(values):
+            return
+        self._buffer.append(values)
+        self._buffered += len(values)
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        if self._buffered >= self.buffer_size:
+            self._flush()
+
+    def merge(self, other):
+        """把另一个草图并进来 (原地修改并返回 self)"""
+        other._flush()
+        self._flush()
+        if other.count:
+            self._compress(np.concatenate([self._means, other._means]),
+                           np.concatenate([self._weights, other._weights]))
+            self.count += other.count
+            self.total += other.total
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        """q 可以是单个数或数组，没有数据时返回 nan"""
+        self._flush()
+        if not self.count:
+            return np.full(np.shape(q), math.nan) if np.ndim(q) else math.nan
+        centers = np.cumsum(self._weights) - self._weights / 2
+        # 两端用真实的最小 / 最大值补齐，插值不会超出数据范围
+        xs = np.r_[0.0, centers, float(self.count)]
+        ys = np.r_[self.min, self._means, self.max]
+        result = np.interp(np.asarray(q, dtype=np.float64) * self.count, xs, ys)
+        return result if np.ndim(q) else float(result)
+
+    def summary(self, quantiles=DEFAULT_QUANTILES):
+        """{"count", "mean", "min", "max", "p50", "p95", ...}"""
+        out = {"count": self.count, "mean": self.mean,
+               "min": self.min if self.count else math.nan, "max": self.max if self.count else math.nan}
+        for q, v in zip(quantiles, np.atleast_1d(self.quantile(np.asarray(quantiles)))):
+            out[f"p{q * 100:g}"] = float(v)
+        return out
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        new = np.concatenate(self._buffer)
+        self._buffer, self._buffered = [], 0
+        self._compress(np.concatenate([self._means, new]), np.concatenate([self._weights, np.ones(len(new))]))
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        # k1 尺度函数: k(q) = δ/(2π)·asin(2q-1)，k 每增加 1 是一个质心的容量；两端 q 变化快、质心小
+        q = (np.cumsum(weights) - weights / 2) / total
+        k = np.floor(self.compression / (2 * math.pi) * np.arcsin(np.clip(2 * q - 1, -1, 1)))
+        starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+        self._weights = np.add.reduceat(weights, starts)
+        self._means = np.add.reduceat(means * weights, starts) / self._weights
+
+    # ==========================================
+    # 序列化 (状态文件 / 分析缓存)
+    # ==========================================
+    def to_state(self):
+        self._flush()
+        return {"compression": self.compression, "means": self._means.tolist(), "weights": self._weights.tolist(),
+                "count": self.count, "total": self.total,
+                "min": self.min if self.count else None, "max": self.max if self.count else None}
+
+    @classmethod
+    def from_state(cls, state):
+        digest = cls(state["compression"])
+        digest._means = np.asarray(state["means"], dtype=np.float64)
+        digest._weights = np.asarray(state["weights"], dtype=np.float64)
+        digest.count, digest.total = state["count"], state["total"]
+        if digest.count:
+            digest.min, digest.max = state["min"], state["max"]
+        return digest
+
+
+class WindowedSketch:
+    """
+    一个指标的分位数统计: 整场一个 TDigest + 每个时间窗 (默认 1 小时) 一个 TDigest。
+    窗口按 epoch 对齐 (整点)，不同设备 / 不同分段的同一窗口可以直接合并。
+    """
+
+    def __init__(self, window_sec=3600, compression=200):
+        self.window_sec = window_sec
+        self.compression = compression
+        self.run = TDigest(compression)
+        self.windows = {}
+
+    def add_arrays(self, epochs, values):
+        """按时间顺序的一批数据 (例如 TimeSeries 的 epochs / values)"""
+        if not len(epochs):
+            return
+        self.run.add_many(values)
+        keys = epochs - epochs % self.window_sec
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        for lo, hi in zip(starts, np.r_[starts[1:], len(keys)]):
+            key = int(keys[lo])
+            if key not in self.windows:
+                self.windows[key] = TDigest(self.compression)
+            self.windows[key].add_many(values[lo:hi])
+
+    def merge(self, other):
+        if other.window_sec != self.window_sec:
+            raise ValueError(f"时间窗长度不一致: {self.window_sec}s / {other.window_sec}s")
+        self.run.merge(other.run)
+        for key, digest in other.windows.items():
+            if key in self.windows:
+                self.windows[key].merge(digest)
+            else:
+                self.windows[key] = TDigest(self.compression).merge(digest)
+        return self
+
+    def to_state(self):
+        return {"window_sec": self.window_sec, "compression": self.compression, "run": self.run.to_state(),
+                "windows": {str(key): digest.to_state() for key, digest in self.windows.items()}}
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state["window_sec"], state["compression"])
+        sketch.run = TDigest.from_state(state["run"])
+        sketch.windows = {int(key): TDigest.from_state(d) for key, d in state["windows"].items()}
+        return sketch
+
+    def summary(self, quantiles=DEFAULT_QUANTILES):
+        return {
+            "run": self.run.summary(quantiles),
+            "windows": [{"start": format_epoch(key), **self.windows[key].summary(quantiles)}
+                        for key in sorted(self.windows)],
+        }
+
+
+def merge_sketches(sketch_sets):
+    """合并多组 {指标名: WindowedSketch} (多台设备 / 多份日志)，返回新的一组，不修改输入"""
+    merged = {}
+    for sketches in sketch_sets:
+        for name, sketch in sketches.items():
+            if name not in merged:
+                merged[name] = WindowedSketch(sketch.window_sec, sketch.compression)
+            merged[name].merge(sketch)
+    return merged
@@ -0,0 +1,133 @@
+from collections import defaultdict
+from typing import Dict, List
+
+import numpy as np
+from pydantic import BaseModel
+
+from src.series import format_epoch
+
+# 步骤位置编码: Sheet 序号 * POSITION_BASE + Step 序号 (一个 int32 存下 "Sheet.Step")
+POSITION_BASE = 10000
+
+
+def encode_positions(step_ids):
+    """["1.3", ...] 或 bytes 数组 -> int 数组 (1 * 10000 + 3)"""
+    ids = np.asarray(step_ids)
+    if ids.dtype.kind == "U":
+        ids = np.char.encode(ids)
+    parts = np.char.partition(ids, b".")
+    return parts[:, 0].astype(np.int64) * POSITION_BASE + parts[:, 2].astype(np.int64)
+
+
+class RankItem(BaseModel):
+    key: str
+    count: int  # 在错误之前出现的次数
+    share: float  # 占这类错误之前全部步骤的比例
+    lift: float  # share / 该项在整场步骤里的比例，> 1 说明比平时更常出现在错误之前
+
+
+class ErrorCorrelation(BaseModel):
+    error_type: str
+    errors: int
+    matched: int  # 时间窗内找得到前置步骤的错误数
+    sheets: List[RankItem] = []  # 出错时所在的 Sheet (错误前最近一步所属)
+    actions: List[RankItem] = []  # 错误前 n 步的动作类型
+
+
+class StepIndex:
+    """
+    按时间排序的步骤索引 (epoch / 位置 / 动作类型都是列数组)，用二分查找定位每个错误之前执行的步骤。
+
+    - 一次 searchsorted 处理所有错误，取前 n 步是下标矩阵运算，没有逐条的 Python 循环
+    - 排名按次数，同时给出 lift (相对整场步骤分布的倍数)，把 "本来就多" 和 "错误前格外多" 区分开
+    """
+
+    def __init__(self, epochs, positions, step_actions):
+        epochs = np.asarray(epochs, dtype=np.int64)
+        positions = np.asarray(positions, dtype=np.int64)
+        # 续跑 / 改系统时间时日志时间可能回退，稳定排序后同一秒内仍保持日志顺序
+        if len(epochs) and np.any(epochs[1:] < epochs[:-1]):
+            order = np.argsort(epochs, kind="stable")
+            epochs, positions = epochs[order], positions[order]
+        self.epochs = epochs
+        self.positions = positions
+        self.sheets = positions // POSITION_BASE
+
+        # 动作类型编码: 每个不同的位置查一次 step_actions
+        uniq, inv = np.unique(positions, return_inverse=True)
+        names = [step_actions.get(f"{p // POSITION_BASE}.{p % POSITION_BASE}", "?") for p in uniq.tolist()]
+        self.action_names = sorted(set(names))
+        lookup = np.array([self.action_names.index(name) for name in names], dtype=np.int64)
+        self.actions = lookup[inv] if len(positions) else np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.epochs)
+
+    @classmethod
+    def from_analyzer(cls, analyzer):
+        d = analyzer.data
+        return cls(d["step_pos_records"].epochs, d["step_pos_records"].values, d["step_actions"])
+
+    def preceding(self, epochs, n=5, window_sec=300):
+        """
+        每个时间点之前 (含同一秒) 最近的 n 步。
+        :return: (len(epochs), n) 的步骤下标矩阵，第 0 列最近；超出时间窗或不存在为 -1
+        """
+        epochs = np.asarray(epochs, dtype=np.int64)
+        end = np.searchsorted(self.epochs, epochs, side="right")
+        idx = end[:, None] - np.arange(1, n + 1)
+        valid = idx >= 0
+        safe = np.where(valid, idx, 0)
+        if len(self.epochs):
+            valid &= self.epochs[safe] >= (epochs - window_sec)[:, None]
+        else:
+            valid[:] = False
+        return np.where(valid, idx, -1)
+
+    def describe(self, i):
+        """单个步骤下标 -> {"time", "epoch", "step", "sheet", "action"}"""
+        pos = int(self.positions[i])
+        return {"time": format_epoch(self.epochs[i]), "epoch": int(self.epochs[i]),
+                "step": f"{pos // POSITION_BASE}.{pos % POSITION_BASE}", "sheet": pos // POSITION_BASE,
+                "action": self.action_names[self.actions[i]]}
+
+    def context(self, epoch, n=5, window_sec=300):
+        """某个时间点之前的 n 步 (时间正序)，排查单个错误时看"""
+        idx = self.preceding([epoch], n, window_sec)[0]
+        return [self.describe(i) for i in idx[::-1] if i >= 0]
+
+    def correlate(self, events, n=5, window_sec=300, top=5) -> Dict[str, ErrorCorrelation]:
+        """
+        events: [{"epoch", "type", ...}] (error_timeline / 统一时间线)。
+        按错误类型统计: 出错时所在的 Sheet、错误前 n 步的动作类型，各取前 top 名。
+        """
+        by_type = defaultdict(list)
+        for e in events:
+            by_type[e["type"]].append(e["epoch"])
+
+        n_actions = len(self.action_names)
+        sheet_ids = np.unique(self.sheets)
+        base_actions = np.bincount(self.actions, minlength=n_actions) / max(len(self), 1)
+        base_sheets = np.bincount(np.searchsorted(sheet_ids, self.sheets), minlength=len(sheet_ids)) / max(len(self), 1)
+
+        result = {}
+        for err_type, epochs in sorted(by_type.items()):
+            idx = self.preceding(epochs, n, window_sec)
+            report = ErrorCorrelation(error_type=err_type, errors=len(epochs), matched=int((idx[:, 0] >= 0).sum()))
+            nearest = idx[:, 0][idx[:, 0] >= 0]
+            cells = idx[idx >= 0]
+            if len(cells):
+                report.sheets = self._rank(np.searchsorted(sheet_ids, self.sheets[nearest]), base_sheets,
+                                           [f"Sheet#{s}" for s in sheet_ids.tolist()], top)
+                report.actions = self._rank(self.actions[cells], base_actions, self.action_names, top)
+            result[err_type] = report
+        return result
+
+    @staticmethod
+    def _rank(codes, base, names, top):
+        counts = np.bincount(codes, minlength=len(names))
+        share = counts / counts.sum()
+        order = np.lexsort((np.arange(len(names)), -counts))[:top]
+        return [RankItem(key=names[i], count=int(counts[i]), share=round(float(share[i]), 3),
+                         lift=round(float(share[i] / base[i]), 2) if base[i] else 0.0)
+                for i in order.tolist() if counts[i]]
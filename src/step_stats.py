@@ -0,0 +1,131 @@
+import heapq
+from bisect import bisect_right
+
+import numpy as np
+
+# 直方图桶的上界 (ms)，最后一个桶是 >= 30s
+BUCKETS_MS = (50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+
+def bucket_labels():
+    """["<50ms", "50-100ms", ..., ">=30000ms"]"""
+    labels = [f"<{BUCKETS_MS[0]}ms"]
+    labels += [f"{lo}-{hi}ms" for lo, hi in zip(BUCKETS_MS, BUCKETS_MS[1:])]
+    labels.append(f">={BUCKETS_MS[-1]}ms")
+    return labels
+
+
+class StepStats:
+    """
+    步骤耗时统计 ([STEP][#序号] 行的 End - Start):
+    按动作类型、按 Sheet 各一组固定分桶直方图 (计数 / 总耗时 / 最大值)，外加最慢的 TOP_N 步。
+
+    全部是计数和定长列表，可以按段合并 (并行解析)，也能原样存进状态文件 / 分析缓存。
+    """
+
+    TOP_N = 20
+
+    def __init__(self):
+        # 键 -> {"count", "total_ms", "max_ms", "hist": [每个桶的计数]}
+        self.by_type = {}
+        self.by_sheet = {}
+        # 最小堆: [耗时, 序号, 时间, 步骤 id ("Sheet.Step"), 类型, 描述]
+        self.slowest = []
+
+    def __eq__(self, other):
+        return isinstance(other, StepStats) and self.to_state() == other.to_state()
+
+    def __len__(self):
+        return sum(g["count"] for g in self.by_type.values())
+
+    def add(self, seq, time_str, step_id, action, desc, ms):
+        self._add_to(self.by_type, action, ms)
+        self._add_to(self.by_sheet, step_id.split(".", 1)[0], ms)
+        if ms >= self.threshold():
+            self.offer([ms, seq, time_str, step_id, action, desc])
+
+    def add_many(self, actions, sheets, ms):
+        """
+        批量更新直方图 (numpy 分组计数)。actions / sheets 是和 ms 等长的键数组 (str 或 bytes)；
+        最慢步骤另外用 threshold / offer 维护，只有可能进榜的那几步才需要拼完整记录。
+        """
+        buckets = np.searchsorted(BUCKETS_MS, ms, side="right")
+        for groups, keys in ((self.by_type, actions), (self.by_sheet, sheets)):
+            uniq, inv = np.unique(keys, return_inverse=True)
+            counts = np.bincount(inv * (len(BUCKETS_MS) + 1) + buckets,
+                                 minlength=len(uniq) * (len(BUCKETS_MS) + 1)).reshape(len(uniq), -1)
+            totals = np.bincount(inv, weights=ms, minlength=len(uniq))
+            maxes = np.full(len(uniq), -1, dtype=np.int64)
+            np.maximum.at(maxes, inv, ms)
+            for i, key in enumerate(uniq.tolist()):
+                key = key.decode() if isinstance(key, bytes) else key
+                g = groups.get(key)
+                if g is None:
+                    g = groups[key] = {"count": 0, "total_ms": 0, "max_ms": 0, "hist": [0] * (len(BUCKETS_MS) + 1)}
+                g["count"] += int(counts[i].sum())
+                g["total_ms"] += int(totals[i])
+                g["max_ms"] = max(g["max_ms"], int(maxes[i]))
+                g["hist"] = [a + int(b) for a, b in zip(g["hist"], counts[i])]
+
+    def threshold(self):
+        """耗时低于这个值的步骤不可能进最慢榜"""
+        return self.slowest[0][0] if len(self.slowest) >= self.TOP_N else -1
+
+    def offer(self, item):
+        """[耗时, 序号, 时间, 步骤 id, 类型, 描述]，够慢就放进最慢榜"""
+        if len(self.slowest) < self.TOP_N:
+            heapq.heappush(self.slowest, item)
+        elif item > self.slowest[0]:
+            heapq.heapreplace(self.slowest, item)
+
+    @staticmethod
+    def _add_to(groups, key, ms):
+        g = groups.get(key)
+        if g is None:
+            g = groups[key] = {"count": 0, "total_ms": 0, "max_ms": 0, "hist": [0] * (len(BUCKETS_MS) + 1)}
+        g["count"] += 1
+        g["total_ms"] += ms
+        if ms > g["max_ms"]:
+            g["max_ms"] = ms
+        g["hist"][bisect_right(BUCKETS_MS, ms)] += 1
+
+    def merge(self, other):
+        for mine, theirs in ((self.by_type, other.by_type), (self.by_sheet, other.by_sheet)):
+            for key, g in theirs.items():
+                if key not in mine:
+                    mine[key] = {"count": 0, "total_ms": 0, "max_ms": 0, "hist": [0] * len(g["hist"])}
+                m = mine[key]
+                m["count"] += g["count"]
+                m["total_ms"] += g["total_ms"]
+                m["max_ms"] = max(m["max_ms"], g["max_ms"])
+                m["hist"] = [a + b for a, b in zip(m["hist"], g["hist"])]
+        for item in other.slowest:
+            self.offer(list(item))
+        return self
+
+    def top(self, n=None):
+        """最慢的几步，耗时降序: [{"ms", "seq", "time", "step", "type", "desc"}]"""
+        keys = ("ms", "seq", "time", "step", "type", "desc")
+        return [dict(zip(keys, item)) for item in sorted(self.slowest, reverse=True)[:n]]
+
+    def table(self, by="type"):
+        """按类型 / Sheet 的汇总行: [{"key", "count", "mean_ms", "max_ms", "hist"}]，次数降序"""
+        groups = self.by_type if by == "type" else self.by_sheet
+        return [{"key": key, "count": g["count"], "mean_ms": g["total_ms"] / g["count"], "max_ms": g["max_ms"],
+                 "hist": list(g["hist"])}
+                for key, g in sorted(groups.items(), key=lambda kv: -kv[1]["count"])]
+
+    # ==========================================
+    # 序列化 (状态文件 / 分析缓存)
+    # ==========================================
+    def to_state(self):
+        return {"by_type": self.by_type, "by_sheet": self.by_sheet, "slowest": sorted(self.slowest)}
+
+    @classmethod
+    def from_state(cls, state):
+        stats = cls()
+        stats.by_type = {k: dict(g, hist=list(g["hist"])) for k, g in state["by_type"].items()}
+        stats.by_sheet = {k: dict(g, hist=list(g["hist"])) for k, g in state["by_sheet"].items()}
+        stats.slowest = [list(item) for item in state["slowest"]]
+        heapq.heapify(stats.slowest)
+        return stats
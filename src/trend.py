@@ -0,0 +1,223 @@
+import math
+from typing import List
+
+import numpy as np
+from pydantic import BaseModel
+
+from src.series import format_epoch
+
+# 各指标: (单位, 每小时上涨多少算 "持续上涨", 多大的阶跃算变点)
+METRICS = {
+    "mem": ("MB", 10.0, 50.0),
+    "cpu": ("%", 5.0, 20.0),
+    "temp": ("°C", 2.0, 5.0),
+}
+
+VERDICT_LABELS = {
+    "LEAK": "持续上涨 (疑似泄漏)",
+    "SUSPECT": "缓慢上涨 (待观察)",
+    "STABLE": "平稳",
+    "INSUFFICIENT": "数据不足",
+}
+
+
+class ChangePoint(BaseModel):
+    epoch: int
+    time: str
+    before: float  # 变点前 k 个点的均值
+    after: float  # 变点后 k 个点的均值
+
+
+class TrendReport(BaseModel):
+    metric: str
+    unit: str
+    verdict: str  # LEAK / SUSPECT / STABLE / INSUFFICIENT，见 VERDICT_LABELS
+    confidence: float = 0.0
+    slope_per_hour: float = 0.0  # 各段斜率按时长加权 (阶跃本身不算上涨)
+    last_slope_per_hour: float = 0.0  # 最新一段的斜率
+    span_hours: float = 0.0
+    segments: int = 0
+    change_points: List[ChangePoint] = []
+
+    @property
+    def label(self):
+        return VERDICT_LABELS[self.verdict]
+
+
+# ==========================================
+# 向量化的基础运算
+# ==========================================
+def fit_slope(t, v):
+    """最小二乘斜率 (单位/秒) 和它的标准误差；点数不足或时间没有跨度时标准误差为 inf"""
+    n = len(t)
+    if n < 3:
+        return 0.0, math.inf
+    dt = t.astype(np.float64) - t.mean()
+    dv = v.astype(np.float64) - v.mean()
+    sxx = float(dt @ dt)
+    if sxx == 0:
+        return 0.0, math.inf
+    slope = float(dt @ dv) / sxx
+    resid = dv - slope * dt
+    return slope, math.sqrt(float(resid @ resid) / (n - 2) / sxx)
+
+
+def window_slopes(t, v, window_sec=3600):
+    """
+    按固定时间窗 (不重叠) 分别拟合斜率，全程 numpy 分组运算，没有 Python 循环。
+    :return: (窗口起点 epoch, 每小时斜率, 窗口点数)
+    """
+    if not len(t):
+        return t[:0], np.zeros(0), np.zeros(0, dtype=np.int64)
+    tl = (t - t[0]).astype(np.float64)
+    bucket = (t - t[0]) // window_sec
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    counts = np.diff(np.r_[starts, len(t)])
+
+    vf = v.astype(np.float64)
+    dt = tl - np.repeat(np.add.reduceat(tl, starts) / counts, counts)
+    dv = vf - np.repeat(np.add.reduceat(vf, starts) / counts, counts)
+    sxx = np.add.reduceat(dt * dt, starts)
+    sxy = np.add.reduceat(dt * dv, starts)
+    slopes = np.divide(sxy, sxx, out=np.zeros_like(sxy), where=sxx > 0) * 3600
+    return t[starts], slopes, counts
+
+
+def change_points(v, k=10, threshold=5.0, min_jump=0.0):
+    """
+    阶跃检测: 每个位置比较之后 k 个点和之前 k 个点的均值差 (用前缀和一次算完)。
+
+    - 先减掉整体趋势带来的均值差 (k × 拟合出的每点斜率)，缓慢上涨不会被当成阶跃
+    - 噪声用相邻差分的 MAD 估计，均值差超过 threshold 倍噪声、且 (去趋势前后) 都不小于 min_jump 才算
+    - ±k 范围内只保留得分最高的一个，离末尾太近的先不输出 (见下)
+    :return: 变点下标列表 (升序)
+    """
+    n = len(v)
+    if n < 2 * k:
+        return []
+    vf = v.astype(np.float64)
+    csum = np.r_[0.0, np.cumsum(vf)]
+    idx = np.arange(k, n - k + 1)
+    before = (csum[idx] - csum[idx - k]) / k
+    after = (csum[idx + k] - csum[idx]) / k
+
+    steps = np.diff(vf)
+    drift, _ = fit_slope(np.arange(n), vf)
+    jump = after - before - drift * k
+    sigma = 1.4826 * np.median(np.abs(steps - drift)) / math.sqrt(2)
+    noise = max(sigma * math.sqrt(2.0 / k), 1e-9)
+    score = np.abs(jump) / noise
+
+    picked = []
+    for j in np.argsort(-score):
+        if score[j] < threshold:
+            break
+        if min(abs(jump[j]), abs(after[j] - before[j])) < min_jump:
+            continue
+        if all(abs(int(j) - p) > k for p in picked):
+            picked.append(int(j))
+    # 离末尾不到 k 个点的位置，右边的邻居还没算全 (数据还在追加)，先不下结论，
+    # 但它们仍然参与了上面的去重，不会让旁边得分稍低的位置顶替
+    return sorted(int(idx[j]) for j in picked if idx[j] <= n - 2 * k)
+
+
+# ==========================================
+# 增量跟踪
+# ==========================================
+class TrendTracker:
+    """
+    单个指标的趋势跟踪，可以在数据持续追加时反复调用 update()。
+
+    曲线按变点切成若干段 (例如 ANR 自救重启后内存掉下去重新爬升)，每段单独拟合斜率，
+    已经结束的段只保留汇总值，之后不再重算；每次 update 只在当前段上做向量化计算。
+    """
+
+    # 少于这么长的数据不下结论
+    MIN_SPAN_SEC = 1800
+    MIN_POINTS = 10
+    WINDOW_SEC = 3600
+    CHANGE_K = 10
+
+    def __init__(self, metric):
+        self.metric = metric
+        self.unit, self.leak_slope, self.min_jump = METRICS[metric]
+        self.reset()
+
+    def reset(self):
+        self._n = 0
+        self._seg_start = 0
+        # 已结束的段: (时长秒, 斜率/秒, 标准误差, 上涨窗口数, 有效窗口数)
+        self._closed = []
+        self._change_points = []
+
+    def update(self, series):
+        """series 是 TimeSeries (只会追加)；长度变短说明日志被换掉了，从头开始"""
+        return self.update_arrays(series.epochs, series.values)
+
+    def update_arrays(self, t, v):
+        n = len(t)
+        if n < self._n:
+            self.reset()
+        self._n = n
+
+        # 在当前段上找阶跃，找到就结束当前段，从变点处开始新的一段
+        while True:
+            seg_t, seg_v = t[self._seg_start:n], v[self._seg_start:n]
+            cps = change_points(seg_v, self.CHANGE_K, min_jump=self.min_jump)
+            if not cps:
+                break
+            cp = self._seg_start + cps[0]
+            self._closed.append(self._segment_stats(t[self._seg_start:cp], v[self._seg_start:cp]))
+            k = self.CHANGE_K
+            self._change_points.append(ChangePoint(
+                epoch=int(t[cp]), time=format_epoch(t[cp]),
+                before=float(v[cp - k:cp].mean()), after=float(v[cp:cp + k].mean())))
+            self._seg_start = cp
+        return self._report(t, self._segment_stats(seg_t, seg_v))
+
+    def _segment_stats(self, t, v):
+        slope, se = fit_slope(t, v)
+        _, slopes, counts = window_slopes(t, v, self.WINDOW_SEC)
+        valid = counts >= 3
+        span = float(t[-1] - t[0]) if len(t) else 0.0
+        return span, slope, se, int((slopes[valid] > 0).sum()), int(valid.sum())
+
+    def _report(self, t, current):
+        report = TrendReport(metric=self.metric, unit=self.unit, verdict="INSUFFICIENT",
+                             segments=len(self._closed) + 1, change_points=list(self._change_points))
+        if not len(t):
+            return report
+        report.span_hours = round(float(t[-1] - t[0]) / 3600, 2)
+        report.last_slope_per_hour = round(current[1] * 3600, 3)
+
+        # 各段斜率按时长加权合成，阶跃 (重启 / 场景切换) 本身不计入上涨
+        segments = [s for s in self._closed + [current] if s[0] > 0 and math.isfinite(s[2])]
+        total = sum(s[0] for s in segments)
+        if len(t) < self.MIN_POINTS or total < self.MIN_SPAN_SEC:
+            return report
+
+        slope = sum(s[0] * s[1] for s in segments) / total
+        se = math.sqrt(sum((s[0] * s[2]) ** 2 for s in segments)) / total
+        report.slope_per_hour = round(slope * 3600, 3)
+
+        # 置信度 = 斜率的统计显著性 × 各时间窗里上涨的比例 (真泄漏是持续的，不是某一段突然涨)
+        significance = math.erf(abs(slope) / se / math.sqrt(2)) if se > 0 else 1.0
+        rising, windows = sum(s[3] for s in segments), sum(s[4] for s in segments)
+        consistency = rising / windows if windows else 0.5
+        if slope < 0:
+            consistency = 1 - consistency
+        report.confidence = round(significance * consistency, 3)
+
+        per_hour = slope * 3600
+        if per_hour >= self.leak_slope and report.confidence >= 0.8:
+            report.verdict = "LEAK"
+        elif per_hour >= self.leak_slope / 2 and report.confidence >= 0.5:
+            report.verdict = "SUSPECT"
+        else:
+            report.verdict = "STABLE"
+        return report
+
+
+def analyze_trend(metric, epochs, values):
+    """一次性分析整条曲线 (和增量跟踪走同一套逻辑)"""
+    return TrendTracker(metric).update_arrays(epochs, values)
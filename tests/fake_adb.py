@@ -0,0 +1,148 @@
+"""
+假的 adb，用于在 Linux 上无真机测试主机端工具。
+
+- 每个 serial 对应 tmp 目录下的一个"设备根目录"，/sdcard 和 /data/local/tmp 都映射到这里
+- adb shell / exec-out 用本机 sh 执行，PATH 前面放一组桩命令 (input/am/dumpsys/logcat...)
+- 每次调用 adb 都会记录到 adb_calls.log，方便断言"只启动了一个 adb 进程"
+- base 下放 offline_<serial> / hang_<serial>_<命令> 空文件可以模拟掉线 / 卡死
+"""
+import os
+import stat
+import textwrap
+
+FAKE_ADB = textwrap.dedent('''\
+    #!/usr/bin/env python3
+    import os, sys, shutil, subprocess, threading, time
+
+    BASE = os.environ["FAKE_ADB_BASE"]
+    args = sys.argv[1:]
+    serial = "default"
+    if args[:1] == ["-s"]:
+        serial, args = args[1], args[2:]
+
+    root = os.path.join(BASE, serial)
+    with open(os.path.join(BASE, "adb_calls.log"), "a") as f:
+        f.write(serial + " " + " ".join(args) + "\\n")
+
+    if os.path.exists(os.path.join(BASE, "offline_" + serial)):
+        if args[:1] == ["wait-for-device"]:
+            time.sleep(3600)
+        sys.stderr.write("error: device '%s' not found\\n" % serial)
+        sys.exit(1)
+
+    # hang_<serial>_<命令>: 模拟卡死的 adb 命令 (比如 USB 掉线时的 push)
+    if args and os.path.exists(os.path.join(BASE, "hang_%s_%s" % (serial, args[0]))):
+        time.sleep(3600)
+
+    if args[:1] == ["devices"]:
+        print("List of devices attached")
+        for name in sorted(os.listdir(BASE)):
+            if os.path.isdir(os.path.join(BASE, name)) and name != "bin":
+                print(name + "\\tdevice")
+        sys.exit(0)
+
+    for d in ("sdcard", "data/local/tmp"):
+        os.makedirs(os.path.join(root, d), exist_ok=True)
+
+    def remap(text):
+        return text.replace("/sdcard", root + "/sdcard").replace("/data/local/tmp", root + "/data/local/tmp")
+
+    env = dict(os.environ, PATH=os.path.join(BASE, "bin") + os.pathsep + os.environ["PATH"], FAKE_DEVICE=root)
+
+    cmd = args[0] if args else ""
+    if cmd in ("wait-for-device", "root", "remount"):
+        sys.exit(0)
+    if cmd == "push":
+        dst = remap(args[2])
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        shutil.copyfile(args[1], dst)
+        print("%s: 1 file pushed." % args[1])
+        sys.exit(0)
+    if cmd == "pull":
+        src = remap(args[1]).rstrip("/")
+        if src.endswith("/."):
+            src = src[:-2]
+        if not os.path.exists(src):
+            sys.stderr.write("adb: error: remote object '%s' does not exist\\n" % args[1])
+            sys.exit(1)
+        if os.path.isdir(src):
+            shutil.copytree(src, args[2], dirs_exist_ok=True)
+        else:
+            shutil.copyfile(src, args[2])
+        sys.exit(0)
+    if cmd == "logcat":
+        sys.exit(subprocess.call(["sh", "-c", "logcat " + " ".join(args[1:])], env=env, cwd=root))
+    if cmd in ("shell", "exec-out"):
+        if len(args) > 1:
+            sys.exit(subprocess.call(["sh", "-c", remap(" ".join(args[1:]))], env=env, cwd=root))
+        # 交互会话: 逐行改写路径后转发给 sh
+        proc = subprocess.Popen(["sh"], stdin=subprocess.PIPE, env=env, cwd=root)
+        for line in sys.stdin:
+            proc.stdin.write(remap(line).encode())
+            proc.stdin.flush()
+        proc.stdin.close()
+        sys.exit(proc.wait())
+
+    sys.stderr.write("fake adb: unsupported command %s\\n" % args)
+    sys.exit(1)
+''')
+
+# 桩命令: 调用都记录到 $FAKE_DEVICE/calls.log，输出固定的"手机"数据
+STUBS = {
+    "input": 'echo "input $*" >> "$FAKE_DEVICE/calls.log"',
+    "am": textwrap.dedent('''\
+        echo "am $*" >> "$FAKE_DEVICE/calls.log"
+        [ "$1" = "start" ] && echo "Status: ok"
+        exit 0'''),
+    "pidof": 'echo 4321',
+    "svc": 'exit 0',
+    "getprop": 'echo FakePhone',
+    "screencap": 'touch "$2"',
+    "pkill": 'echo "pkill $*" >> "$FAKE_DEVICE/calls.log"',
+    "dumpsys": textwrap.dedent('''\
+        case "$1" in
+            meminfo) echo "        TOTAL PSS:   204800            TOTAL RSS:   300000" ;;
+            window) echo "  mCurrentFocus=Window{1 u0 com.test.app/.MainActivity}" ;;
+        esac'''),
+    "logcat": textwrap.dedent('''\
+        case "$*" in
+            *events*) cat "$FAKE_DEVICE/events.txt" 2>/dev/null ;;
+            *-c*) : ;;
+            *) cat "$FAKE_DEVICE/logcat.txt" 2>/dev/null ;;
+        esac
+        exit 0'''),
+    "ping": 'echo "64 bytes from 1.2.3.4: icmp_seq=1 ttl=64 time=12.3 ms"',
+    "top": 'echo " 4321 u0_a1 10 -10 1.2G 100M 50M S 40.0 3.0 0:01.00 com.test.app"',
+}
+
+
+def _write_exec(path, content):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+
+def install_fake_adb(base_dir, serials=("default",)):
+    """
+    在 base_dir 下生成 fake adb 和桩命令，返回 adb 可执行文件路径。
+    调用方需要设置环境变量 FAKE_ADB_BASE=base_dir。
+    """
+    base_dir = str(base_dir)
+    bin_dir = os.path.join(base_dir, "bin")
+    os.makedirs(bin_dir, exist_ok=True)
+    for name, body in STUBS.items():
+        _write_exec(os.path.join(bin_dir, name), "#!/bin/sh\n" + body + "\n")
+    for serial in serials:
+        os.makedirs(os.path.join(base_dir, serial, "sdcard"), exist_ok=True)
+
+    adb_path = os.path.join(base_dir, "adb")
+    _write_exec(adb_path, FAKE_ADB)
+    return adb_path
+
+
+def adb_calls(base_dir):
+    path = os.path.join(str(base_dir), "adb_calls.log")
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [l.rstrip("\n") for l in f]
@@ -0,0 +1,393 @@
+import os
+
+import pytest
+
+from analyze_log import StressLogAnalyzer, _analyze_run
+
+# ==========================================
+# 1. 准备模拟日志 (与 stress_template.sh 的输出格式保持一致)
+# ==========================================
+
+SAMPLE_LOG = """[2025-12-24 10:00:00] === 压测开始: com.test.app ===
+[2025-12-24 10:00:01] [STEP] 点击: 500, 1000
+[2025-12-24 10:01:00] [STATUS] Mem:200MB | CPU:12.5% | Temp:38C
+[2025-12-24 10:01:01] [NETWORK] Ping:23.4ms
+[2025-12-24 10:02:00] !!![ANR_DETECTED]!!!
+    [SNAPSHOT] ANR
+[2025-12-24 10:02:03] [RECOVERY] ANR | Latency:2870ms | Result:OK
+[2025-12-24 10:03:00] [STATUS] Mem:260MB | CPU:30.0% | Temp:41C
+[2025-12-24 10:03:01] [NETWORK] Ping:FAIL (Exit:1)
+[2025-12-24 10:04:00] [CRITICAL_OOM] 发现严重征兆
+[2025-12-24 10:05:00] [RECOVERY] ANR | Latency:30050ms | Result:TIMEOUT
+[2025-12-24 10:05:00] [PACE] Sheet:Video | Target:30.0apm | Actual:28.5apm | Steps:57
+[2025-12-24 10:05:30] [WARN] something odd
+[2025-12-24 10:05:30] [PACE] Sheet:Video | Target:30.0apm | Actual:29.7apm | Steps:60
+"""
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "event.log"
+    path.write_text(SAMPLE_LOG, encoding="utf-8")
+    return str(path)
+
+
+class TestStressLogAnalyzer:
+
+    def test_parse_basic(self, log_file):
+        """测试基础指标：时间范围、内存、网络、错误"""
+        analyzer = StressLogAnalyzer(log_file)
+        assert analyzer.parse()
+
+        d = analyzer.data
+        assert d["start_time"] == "2025-12-24 10:00:00"
+        assert d["end_time"] == "2025-12-24 10:05:30"
+        assert d["duration"] == "0h 5m 30s"
+        assert d["end_epoch"] - d["start_epoch"] == 330
+        assert d["mem_records"].epochs.tolist() == [d["start_epoch"] + 60, d["start_epoch"] + 180]
+        assert d["mem_records"].values.tolist() == [200, 260]
+        assert d["net_failures"] == 1
+        assert d["errors"]["OOM"] == 1
+        assert d["errors"]["ANR"] == 1
+        assert d["warnings"] == 1
+
+    def test_parse_recovery_latency(self, log_file):
+        """测试 ANR 自救耗时被解析成可绘图的指标"""
+        analyzer = StressLogAnalyzer(log_file)
+        analyzer.parse()
+
+        d = analyzer.data
+        assert d["recovery_records"].values.tolist() == [2870, 30050]
+        assert d["recovery_failures"] == 1
+
+    def test_parse_pace(self, log_file):
+        """测试节奏控制：每个 Sheet 取最后一条累计速率"""
+        analyzer = StressLogAnalyzer(log_file)
+        analyzer.parse()
+
+        summary = analyzer.get_pace_summary()
+        assert list(summary) == ["Video"]
+        assert summary["Video"]["target"] == 30.0
+        assert summary["Video"]["actual"] == 29.7
+        assert summary["Video"]["steps"] == 60
+
+    def test_missing_file(self, tmp_path):
+        analyzer = StressLogAnalyzer(str(tmp_path / "nope.log"))
+        assert analyzer.parse() is False
+
+    def test_generate_html(self, log_file, tmp_path):
+        analyzer = StressLogAnalyzer(log_file)
+        analyzer.parse()
+        out = tmp_path / "report.html"
+        analyzer.generate_html(str(out))
+        assert "recChart" in out.read_text(encoding="utf-8")
+
+    def test_incremental_matches_full_parse(self, tmp_path):
+        """分批追加 + 增量解析，结果和一次性全量解析一致"""
+        path = tmp_path / "event.log"
+        raw = SAMPLE_LOG.encode("utf-8")
+        # 切在一个多字节字符中间，并且留下半行
+        cut = raw.index("压测".encode("utf-8")) + 1
+        path.write_bytes(raw[:cut])
+
+        inc = StressLogAnalyzer(str(path))
+        inc.parse_incremental()
+        with open(path, "ab") as f:
+            f.write(raw[cut:])
+        inc.parse_incremental()
+
+        full = StressLogAnalyzer(str(path))
+        full.parse()
+        assert inc.data == full.data
+
+    def test_state_roundtrip(self, tmp_path):
+        """保存状态后，新进程加载状态只解析新增部分"""
+        path = tmp_path / "event.log"
+        raw = SAMPLE_LOG.encode("utf-8")
+        half = raw.index(b"[CRITICAL_OOM]") + 5
+        path.write_bytes(raw[:half])
+
+        first = StressLogAnalyzer(str(path))
+        first.parse_incremental()
+        first.save_state()
+
+        with open(path, "ab") as f:
+            f.write(raw[half:])
+        second = StressLogAnalyzer(str(path))
+        assert second.load_state()
+        second.parse_incremental()
+
+        full = StressLogAnalyzer(str(path))
+        full.parse()
+        assert second.data == full.data
+        assert second.data["errors"]["OOM"] == 1
+
+    def test_incremental_restarts_on_truncate(self, tmp_path):
+        path = tmp_path / "event.log"
+        path.write_text(SAMPLE_LOG, encoding="utf-8")
+        analyzer = StressLogAnalyzer(str(path))
+        analyzer.parse_incremental()
+
+        path.write_text("[2025-12-25 09:00:00] [STATUS] Mem:100MB\n", encoding="utf-8")
+        analyzer.parse_incremental()
+        assert analyzer.data["mem_records"].values.tolist() == [100]
+        assert analyzer.data["start_time"] == "2025-12-25 09:00:00"
+
+    def test_fast_engine_matches_regex(self, tmp_path):
+        """快速路径和原正则解析结果完全一致，包括各种不规范的行"""
+        tricky = (
+            SAMPLE_LOG
+            + "[2025-12-24 10:06:00] [STEP] 输入文本: Target: com.other.app\n"
+            + "[2025-12-24 10:06:01] [STEP] Shell: echo CRITICAL_MEDIA\n"
+            + "[2025-12-24 10:06:02] [STEP][#7] 点击: 1, 2\n"
+            + "　[2025-12-24 10:06:03] [WARN] 全角空白开头\n"
+            + "[2025-12-24 10:06:04] [SNAPSHOT] 已截图 a.png　\n"
+            + "[2025-12-24 10:06:05] [STEP] a\r[2025-12-24 10:06:06] [STATUS] Mem:300MB\n"
+            + "[2025-1x-24 10:06:07] [STATUS] Mem:999MB\n"
+            + "    at com.test.app.Main.run(Main.java:42)\n"
+            + "[2025-12-24 10:06:08] [STEP] 最后一行没有换行"
+        )
+        path = tmp_path / "event.log"
+        path.write_bytes(tricky.encode("utf-8") + b"\xff")
+
+        ref = StressLogAnalyzer(str(path))
+        ref.parse(engine="regex")
+        fast = StressLogAnalyzer(str(path))
+        fast.parse()
+        assert fast.data == ref.data
+        assert fast.data["end_time"] == "2025-12-24 10:06:08"
+
+    def test_epoch_cache_matches_strptime(self, log_file):
+        """分钟前缀缓存跨分钟 / 跨天时结果和逐条 strptime 一致"""
+        from src.series import parse_epoch
+        analyzer = StressLogAnalyzer(log_file)
+        for ts in ("2025-12-31 23:59:58", "2025-12-31 23:59:59", "2026-01-01 00:00:00",
+                   "2026-01-01 00:00:07", "2025-12-31 23:59:59"):
+            assert analyzer._to_epoch(ts) == parse_epoch(ts)
+
+    def test_parallel_matches_serial(self, tmp_path, monkeypatch):
+        """按行边界切段并行解析，合并后和串行解析一致 (包括开始时间 / 目标包名的覆盖顺序)"""
+        body = SAMPLE_LOG * 20
+        body += "[2025-12-24 11:00:00] === 压测开始: 目标 com.second.app ===\n"
+        # 后半段没有 "压测开始" 行，目标包名 / 开始时间以 11:00 那一行为准
+        body += SAMPLE_LOG.split("\n", 1)[1].replace("10:0", "12:0") * 20
+        path = tmp_path / "event.log"
+        path.write_text(body, encoding="utf-8")
+
+        ranges = StressLogAnalyzer.split_ranges(str(path), 4)
+        raw = path.read_bytes()
+        assert len(ranges) == 4 and ranges[-1][1] == len(raw)
+        assert all(raw[s - 1:s] == b"\n" for s, _ in ranges[1:])
+
+        monkeypatch.setattr(StressLogAnalyzer, "PARALLEL_MIN_CHUNK", 1)
+        par = StressLogAnalyzer(str(path))
+        assert par.parse_parallel(workers=4)
+        ser = StressLogAnalyzer(str(path))
+        ser.parse()
+
+        assert par.data == ser.data
+        assert par.data["target_pkg"] == "com.second.app"
+        assert par.data["start_time"] == "2025-12-24 11:00:00"
+
+    def test_parse_cached(self, tmp_path):
+        """第二次分析命中缓存；日志变长后在缓存上增量解析；内容变了则重新解析"""
+        from src.analysis_cache import AnalysisCache
+        cache = AnalysisCache(str(tmp_path / "cache"))
+        path = tmp_path / "event.log"
+        head, rest = SAMPLE_LOG.split("\n", 1)
+        text = f"{head}\n[2025-12-24 10:00:00] [DEVICE] Model:Pixel 6 | Serial:abc123\n{rest}"
+        path.write_text(text, encoding="utf-8")
+
+        first = StressLogAnalyzer(str(path))
+        assert first.parse_cached(cache)
+        assert cache.load(str(path), StressLogAnalyzer(str(path))) == "hit"
+
+        # 换个路径 (网页上传的临时文件) 也能命中 (身份靠第一行 + [DEVICE] 行)
+        copy = tmp_path / "upload.log"
+        copy.write_bytes(path.read_bytes())
+        again = StressLogAnalyzer(str(copy))
+        assert again.parse_cached(cache)
+        assert again.data == first.data
+
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("[2025-12-24 10:06:00] [STATUS] Mem:300MB\n[2025-12-24 10:07:00] [WARN] 没有换行")
+        assert cache.load(str(path), StressLogAnalyzer(str(path))) == "grown"
+        grown = StressLogAnalyzer(str(path))
+        grown.parse_cached(cache)
+        full = StressLogAnalyzer(str(path))
+        full.parse()
+        assert grown.data == full.data
+
+        path.write_text(text.replace("Mem:200MB", "Mem:999MB"), encoding="utf-8")
+        assert cache.load(str(path), StressLogAnalyzer(str(path))) is None
+        changed = StressLogAnalyzer(str(path))
+        changed.parse_cached(cache)
+        assert changed.data["mem_records"].values.tolist() == [999, 260]
+
+    def test_cache_key_separates_devices(self, tmp_path):
+        """同一秒启动的两台设备第一行一样，靠 [DEVICE] 行 (没有时靠路径) 区分缓存条目"""
+        from src.analysis_cache import AnalysisCache
+        head, rest = SAMPLE_LOG.split("\n", 1)
+        keys = []
+        for name, serial in (("a.log", "A1"), ("b.log", "B2"), ("c.log", "A1")):
+            path = tmp_path / name
+            path.write_text(f"{head}\n[2025-12-24 10:00:00] [DEVICE] Model:X | Serial:{serial}\n{rest}", encoding="utf-8")
+            keys.append(AnalysisCache.fingerprint(str(path)))
+        assert keys[0] != keys[1] and keys[0] == keys[2]
+
+        for name in ("x.log", "y.log"):
+            (tmp_path / name).write_text(SAMPLE_LOG, encoding="utf-8")
+        assert AnalysisCache.fingerprint(str(tmp_path / "x.log")) != AnalysisCache.fingerprint(str(tmp_path / "y.log"))
+        assert (AnalysisCache.fingerprint(str(tmp_path / "x.log"), path_fallback=False)
+                == AnalysisCache.fingerprint(str(tmp_path / "y.log"), path_fallback=False))
+
+    def test_cache_eviction(self, tmp_path):
+        from src.analysis_cache import AnalysisCache
+        cache = AnalysisCache(str(tmp_path / "cache"), max_bytes=1)
+        for i in range(3):
+            path = tmp_path / f"event{i}.log"
+            path.write_text(f"[2025-12-2{i} 10:00:00] start\n" + SAMPLE_LOG, encoding="utf-8")
+            StressLogAnalyzer(str(path)).parse_cached(cache)
+        # 超过上限只保留最新写入的一份
+        assert len(list((tmp_path / "cache").glob("*.npz"))) == 1
+
+
+STEP_LOG = "".join(
+    f"[2025-12-24 10:{i // 30:02d}:{i % 30 * 2:02d}] [STEP][#{i + 1}] {1 + i % 2}.1 "
+    f"{'CLICK 点击: 1, 2' if i % 2 else 'SWIPE 滑动: 1,2 -> 3,4'} | Start:{1000 * i} | End:{1000 * i + 40 + i}\n"
+    for i in range(300)
+)
+
+
+# 第 3 条步骤的时间比前一条早 (手机时间被校正)
+BACKWARD_STEP_LOG = (
+    "[2025-12-24 10:00:00] === 压测开始: com.test.app ===\n"
+    "[2025-12-24 10:02:00] [STEP][#1] 1.1 CLICK 点击: 1, 2 | Start:1000 | End:1040\n"
+    "[2025-12-24 10:03:00] [STEP][#2] 1.2 CLICK 点击: 1, 2 | Start:2000 | End:2050\n"
+    "[2025-12-24 10:01:00] [STEP][#3] 1.3 CLICK 点击: 1, 2 | Start:3000 | End:3060\n"
+    "[2025-12-24 10:04:00] [STEP][#4] 1.4 CLICK 点击: 1, 2 | Start:4000 | End:4070\n"
+)
+
+
+class TestStepLatency:
+
+    def test_step_histograms(self, tmp_path):
+        path = tmp_path / "event.log"
+        path.write_text(SAMPLE_LOG + STEP_LOG + "[2025-12-24 10:10:00] [STEP][#301] 点击: 旧格式\n", encoding="utf-8")
+        analyzer = StressLogAnalyzer(str(path))
+        assert analyzer.parse()
+        d = analyzer.data
+
+        assert d["total_actions"] == 301
+        assert len(d["step_records"]) == 300
+        stats = d["step_stats"]
+        assert {row["key"]: row["count"] for row in stats.table("type")} == {"SWIPE": 150, "CLICK": 150}
+        assert {row["key"]: row["max_ms"] for row in stats.table("sheet")} == {"1": 338, "2": 339}
+        # 40 + i ms: i < 10 落在 <50ms，10 <= i < 60 在 50-100ms，其余 100-200ms 和 200-500ms
+        assert [sum(g["hist"][b] for g in stats.by_type.values()) for b in range(4)] == [10, 50, 100, 140]
+        assert [s["seq"] for s in stats.top(3)] == [300, 299, 298]
+        assert stats.top(1)[0]["desc"] == "点击: 1, 2"
+
+        _, per_minute = analyzer.steps_per_minute()
+        assert per_minute.tolist() == [30] * 8
+        assert analyzer.build_sketches()["step"].run.count == 300
+
+    def test_steps_per_minute_with_backward_time(self, tmp_path):
+        path = tmp_path / "event.log"
+        path.write_text(BACKWARD_STEP_LOG, encoding="utf-8")
+        analyzer = StressLogAnalyzer(str(path))
+        assert analyzer.parse()
+
+        minutes, per_minute = analyzer.steps_per_minute()
+        # 10:01 ~ 10:04 各一步，去掉首尾两分钟
+        assert per_minute.tolist() == [1, 1]
+        assert (minutes % 3600).tolist() == [120, 180]
+        analyzer.print_summary()
+
+    def test_parallel_and_cached_steps_match(self, tmp_path, monkeypatch):
+        from src.analysis_cache import AnalysisCache
+        path = tmp_path / "event.log"
+        edge = (
+            # 描述首尾带 Unicode 空白 / 为空、开机时间归零 (End < Start)、带关键字 (逐行处理) 的步骤行
+            "[2025-12-24 10:20:00] [STEP][#1] 1.1 TEXT \u3000输入文本: a\u3000 | Start:5 | End:9\n"
+            "[2025-12-24 10:20:01] [STEP][#2] 1.2 WAIT  | Start:5 | End:7\n"
+            "[2025-12-24 10:20:02] [STEP][#3] 1.3 CLICK 点击: 1, 2 | Start:900 | End:3\n"
+            "[2025-12-24 10:20:03] [STEP][#4] 1.4 SHELL Shell: echo CRITICAL_MEDIA | Start:1 | End:99999\n"
+            "[2025-12-24 10:20:04] [STEP][#5] 1.5 SHELL Shell: echo [x] | Start:1 | End:88888\n"
+        )
+        path.write_text(SAMPLE_LOG + STEP_LOG + edge + STEP_LOG * 2, encoding="utf-8")
+        ser = StressLogAnalyzer(str(path))
+        ser.parse()
+        regex = StressLogAnalyzer(str(path))
+        regex.parse(engine="regex")
+        assert regex.data == ser.data
+        assert ser.data["total_actions"] == 905
+        assert [s["ms"] for s in ser.data["step_stats"].top(2)] == [99998, 88887]
+        assert ser.data["step_stats"].by_type["TEXT"]["count"] == 1
+
+        monkeypatch.setattr(StressLogAnalyzer, "PARALLEL_MIN_CHUNK", 1)
+        par = StressLogAnalyzer(str(path))
+        assert par.parse_parallel(workers=3)
+        assert par.data == ser.data
+
+        cache = AnalysisCache(str(tmp_path / "cache"))
+        StressLogAnalyzer(str(path)).parse_cached(cache)
+        cached = StressLogAnalyzer(str(path))
+        assert cache.load(str(path), cached) == "hit"
+        assert cached.data == ser.data
+
+
+def _crashing_run(run_dir, report_dir, cache_dir=None):
+    """模拟分析进程被杀: 名字以 crash 结尾的场次直接退出进程"""
+    if run_dir.endswith("crash"):
+        os._exit(1)
+    return _analyze_run(run_dir, report_dir, cache_dir)
+
+
+class TestBatchAnalyzer:
+
+    def test_batch_ranks_runs_and_isolates_failures(self, tmp_path):
+        import json
+        from analyze_log import BatchAnalyzer
+
+        root = tmp_path / "fleet_logs"
+        noisy = SAMPLE_LOG + "[2025-12-24 10:06:00] [STATUS] Mem:900MB | CPU:10.0% | Temp:40C\n"
+        for serial, text in (("devA", SAMPLE_LOG), ("devB", noisy + "[2025-12-24 10:07:00] [ERROR] boom\n")):
+            (root / serial).mkdir(parents=True)
+            (root / serial / "event.log").write_text(text, encoding="utf-8")
+        # 损坏的一场: event.log 是个目录，读取时抛异常
+        (root / "devC" / "event.log").mkdir(parents=True)
+
+        batch = BatchAnalyzer(str(root), workers=2, cache_dir=str(tmp_path / "cache"))
+        assert batch.discover() == [str(root / s) for s in ("devA", "devB", "devC")]
+        assert batch.run()
+
+        assert [r["run"] for r in batch.results] == ["devB", "devA", "devC"]
+        assert [r["status"] for r in batch.results] == ["ok", "ok", "error"]
+        assert batch.results[0]["peak_mem"] == 900
+        assert (root / "batch_reports" / "devA" / "stress_report.html").exists()
+        assert batch.sketches["mem"].run.count == 5
+        # 两场第一行相同，缓存条目仍然各是各的
+        assert len(list((tmp_path / "cache").glob("*.npz"))) == 2
+
+        csv_file, json_file = batch.export()
+        summary = json.loads(open(json_file, encoding="utf-8").read())
+        assert summary["failed"] == 1 and len(summary["runs"]) == 3
+        # 输出目录本身不会被当成一场
+        assert len(BatchAnalyzer(str(root)).discover()) == 3
+
+    def test_worker_crash_only_fails_its_own_run(self, tmp_path, monkeypatch):
+        import analyze_log
+        from analyze_log import BatchAnalyzer
+
+        root = tmp_path / "fleet_logs"
+        for name in ("dev1", "dev2", "dev3_crash", "dev4", "dev5"):
+            (root / name).mkdir(parents=True)
+            (root / name / "event.log").write_text(SAMPLE_LOG, encoding="utf-8")
+        monkeypatch.setattr(analyze_log, "_analyze_run", _crashing_run)
+
+        batch = BatchAnalyzer(str(root), workers=2, reports=False, cache_dir=str(tmp_path / "cache"))
+        assert batch.run()
+        status = {r["run"]: r["status"] for r in batch.results}
+        assert status == {"dev1": "ok", "dev2": "ok", "dev3_crash": "error", "dev4": "ok", "dev5": "ok"}
+        assert "BrokenProcessPool" in batch.results[-1]["error"]
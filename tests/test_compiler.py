@@ -0,0 +1,64 @@
+import shutil
+import subprocess
+
+import pytest
+
+from src.compiler import StressCompiler
+from src.models import ProjectConfig, TaskModel, PlanModel, ProjectModel
+
+
+@pytest.fixture
+def project():
+    """两个 Sheet 的小计划，覆盖普通步骤和 repeat 步骤"""
+    return ProjectModel(
+        config=ProjectConfig(target_pkg="com.test.app", duration_sec=60),
+        plans=[
+            PlanModel(name="Login", loop_count=1, tasks=[
+                TaskModel(action="CLICK", p1="100", p2="200"),
+                TaskModel(action="WAIT", p1="2"),
+            ]),
+            PlanModel(name="Video", loop_count=5, pace_apm=30, tasks=[
+                TaskModel(action="SWIPE", p1="1", p2="2", p3="3", p4="4", repeat=3),
+            ]),
+        ],
+    )
+
+
+class TestStressCompiler:
+
+    def test_config_injected(self, project):
+        script = StressCompiler(project).compile()
+        assert 'TARGET_PKG="com.test.app"' in script
+        assert "DURATION_SEC=60" in script
+        assert "{{" not in script
+
+    def test_resume_positions(self, project):
+        """每个 Sheet / Step 都要带上序号，续跑才能定位"""
+        script = StressCompiler(project).compile()
+        assert "sheet_idx=1" in script
+        assert "sheet_idx=2" in script
+        assert "sheet_count=$(resume_sheet_start 2 5)" in script
+        assert script.count("if ! resume_skip $sheet_idx $step_idx; then") == 3
+
+    def test_steps_are_timed(self, project):
+        """每个动作前后都包上 step_begin / step_end (序号和计时由模板生成)"""
+        script = StressCompiler(project).compile()
+        assert '    step_begin CLICK "点击: 100, 200"\n    input tap 100 200\n    step_end\n' in script
+        assert script.count("step_begin SWIPE") == 1
+        assert "[STEP] " not in script
+
+    def test_pace_only_on_configured_sheet(self, project):
+        """只有配置了 APM 的 Sheet 才生成节奏控制代码"""
+        script = StressCompiler(project).compile()
+        assert 'pace_start "Video" 30.0 2000' in script
+        # repeat 3 次的步骤，每次都要对齐一次截止时间
+        assert script.count("            pace_tick\n") == 1
+        assert script.count("    done\n    pace_report\n") == 1
+
+    @pytest.mark.skipif(shutil.which("bash") is None, reason="需要 bash 做语法检查")
+    def test_script_syntax(self, project, tmp_path):
+        """生成的脚本至少要能通过 shell 语法检查"""
+        path = tmp_path / "stress_core.sh"
+        path.write_text(StressCompiler(project).compile(), encoding="utf-8")
+        res = subprocess.run(["bash", "-n", str(path)], capture_output=True, text=True)
+        assert res.returncode == 0, res.stderr
@@ -0,0 +1,89 @@
+import json
+
+from analyze_log import LogDirectoryAnalyzer
+from src.crash_index import CrashIndex
+
+
+def _java_crash(pid, ts, obj_id, line_no, thread="main"):
+    return [
+        f"12-24 {ts}.100 E/AndroidRuntime({pid:5d}): FATAL EXCEPTION: {thread}",
+        f"12-24 {ts}.101 E/AndroidRuntime({pid:5d}): Process: com.test.app, PID: {pid}",
+        f"12-24 {ts}.102 E/AndroidRuntime({pid:5d}): java.lang.IllegalStateException: View@{obj_id} not attached",
+        f"12-24 {ts}.103 E/AndroidRuntime({pid:5d}): \tat com.test.app.Player$1.run(Player.java:{line_no})",
+        f"12-24 {ts}.104 E/AndroidRuntime({pid:5d}): \tat android.os.Handler.dispatchMessage(Handler.java:106)",
+        f"12-24 {ts}.105 E/AndroidRuntime({pid:5d}): Caused by: java.lang.NullPointerException: null",
+        f"12-24 {ts}.106 E/AndroidRuntime({pid:5d}): \tat com.test.app.Player.load(Player.java:88)",
+        f"12-24 {ts}.107 E/AndroidRuntime({pid:5d}): \t... 12 more",
+    ]
+
+
+def _native_crash(ts, addr, func):
+    return [
+        f"12-24 {ts}.000 F/libc    ( 4321): Fatal signal 11 (SIGSEGV), code 1, fault addr 0x{addr} in tid 4330 (RenderThread)",
+        f"12-24 {ts}.500 F/DEBUG   ( 5555): backtrace:",
+        f"12-24 {ts}.501 F/DEBUG   ( 5555):       #00 pc 00000000000{addr}  /vendor/lib64/libgpu.so ({func}+164)",
+        f"12-24 {ts}.502 F/DEBUG   ( 5555):       #01 pc 0000000000045678  /system/lib64/libhwui.so (draw+20) (BuildId: 1f)",
+    ]
+
+
+class TestCrashIndex:
+
+    def test_normalized_signatures(self, tmp_path):
+        lines = (_java_crash(1234, "10:00:01", "1a2b", 42)
+                 + ["12-24 10:00:02.000 E/SurfaceFlinger(  321): unrelated"]
+                 + _java_crash(2345, "10:05:00", "9f9f", 57, thread="Thread-12")
+                 + _native_crash("10:06:00", "8a10", "glDraw")
+                 + _native_crash("10:07:00", "9b20", "glDraw")
+                 + _native_crash("10:08:00", "9b20", "glFlush"))
+        (tmp_path / "crash_stack.log").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+        analyzer = LogDirectoryAnalyzer(str(tmp_path))
+        assert analyzer.parse()
+        index = analyzer.crashes
+
+        assert index.total == 5
+        assert len(index.signatures) == 3
+        java = index.top(1)[0]
+        assert java.kind == "JAVA_CRASH"
+        assert java.count == 2
+        assert java.title == "java.lang.IllegalStateException @ at com.test.app.Player$.run(Player.java)"
+        # 没有 event.log 时 logcat 按今年算，这里只比较月日时分秒
+        assert (java.first_time[5:], java.last_time[5:]) == ("12-24 10:00:01", "12-24 10:05:00")
+        assert java.example[0] == "FATAL EXCEPTION: main"
+        assert "Caused by: java.lang.NullPointerException" in index.normalize_java(java.example)
+
+        native = sorted((s for s in index.signatures.values() if s.kind == "NATIVE_CRASH"), key=lambda s: -s.count)
+        assert [s.count for s in native] == [2, 1]
+        assert native[0].title == "SIGSEGV @ /vendor/lib64/libgpu.so (glDraw)"
+
+        out = tmp_path / "crashes.json"
+        analyzer.export_crashes_json(str(out))
+        assert [c["count"] for c in json.loads(out.read_text(encoding="utf-8"))] == [2, 2, 1]
+
+    def test_interleaved_processes(self):
+        """不同进程的堆栈行交错出现时，按 PID 分开拼"""
+        index = CrashIndex()
+        index.feed("AndroidRuntime", "1", "FATAL EXCEPTION: main", "t1", 1)
+        index.feed("AndroidRuntime", "2", "FATAL EXCEPTION: main", "t2", 2)
+        index.feed("AndroidRuntime", "1", "java.lang.RuntimeException: a")
+        index.feed("AndroidRuntime", "2", "java.lang.OutOfMemoryError: b")
+        index.feed("AndroidRuntime", "1", "\tat a.B.c(B.java:1)")
+        index.feed("AndroidRuntime", "3", "\tat orphan.Line(X.java:1)")
+        index.close()
+
+        titles = sorted(s.title for s in index.signatures.values())
+        assert titles == ["java.lang.OutOfMemoryError", "java.lang.RuntimeException @ at a.B.c(B.java)"]
+
+    def test_memory_bounded_by_signatures(self):
+        index = CrashIndex()
+        for i in range(20000):
+            index.feed("AndroidRuntime", str(i), "FATAL EXCEPTION: main", f"t{i}", i)
+            index.feed("AndroidRuntime", str(i), f"java.lang.IllegalStateException: id={i}")
+            index.feed("AndroidRuntime", str(i), f"\tat com.x.Y.z(Y.java:{i % 300})")
+        index.close()
+
+        assert index.total == 20000
+        assert len(index.signatures) == 1
+        sig = index.top(1)[0]
+        assert (sig.first_epoch, sig.last_epoch) == (0, 19999)
+        assert len(index._pending) == 0
@@ -0,0 +1,65 @@
+import pytest
+
+from src.deployer import ScriptDeployer
+from tests.fake_adb import install_fake_adb, adb_calls
+
+
+@pytest.fixture
+def device(tmp_path, monkeypatch):
+    base = tmp_path / "adb"
+    monkeypatch.setenv("FAKE_ADB_BASE", str(base))
+    adb = install_fake_adb(base)
+    remote = base / "default" / "sdcard" / "dognoise_stress"
+    remote.mkdir(parents=True)
+    (remote / "event.log").write_text("[2025-12-24 10:00:00] old run\n")
+    script = tmp_path / "stress_core.sh"
+    script.write_text("echo v1\n")
+    return base, adb, remote, script
+
+
+def _pushes(base):
+    return [c for c in adb_calls(base) if c.split()[1:2] == ["push"]]
+
+
+class TestScriptDeployer:
+
+    def test_skip_push_when_unchanged(self, device):
+        base, adb, _, script = device
+        deployer = ScriptDeployer(adb)
+
+        assert deployer.deploy(str(script), wipe="keep")["pushed"]
+        assert not deployer.deploy(str(script), wipe="keep")["pushed"]
+        assert len(_pushes(base)) == 1
+
+        script.write_text("echo v2\n")
+        assert deployer.deploy(str(script), wipe="keep")["pushed"]
+        assert (base / "default" / "data" / "local" / "tmp" / "stress_core.sh").read_text() == "echo v2\n"
+
+    def test_missing_remote_script_is_repushed(self, device):
+        base, adb, _, script = device
+        deployer = ScriptDeployer(adb)
+        deployer.deploy(str(script), wipe="keep")
+        (base / "default" / "data" / "local" / "tmp" / "stress_core.sh").unlink()
+        assert deployer.deploy(str(script), wipe="keep")["pushed"]
+
+    def test_wipe_modes(self, device):
+        base, adb, remote, script = device
+        deployer = ScriptDeployer(adb)
+
+        deployer.deploy(str(script), wipe="keep")
+        assert (remote / "event.log").exists()
+        assert not any("logcat -c" in c for c in adb_calls(base))
+
+        deployer.deploy(str(script), wipe="archive")
+        archived = [p for p in remote.parent.iterdir() if p.name.startswith("dognoise_stress_")]
+        assert len(archived) == 1
+        assert (archived[0] / "event.log").read_text() == "[2025-12-24 10:00:00] old run\n"
+        assert any("logcat -c" in c for c in adb_calls(base))
+
+        remote.mkdir()
+        (remote / "event.log").write_text("x\n")
+        deployer.deploy(str(script), wipe="delete")
+        assert list(remote.iterdir()) == []
+
+        with pytest.raises(ValueError):
+            deployer.wipe_logs("rm")
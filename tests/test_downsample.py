@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from src.downsample import downsample, lttb, minmax
+
+
+@pytest.fixture
+def spiky():
+    x = np.arange(10000, dtype=np.int64)
+    y = np.full(10000, 200, dtype=np.int32)
+    y[1234] = 900   # 内存尖峰
+    y[7777] = 5     # 低谷
+    return x, y
+
+
+class TestDownsample:
+
+    def test_minmax_keeps_peaks(self, spiky):
+        x, y = spiky
+        tx, ty = minmax(x, y, 500)
+        assert len(tx) <= 500
+        assert 900 in ty and 5 in ty
+        assert np.all(np.diff(tx) > 0)
+
+    def test_lttb_budget_and_endpoints(self, spiky):
+        x, y = spiky
+        tx, ty = lttb(x, y, 300)
+        assert len(tx) == 300
+        assert tx[0] == 0 and tx[-1] == 9999
+        assert 900 in ty
+        assert np.all(np.diff(tx) > 0)
+
+    def test_small_or_full_resolution(self, spiky):
+        x, y = spiky
+        assert len(downsample(x[:100], y[:100], 500)[0]) == 100
+        assert len(downsample(x, y, None)[0]) == 10000
+        with pytest.raises(ValueError):
+            downsample(x, y, 100, method="avg")
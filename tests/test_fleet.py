@@ -0,0 +1,132 @@
+import os
+import time
+
+import pytest
+
+from src.fleet import FleetOrchestrator, list_devices
+from tests.fake_adb import install_fake_adb
+
+SERIALS = ["dev-a", "dev-b", "dev-c"]
+
+# 假的压测脚本: 写锁文件后常驻 ($FAKE_DEVICE 由 fake adb 注入)
+FAKE_SCRIPT = """
+mkdir -p "$FAKE_DEVICE/sdcard/dognoise_stress"
+echo "[2025-12-24 10:00:00] === 压测开始: com.test.app ===" > "$FAKE_DEVICE/sdcard/dognoise_stress/event.log"
+echo $$ > "$FAKE_DEVICE/data/local/tmp/dognoise.lock"
+exec sleep 30
+"""
+
+
+@pytest.fixture
+def fake_adb(tmp_path, monkeypatch):
+    base = tmp_path / "adb"
+    monkeypatch.setenv("FAKE_ADB_BASE", str(base))
+    return base, install_fake_adb(base, serials=SERIALS)
+
+
+def _running_adb(base, serial):
+    """还活着的 fake adb 进程 (命令行里带 base 路径和 serial)"""
+    found = []
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                args = f.read().decode(errors="ignore").split("\0")
+            with open(f"/proc/{pid}/stat") as f:
+                zombie = f.read().rsplit(")", 1)[1].split()[0] == "Z"
+        except OSError:
+            continue
+        if not zombie and str(base / "adb") in args and serial in args:
+            found.append(args)
+    return found
+
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / "stress_core.sh"
+    path.write_text(FAKE_SCRIPT)
+    return str(path)
+
+
+class TestFleetOrchestrator:
+
+    def test_list_devices(self, fake_adb):
+        _, adb = fake_adb
+        assert list_devices(adb) == SERIALS
+
+    def test_start_status_pull_stop(self, fake_adb, script, tmp_path):
+        base, adb = fake_adb
+        fleet = FleetOrchestrator(SERIALS, adb=adb, parallel=2, timeout=30)
+
+        results = fleet.start(script)
+        assert all(r.ok for r in results), fleet.format_summary(results)
+        assert (base / "dev-b" / "data" / "local" / "tmp" / "stress_core.sh").exists()
+
+        try:
+            assert all(r.ok for r in fleet.status())
+
+            results = fleet.pull(str(tmp_path / "logs"))
+            assert all(r.ok for r in results)
+            assert (tmp_path / "logs" / "dev-c" / "event.log").exists()
+        finally:
+            assert all(r.ok for r in fleet.stop())
+
+        # 停止后再查状态应该全部失败
+        assert not any(r.ok for r in fleet.status())
+
+    def test_offline_device_times_out(self, fake_adb, script):
+        """一台设备卡在 wait-for-device 不能拖住其他设备"""
+        base, adb = fake_adb
+        (base / "offline_dev-b").touch()
+        fleet = FleetOrchestrator(SERIALS, adb=adb, parallel=3, timeout=3)
+
+        results = {r.serial: r for r in fleet.start(script)}
+        try:
+            assert results["dev-a"].ok and results["dev-c"].ok
+            assert not results["dev-b"].ok
+            assert results["dev-b"].stage == "wait"
+            assert "超时" in results["dev-b"].detail
+
+            summary = fleet.format_summary(list(results.values()))
+            assert "成功 2 / 3" in summary
+        finally:
+            fleet.stop()
+
+    @pytest.mark.parametrize("command, action", [("push", "start"), ("shell", "pull")])
+    def test_stuck_adb_is_killed_on_timeout(self, fake_adb, script, tmp_path, command, action):
+        """push / pull 卡住时单台超时也要生效，而且不能把 adb 子进程留在后台"""
+        base, adb = fake_adb
+        (base / f"hang_dev-b_{command}").touch()
+        for serial in SERIALS:
+            remote = base / serial / "sdcard" / "dognoise_stress"
+            remote.mkdir(parents=True)
+            (remote / "event.log").write_text("[2025-12-24 10:00:00] start\n")
+        fleet = FleetOrchestrator(SERIALS, adb=adb, parallel=3, timeout=3)
+
+        t0 = time.monotonic()
+        if action == "start":
+            results = {r.serial: r for r in fleet.start(script, wipe="keep")}
+        else:
+            results = {r.serial: r for r in fleet.pull(str(tmp_path / "logs"))}
+        try:
+            assert time.monotonic() - t0 < 15
+            assert results["dev-a"].ok and results["dev-c"].ok
+            assert results["dev-b"].stage == ("push" if action == "start" else "pull")
+            assert "超时" in results["dev-b"].detail
+            assert _running_adb(base, "dev-b") == []
+        finally:
+            if action == "start":
+                fleet.stop()
+
+    def test_unexpected_error_stays_on_its_device(self, fake_adb, monkeypatch):
+        _, adb = fake_adb
+        fleet = FleetOrchestrator(SERIALS, adb=adb, parallel=3, timeout=30)
+
+        async def broken_check(serial):
+            if serial == "dev-b":
+                raise ValueError("bad lock file")
+            return "42"
+        monkeypatch.setattr(fleet, "_check_alive", broken_check)
+
+        results = {r.serial: r for r in fleet.status()}
+        assert results["dev-a"].ok and results["dev-c"].ok
+        assert not results["dev-b"].ok and results["dev-b"].detail == "bad lock file"
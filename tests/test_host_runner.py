@@ -0,0 +1,116 @@
+import os
+import re
+
+import pytest
+
+from src.host_runner import AdbShellSession, HostRunner
+from src.models import ProjectConfig, TaskModel, PlanModel, ProjectModel
+from tests.fake_adb import install_fake_adb, adb_calls
+
+
+@pytest.fixture
+def fake_adb(tmp_path, monkeypatch):
+    base = tmp_path / "adb"
+    monkeypatch.setenv("FAKE_ADB_BASE", str(base))
+    return base, install_fake_adb(base)
+
+
+@pytest.fixture
+def project():
+    return ProjectModel(
+        config=ProjectConfig(target_pkg="com.test.app", start_activity="com.test.app/.MainActivity"),
+        plans=[
+            PlanModel(name="Login", loop_count=2, tasks=[
+                TaskModel(action="CLICK", p1="100", p2="200"),
+                TaskModel(action="KEY", p1="4", repeat=2),
+            ]),
+        ],
+    )
+
+
+class TestAdbShellSession:
+
+    def test_run_keeps_state_and_exit_code(self, fake_adb):
+        """同一个会话里变量要保留，退出码要正确回传"""
+        base, adb = fake_adb
+        session = AdbShellSession(adb)
+        session.start()
+        try:
+            assert session.run("FOO=bar") == (0, "")
+            assert session.run("echo $FOO") == (0, "bar")
+            code, _ = session.run("false")
+            assert code == 1
+        finally:
+            session.close()
+
+        assert len(adb_calls(base)) == 1
+
+    def test_timeout(self, fake_adb):
+        _, adb = fake_adb
+        session = AdbShellSession(adb)
+        session.start()
+        try:
+            with pytest.raises(RuntimeError):
+                session.run("sleep 1", timeout=0.2)
+            # 超时命令迟到的结束标记不能串到下一条命令里
+            assert session.run("echo ok", timeout=5) == (0, "ok")
+        finally:
+            session.close()
+
+
+class TestHostRunner:
+
+    def test_run_plan_over_single_session(self, fake_adb, project, tmp_path):
+        """完整跑一遍：动作下发到手机，监控与日志都在电脑端"""
+        base, adb = fake_adb
+        log_dir = tmp_path / "logs"
+        runner = HostRunner(project, str(log_dir), adb=adb, check_interval=0)
+
+        assert runner.run(duration_sec=1)
+
+        # 整个运行期间只有一个 adb 进程
+        assert len(adb_calls(base)) == 1
+
+        calls = (base / "default" / "calls.log").read_text()
+        assert calls.count("input tap 100 200") >= 2
+        assert calls.count("input keyevent 4") >= 4
+
+        log = (log_dir / "event.log").read_text(encoding="utf-8")
+        assert "=== 压测开始: com.test.app ===" in log
+        assert re.search(r"\[STEP\]\[#1\] 1\.1 CLICK 点击: 100, 200 \| Start:\d+ \| End:\d+", log)
+        assert "[STEP][#2] 1.2 KEY 按键: 4 |" in log and "[STEP][#3] 1.2 KEY 按键: 4 |" in log
+
+        # 日志格式和模板一致，分析器能直接统计步骤耗时
+        from analyze_log import StressLogAnalyzer
+        analyzer = StressLogAnalyzer(str(log_dir / "event.log"))
+        assert analyzer.parse()
+        stats = analyzer.data["step_stats"]
+        assert analyzer.data["total_actions"] == len(stats) >= 3
+        assert set(stats.by_type) == {"CLICK", "KEY"}
+        assert "[STATUS] Mem:200MB | CPU:" in log
+        assert "[NETWORK] Ping:12.3ms" in log
+
+    def test_identical_sheets_keep_their_own_index(self, fake_adb, tmp_path):
+        """两个内容一样的 Sheet (pydantic 按字段比较相等) 也要按位置编号，和编译器一致"""
+        _, adb = fake_adb
+        sheet = PlanModel(name="Same", loop_count=1, tasks=[TaskModel(action="CLICK", p1="1", p2="2")])
+        project = ProjectModel(config=ProjectConfig(target_pkg="com.test.app"), plans=[sheet, sheet.model_copy()])
+        log_dir = tmp_path / "logs"
+        assert HostRunner(project, str(log_dir), adb=adb, check_interval=0).run(duration_sec=1)
+
+        log = (log_dir / "event.log").read_text(encoding="utf-8")
+        assert "] 1.1 CLICK" in log and "] 2.1 CLICK" in log
+
+    def test_anr_recovery(self, fake_adb, project, tmp_path):
+        base, adb = fake_adb
+        (base / "default" / "events.txt").write_text("I am_anr: [0,4321,com.test.app,0,Input dispatching]\n")
+        log_dir = tmp_path / "logs"
+        runner = HostRunner(project, str(log_dir), adb=adb, check_interval=0)
+
+        assert runner.run(duration_sec=1)
+
+        log = (log_dir / "event.log").read_text(encoding="utf-8")
+        assert "!!![ANR_DETECTED]!!!" in log
+        assert "[RECOVERY] ANR | Latency:" in log and "Result:OK" in log
+        calls = (base / "default" / "calls.log").read_text()
+        assert "am start -W -n com.test.app/.MainActivity" in calls
@@ -0,0 +1,88 @@
+import base64
+
+import numpy as np
+import pytest
+
+from analyze_log import StressLogAnalyzer
+from src.html_report import HtmlReportWriter
+from src.series import TimeSeries
+from tests.test_analyze_log import SAMPLE_LOG
+
+
+def _decode(head, dt_b64, v_b64):
+    """和 minichart.js 的 decode 一样的解码逻辑"""
+    dtype = {"f4": "<f4", "i2": "<i2", "i4": "<i4"}[head["vt"]]
+    values = np.frombuffer(base64.b64decode(v_b64), dtype=dtype)
+    deltas = np.frombuffer(base64.b64decode(dt_b64), dtype="<i4")
+    return head["t0"] + np.concatenate([[0], np.cumsum(deltas)]), values
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    path = tmp_path / "event.log"
+    path.write_text(SAMPLE_LOG, encoding="utf-8")
+    a = StressLogAnalyzer(str(path))
+    a.parse()
+    return a
+
+
+class TestHtmlReportWriter:
+    @pytest.mark.parametrize("dtype", ["float32", "int16", "int32", "float64"])
+    def test_pack_roundtrip(self, dtype):
+        epochs = np.array([1700000000, 1700000005, 1700000005, 1700003605], dtype=np.int64)
+        values = np.array([1.5, -2, 300, 7], dtype=dtype)
+        head, deltas, packed = HtmlReportWriter.pack_arrays(epochs, values)
+
+        t, v = _decode(head, base64.b64encode(deltas.tobytes()), base64.b64encode(packed.tobytes()))
+        assert head["n"] == 4
+        assert t.tolist() == epochs.tolist()
+        assert v.astype(np.float64).tolist() == values.astype(np.float32).astype(np.float64).tolist()
+
+    def test_chunked_b64_matches_whole(self, tmp_path):
+        """分块 base64 拼起来必须和整体编码一致"""
+        arr = np.arange(100001, dtype="<i4")
+        writer = HtmlReportWriter(None)
+        writer.B64_CHUNK = 3 * 7
+        out = tmp_path / "b64.txt"
+        with open(out, "w") as f:
+            writer._write_b64(f, arr)
+        assert out.read_text() == base64.b64encode(arr.tobytes()).decode("ascii")
+
+    def test_standalone_report_is_offline(self, analyzer, tmp_path):
+        out = tmp_path / "report.html"
+        analyzer.generate_html(str(out))
+        html = out.read_text(encoding="utf-8")
+        assert "cdn" not in html and "<script src=" not in html
+        assert html.count("global.MiniChart") == 1
+        assert 'D.mem=MiniChart.decode({"n": 2' in html
+        # 步骤耗时曲线有数据也有图
+        assert "D.step=MiniChart.decode(" in html and "data: D.step" in html
+        assert f"<strong>{analyzer.data['target_pkg']}</strong>" in html
+
+    def test_escapes_error_names(self, analyzer, tmp_path):
+        analyzer.data["errors"]["<img onerror=x>"] = 1
+        out = tmp_path / "report.html"
+        analyzer.generate_html(str(out))
+        assert "&lt;img onerror=x&gt;" in out.read_text(encoding="utf-8")
+
+    def test_empty_series(self, tmp_path):
+        a = StressLogAnalyzer(str(tmp_path / "none.log"))
+        out = tmp_path / "report.html"
+        a.generate_html(str(out))
+        assert 'D.net=MiniChart.decode({"n": 0, "t0": 0, "vt": "f4","dt":"","v":""})' in out.read_text(encoding="utf-8")
+
+    def test_smaller_than_echarts(self, analyzer, tmp_path):
+        """全分辨率下二进制打包的数据部分远小于 ECharts 文本数组"""
+        n = 50000
+        epochs = 1700000000 + np.arange(n, dtype=np.int64) * 2
+        analyzer.data["mem_records"] = TimeSeries.from_arrays(epochs, np.random.randint(100, 4000, n), "int32")
+        analyzer.data["cpu_records"] = TimeSeries.from_arrays(epochs, np.random.rand(n) * 100, "float32")
+
+        packed, text = tmp_path / "a.html", tmp_path / "b.html"
+        analyzer.generate_html(str(packed), max_points=None)
+        analyzer.generate_html(str(text), max_points=None, mode="echarts")
+        assert packed.stat().st_size < text.stat().st_size / 2
+
+    def test_unknown_mode(self, analyzer, tmp_path):
+        with pytest.raises(ValueError):
+            analyzer.generate_html(str(tmp_path / "x.html"), mode="pdf")
@@ -0,0 +1,88 @@
+import tarfile
+
+import pytest
+
+from src.log_exporter import LogExporter
+from tests.fake_adb import install_fake_adb, adb_calls
+
+
+@pytest.fixture
+def device(tmp_path, monkeypatch):
+    base = tmp_path / "adb"
+    monkeypatch.setenv("FAKE_ADB_BASE", str(base))
+    adb = install_fake_adb(base)
+    remote = base / "default" / "sdcard" / "dognoise_stress"
+    (remote / "screenshots").mkdir(parents=True)
+    (remote / "event.log").write_text("[2025-12-24 10:00:00] start\n")
+    (remote / "screenshots" / "ANR_1.png").write_bytes(b"\x89PNG" + bytes(range(256)))
+    (remote / "crash_stack.log.1").write_text("E/AndroidRuntime: FATAL EXCEPTION\n")
+    return base, adb, remote
+
+
+class TestLogExporter:
+
+    def test_export_single_stream(self, device, tmp_path):
+        base, adb, remote = device
+        dest = tmp_path / "out"
+
+        summary = LogExporter(adb).export(str(dest))
+
+        assert summary["files"] == 3
+        assert (dest / "screenshots" / "ANR_1.png").read_bytes() == (remote / "screenshots" / "ANR_1.png").read_bytes()
+        assert (dest / "event.log").read_text() == "[2025-12-24 10:00:00] start\n"
+        # 没有走逐个文件的 adb pull
+        assert not any(" pull " in f" {c} " for c in adb_calls(base))
+
+    def test_second_export_skips_unchanged(self, device, tmp_path):
+        _, adb, remote = device
+        dest = tmp_path / "out"
+        exporter = LogExporter(adb)
+        exporter.export(str(dest))
+
+        with open(remote / "event.log", "a") as f:
+            f.write("[2025-12-24 10:01:00] more\n")
+        # 大小相同但内容不同的文件也要重新传
+        (remote / "crash_stack.log.1").write_text("E/AndroidRuntime: FATAL EXCEPTIOX\n")
+
+        summary = exporter.export(str(dest))
+        assert summary["files"] == 2
+        assert summary["skipped"] == 1
+        assert "more" in (dest / "event.log").read_text()
+        assert "EXCEPTIOX" in (dest / "crash_stack.log.1").read_text()
+
+        assert exporter.export(str(dest))["files"] == 0
+
+    def test_keep_archive(self, device, tmp_path):
+        _, adb, _ = device
+        summary = LogExporter(adb).export(str(tmp_path / "out"), keep_archive=True)
+        with tarfile.open(summary["archive"], "r:gz") as tar:
+            names = {n.lstrip("./") for n in tar.getnames()}
+        assert names == {"event.log", "screenshots/ANR_1.png", "crash_stack.log.1"}
+
+    def test_keep_archive_skips_on_next_export(self, device, tmp_path):
+        _, adb, remote = device
+        dest = tmp_path / "out"
+        exporter = LogExporter(adb)
+        exporter.export(str(dest), keep_archive=True)
+        assert exporter.export(str(dest), keep_archive=True)["files"] == 0
+
+        (remote / "event.log").write_text("[2025-12-24 10:00:00] tart\n")  # 同大小不同内容
+        summary = exporter.export(str(dest), keep_archive=True)
+        assert (summary["files"], summary["skipped"]) == (1, 2)
+        assert len(list(dest.glob("logs_*.tar.gz"))) == 2
+        assert exporter.export(str(dest))["files"] == 0
+
+    def test_extract_without_tar_filter(self, device, tmp_path, monkeypatch):
+        """老的 Python 没有 tarfile 的 filter 参数"""
+        _, adb, _ = device
+        monkeypatch.delattr(tarfile, "data_filter")
+        original = tarfile.TarFile.extract
+
+        def extract(self, member, path="", set_attrs=True, *, numeric_owner=False, **kwargs):
+            assert "filter" not in kwargs
+            return original(self, member, path, set_attrs, numeric_owner=numeric_owner)
+        monkeypatch.setattr(tarfile.TarFile, "extract", extract)
+
+        summary = LogExporter(adb).export(str(tmp_path / "out"))
+        assert summary["files"] == 3
+        assert (tmp_path / "out" / "screenshots" / "ANR_1.png").exists()
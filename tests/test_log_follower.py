@@ -0,0 +1,90 @@
+import pytest
+
+from analyze_log import StressLogAnalyzer
+from src.log_follower import LogFollower
+from tests.fake_adb import install_fake_adb, adb_calls
+
+
+@pytest.fixture
+def device(tmp_path, monkeypatch):
+    base = tmp_path / "adb"
+    monkeypatch.setenv("FAKE_ADB_BASE", str(base))
+    adb = install_fake_adb(base)
+    remote = base / "default" / "sdcard" / "dognoise_stress"
+    remote.mkdir(parents=True)
+    return adb, remote
+
+
+def _append(path, text):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+class TestLogFollower:
+
+    def test_only_new_bytes_are_pulled(self, device, tmp_path):
+        adb, remote = device
+        local = tmp_path / "local"
+        first = "[2025-12-24 10:00:00] [STATUS] Mem:100MB\n[2025-12-24 10:01:00] [STA"
+        _append(remote / "event.log", first)
+
+        analyzer = StressLogAnalyzer(str(local / "event.log"))
+        follower = LogFollower(str(local), adb=adb, on_data=lambda n, c: n == "event.log" and analyzer.feed(c))
+
+        assert follower.poll_once()["event.log"] == len(first)
+        # 半行不解析，等下次补齐
+        assert analyzer.data["mem_records"].values.tolist() == [100]
+
+        _append(remote / "event.log", "TUS] Mem:150MB\n")
+        assert follower.poll_once()["event.log"] == 15
+        assert follower.poll_once()["event.log"] == 0
+        assert analyzer.data["mem_records"].values.tolist() == [100, 150]
+
+        assert (local / "event.log").read_bytes() == (remote / "event.log").read_bytes()
+
+    def test_offsets_survive_restart(self, device, tmp_path):
+        adb, remote = device
+        local = tmp_path / "local"
+        _append(remote / "anr_history.log", "anr 1\n")
+        LogFollower(str(local), adb=adb).poll_once()
+
+        _append(remote / "anr_history.log", "anr 2\n")
+        # 新进程重新创建 follower，应该从保存的偏移量继续
+        assert LogFollower(str(local), adb=adb).poll_once()["anr_history.log"] == 6
+        assert (local / "anr_history.log").read_text() == "anr 1\nanr 2\n"
+
+    def test_rotation_keeps_tail_of_old_file(self, device, tmp_path):
+        """logcat -r 轮转: crash_stack.log -> crash_stack.log.1，旧文件没拉完的尾巴不能丢"""
+        adb, remote = device
+        local = tmp_path / "local"
+        follower = LogFollower(str(local), adb=adb)
+
+        _append(remote / "crash_stack.log", "A\n")
+        follower.poll_once()
+        _append(remote / "crash_stack.log", "B\n")
+        (remote / "crash_stack.log").rename(remote / "crash_stack.log.1")
+        _append(remote / "crash_stack.log", "C\n")
+
+        assert follower.poll_once()["crash_stack.log"] == 4
+        assert (local / "crash_stack.log").read_text() == "A\nB\nC\n"
+
+    def test_interrupt_mid_poll_keeps_offsets(self, device, tmp_path):
+        """Ctrl+C 发生在拉第二个文件时，第一个文件的偏移量也要保存，重启后不重复追加"""
+        adb, remote = device
+        local = tmp_path / "local"
+        _append(remote / "event.log", "[2025-12-24 10:00:00] [STATUS] Mem:100MB\n")
+        _append(remote / "crash_stack.log", "A\n")
+        fed = []
+
+        def on_data(name, chunk):
+            fed.append(name)
+            if name == "crash_stack.log":
+                raise KeyboardInterrupt
+        LogFollower(str(local), adb=adb, on_data=on_data).follow(interval=0, max_polls=1)
+        assert fed == ["event.log", "crash_stack.log"]
+
+        follower = LogFollower(str(local), adb=adb, on_data=lambda n, c: fed.append(n))
+        assert follower.poll_once() == {"event.log": 0, "crash_stack.log": 0}
+        assert fed == ["event.log", "crash_stack.log"]
+        assert (local / "event.log").read_bytes() == (remote / "event.log").read_bytes()
+        assert (local / "crash_stack.log").read_text() == "A\n"
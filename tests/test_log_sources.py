@@ -0,0 +1,77 @@
+from analyze_log import LogDirectoryAnalyzer
+from src.analysis_cache import AnalysisCache
+from src.log_sources import LogcatSource, rotated_paths
+from src.series import parse_epoch
+from tests.test_analyze_log import SAMPLE_LOG
+
+
+def _write(path, lines):
+    path.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+
+
+class TestLogSources:
+
+    def test_rotated_paths_oldest_first(self, tmp_path):
+        for name in ("crash_stack.log", "crash_stack.log.1", "crash_stack.log.2", "crash_stack.log.10",
+                     "crash_stack.log.bak", "event.log"):
+            (tmp_path / name).write_text("")
+        names = [p.rsplit("/", 1)[-1] for p in rotated_paths(str(tmp_path), "crash_stack.log")]
+        assert names == ["crash_stack.log.10", "crash_stack.log.2", "crash_stack.log.1", "crash_stack.log"]
+        assert rotated_paths(str(tmp_path / "missing"), "crash_stack.log") == []
+
+    def test_logcat_events_and_year_rollover(self, tmp_path):
+        path = tmp_path / "crash_stack.log"
+        _write(path, [
+            "--------- beginning of crash",
+            "12-31 23:59:58.120 E/AndroidRuntime( 1234): FATAL EXCEPTION: main",
+            "12-31 23:59:58.121 E/AndroidRuntime( 1234): java.lang.NullPointerException",
+            "01-01 00:00:05.000 E/SurfaceFlinger(  321): dequeueBuffer failed",
+            "01-01 00:00:07.500 F/libc    ( 4321): Fatal signal 11 (SIGSEGV), code 1",
+        ])
+        src = LogcatSource([str(path)], "crash", 2025)
+        events = list(src.events())
+
+        assert [e["type"] for e in events] == ["JAVA_CRASH", "NATIVE_CRASH"]
+        assert events[0]["epoch"] == parse_epoch("2025-12-31 23:59:58")
+        assert events[1]["time"] == "2026-01-01 00:00:07"
+        assert events[1]["epoch"] == parse_epoch("2026-01-01 00:00:07")
+        assert src.lines == 4
+        assert src.tags == {"AndroidRuntime": 1, "SurfaceFlinger": 1}
+
+    def test_directory_merges_by_time(self, tmp_path):
+        (tmp_path / "event.log").write_text(SAMPLE_LOG, encoding="utf-8")
+        _write(tmp_path / "crash_stack.log.1", [
+            "12-24 10:00:30.000 E/AndroidRuntime( 1234): FATAL EXCEPTION: main",
+        ])
+        _write(tmp_path / "crash_stack.log", [
+            "12-24 10:03:30.000 E/ActivityManager(  900): ANR in com.test.app",
+            "12-24 10:03:31.000 E/ActivityManager(  900): Reason: Input dispatching timed out",
+        ])
+        _write(tmp_path / "anr_history.log", [
+            "12-24 10:03:29.000 I/am_anr  (  900): [0,5678,com.test.app,0,Input dispatching timed out]",
+        ])
+
+        analyzer = LogDirectoryAnalyzer(str(tmp_path))
+        assert analyzer.parse(cache=AnalysisCache(str(tmp_path / "cache")))
+
+        epochs = [e["epoch"] for e in analyzer.timeline]
+        assert epochs == sorted(epochs)
+        assert {e["source"] for e in analyzer.timeline} == {"event", "crash", "anr"}
+        assert analyzer.breakdown[("crash", "JAVA_CRASH")] == 1
+        assert analyzer.breakdown[("crash", "ANR")] == 1
+        assert analyzer.breakdown[("anr", "ANR")] == 1
+        event_errors = sum(analyzer.event.data["errors"].values())
+        assert sum(n for (source, _), n in analyzer.breakdown.items() if source == "event") == event_errors
+
+        out = tmp_path / "timeline.csv"
+        analyzer.export_timeline_csv(str(out))
+        rows = out.read_text(encoding="utf-8-sig").splitlines()
+        assert len(rows) == len(analyzer.timeline) + 1
+        assert rows[0].endswith(",last_step")
+
+    def test_directory_without_event_log(self, tmp_path):
+        _write(tmp_path / "crash_stack.log", ["01-02 03:04:05.000 E/AndroidRuntime( 1): FATAL EXCEPTION: main"])
+        analyzer = LogDirectoryAnalyzer(str(tmp_path))
+        assert analyzer.parse()
+        assert [e["type"] for e in analyzer.timeline] == ["JAVA_CRASH"]
+        assert not LogDirectoryAnalyzer(str(tmp_path / "nope")).parse()
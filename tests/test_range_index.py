@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+
+from analyze_log import StressLogAnalyzer
+from src.range_index import RangeIndex
+from src.series import TimeSeries
+from tests.test_analyze_log import BACKWARD_STEP_LOG, SAMPLE_LOG
+
+T0 = 1700000000 - 1700000000 % 3600
+
+
+@pytest.fixture
+def series():
+    # 3 小时，每 5 秒一个点
+    rng = np.random.default_rng(7)
+    epochs = T0 + np.arange(0, 3 * 3600, 5, dtype=np.int64)
+    return TimeSeries.from_arrays(epochs, rng.integers(100, 500, len(epochs)), "int32")
+
+
+def _expected(ts, width):
+    t, v = ts.epochs, ts.values.astype(np.float64)
+    starts = np.unique(t - t % width)
+    groups = [v[(t >= s) & (t < s + width)] for s in starts]
+    return starts, [len(g) for g in groups], [g.mean() for g in groups], [g.min() for g in groups], [g.max() for g in groups]
+
+
+class TestRangeIndex:
+
+    def test_levels_match_direct_aggregation(self, series):
+        index = RangeIndex()
+        index.update({"mem": series})
+        for width in index.levels:
+            b = index.level("mem", width)
+            starts, count, mean, lo, hi = _expected(series, width)
+            assert b.starts.tolist() == starts.tolist()
+            assert b.count.tolist() == count
+            assert np.allclose(b.mean, mean)
+            assert b.min.tolist() == lo and b.max.tolist() == hi
+
+    def test_incremental_updates_match_one_shot(self, series):
+        whole = RangeIndex()
+        whole.update({"mem": series})
+
+        grown = TimeSeries("int32")
+        index = RangeIndex()
+        # 每批 7 个点，批与批之间经常落在同一分钟里
+        for i in range(0, len(series), 7):
+            grown.extend_arrays(series.epochs[i:i + 7], series.values[i:i + 7])
+            index.update({"mem": grown})
+        for width in index.levels:
+            a, b = whole.level("mem", width), index.level("mem", width)
+            assert a.starts.tolist() == b.starts.tolist() and a.count.tolist() == b.count.tolist()
+            assert np.allclose(a.total, b.total) and a.max.tolist() == b.max.tolist()
+
+        # 换成另一条曲线: 从头重建
+        index.update({"mem": TimeSeries.from_arrays([T0], [1], "int32")})
+        assert index.level("mem", 60).count.tolist() == [1]
+
+    def test_query_picks_level_by_budget(self, series):
+        index = RangeIndex()
+        index.update({"mem": series}, [{"epoch": T0 + 10}, {"epoch": T0 + 20}, {"epoch": T0 + 7200}])
+
+        raw = index.query("mem", T0, T0 + 600, max_points=1000)
+        assert raw.level == 0 and len(raw) == 121
+        assert index.query("mem", T0, T0 + 600, max_points=None).level == 0
+
+        minute = index.query("mem", T0 + 90, T0 + 3600, max_points=100)
+        assert minute.level == 60
+        assert minute.epochs[0] == T0 + 60 and minute.epochs[-1] == T0 + 3600
+        assert index.query("mem", max_points=100).level == 600
+        # 哪一层都放不下时退到最粗的一层
+        assert index.query("mem", max_points=2).level == 3600
+
+        errors = index.query(RangeIndex.ERRORS, max_points=10)
+        # 错误只在有错误的桶里计数，稀疏的错误用最细的一层就放得下
+        assert (errors.level, errors.count.tolist()) == (60, [2, 1])
+        with pytest.raises(KeyError):
+            index.query("nope")
+
+    def test_analyzer_builds_index_while_parsing(self, tmp_path):
+        from src.analysis_cache import AnalysisCache
+        path = tmp_path / "event.log"
+        path.write_text(SAMPLE_LOG, encoding="utf-8")
+        analyzer = StressLogAnalyzer(str(path))
+        assert analyzer.parse()
+
+        index = analyzer.range_index
+        assert index.level("mem", 60).max.tolist() == [200, 260]
+        assert index.query(RangeIndex.ERRORS, max_points=None).count.sum() == len(analyzer.data["error_timeline"])
+
+        # 缓存命中后不重新解析，索引照样从曲线建好
+        cache = AnalysisCache(str(tmp_path / "cache"))
+        StressLogAnalyzer(str(path)).parse_cached(cache)
+        cached = StressLogAnalyzer(str(path))
+        assert cached.parse_cached(cache)
+        assert cached.range_index.level("mem", 3600).total.tolist() == [460]
+
+        # 实时追加: 只并入新增的点
+        analyzer.feed("[2025-12-24 10:06:00] [STATUS] Mem:300MB | CPU:1.0% | Temp:30C\n")
+        assert index.level("mem", 600).max.tolist() == [300]
+        assert index.query("mem", max_points=None).mean.tolist() == [200, 260, 300]
+
+    def test_report_embeds_levels_when_downsampled(self, tmp_path, series):
+        analyzer = StressLogAnalyzer(str(tmp_path / "none.log"))
+        analyzer.data["mem_records"] = series
+        out = tmp_path / "report.html"
+        analyzer.generate_html(str(out), max_points=500)
+        html = out.read_text(encoding="utf-8")
+        assert html.count("D.mem.levels=[") == 1 and '"w": 3600' in html
+        assert "D.cpu.levels" not in html
+        assert "errChart" in html
+
+    def test_zoom_after_backward_time(self, tmp_path):
+        path = tmp_path / "event.log"
+        path.write_text(BACKWARD_STEP_LOG, encoding="utf-8")
+        analyzer = StressLogAnalyzer(str(path))
+        assert analyzer.parse()
+        assert not analyzer.data["step_records"].is_sorted
+
+        t0 = analyzer.data["step_records"].epochs.min()  # 10:01:00
+        view = analyzer.range_index.query("step", t0 - 30, t0 + 30)
+        assert (view.level, view.mean.tolist()) == (0, [60])
+        # 不限范围时按时间排好序
+        view = analyzer.range_index.query("step")
+        assert view.mean.tolist() == [60, 40, 50, 70]
+        assert np.all(np.diff(view.epochs) >= 0)
+
+        ts = TimeSeries.from_arrays([5, 3, 9], [1, 2, 3], "int32")
+        assert not ts.is_sorted and ts.between(4, 9)[1].tolist() == [1, 3]
+        assert TimeSeries.from_arrays([1, 2], [0, 0]).is_sorted
@@ -0,0 +1,82 @@
+import pytest
+
+from analyze_log import StressLogAnalyzer, compare_with_previous, record_run
+from src.run_store import RunStore
+from tests.test_analyze_log import SAMPLE_LOG
+
+DEVICE_LINE = "[2025-12-24 10:00:00] [DEVICE] Model:Pixel 6 | Serial:abc123 | Android:14 | Build:UQ1A | App:{app}\n"
+
+
+def make_run(tmp_path, name, day, app="1.0", mem=200):
+    """同一份样例日志，改日期 (指纹不同) / App 版本 / 内存值，模拟不同的场次"""
+    lines = SAMPLE_LOG.replace("2025-12-24", day).replace("Mem:200MB", f"Mem:{mem}MB").split("\n", 1)
+    text = lines[0] + "\n" + DEVICE_LINE.replace("2025-12-24", day).format(app=app) + lines[1]
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    analyzer = StressLogAnalyzer(str(path))
+    assert analyzer.parse()
+    return analyzer
+
+
+@pytest.fixture
+def store(tmp_path):
+    with RunStore(str(tmp_path / "runs.db")) as s:
+        yield s
+
+
+class TestRunStore:
+
+    def test_save_and_query(self, tmp_path, store):
+        a = make_run(tmp_path, "a.log", "2025-12-24", app="1.0")
+        run_id = store.save_run(a)
+        run = store.get_run(run_id)
+
+        assert run["package"] == "com.test.app"
+        assert (run["device"], run["serial"], run["build"]) == ("Pixel 6", "abc123", "1.0")
+        assert run["summary"]["errors"] == sum(a.data["errors"].values())
+        assert store.metrics(run_id)["mem"]["max"] == 260
+        assert store.sketch(run_id, "mem").count == 2
+        series = store.load_series(run_id, "mem")
+        assert series == a.data["mem_records"]
+
+        # 同一份日志再分析一次: 覆盖，不新增
+        assert store.save_run(a) != run_id
+        assert len(store.list_runs(package="com.test.app")) == 1
+        assert store.get_run(run_id) is None
+        assert store.metrics(run_id) == {}
+
+    def test_history_and_previous(self, tmp_path, store):
+        ids = [store.save_run(make_run(tmp_path, f"{i}.log", f"2025-12-{20 + i}", app=f"1.{i}", mem=200 + i))
+               for i in range(4)]
+
+        history = store.history("com.test.app", "mem", "p50", limit=3)
+        assert [h["id"] for h in history] == ids[:0:-1]
+        assert [h["build"] for h in history] == ["1.3", "1.2", "1.1"]
+        assert store.history("other.pkg") == []
+        assert [r["id"] for r in store.list_runs(build="1.2")] == [ids[2]]
+        assert store.previous_run(ids[2]) == ids[1]
+        assert store.previous_run(ids[0]) is None
+        with pytest.raises(ValueError):
+            store.history("com.test.app", stat="p95; DROP TABLE runs")
+
+    def test_diff_flags_regressions(self, tmp_path, store):
+        base = store.save_run(make_run(tmp_path, "a.log", "2025-12-24", mem=200))
+        same = store.save_run(make_run(tmp_path, "b.log", "2025-12-25", mem=205))
+        worse = store.save_run(make_run(tmp_path, "c.log", "2025-12-26", mem=400))
+
+        assert not any(r["regression"] for r in store.diff(base, same))
+        flagged = {(r["metric"], r["stat"]) for r in store.diff(base, worse) if r["regression"]}
+        assert ("mem", "p50") in flagged
+        assert "❌" in store.format_diff(base, worse)
+        assert "没有指标回归" in store.format_diff(base, same)
+
+    def test_record_and_compare_for_web(self, tmp_path):
+        db = str(tmp_path / "runs.db")
+        first = record_run(make_run(tmp_path, "a.log", "2025-12-24", mem=200), db_path=db)
+        assert compare_with_previous(first, db_path=db) is None
+        assert compare_with_previous(None, db_path=db) is None
+
+        second = record_run(make_run(tmp_path, "b.log", "2025-12-25", mem=400), db_path=db)
+        base, rows = compare_with_previous(second, db_path=db)
+        assert base["id"] == first
+        assert any(r["regression"] for r in rows if r["metric"] == "mem")
@@ -0,0 +1,52 @@
+import numpy as np
+
+from src.series import TimeSeries, format_epoch, parse_epoch
+
+
+class TestTimeSeries:
+
+    def test_append_and_views(self):
+        ts = TimeSeries("int16", capacity=2)
+        base = parse_epoch("2025-12-24 10:00:00")
+        for i in range(5):
+            ts.append(base + i * 60, 30 + i)
+
+        assert len(ts) == 5
+        assert ts.values.dtype == np.int16
+        assert ts.epochs.dtype == np.int64
+        assert ts.values.tolist() == [30, 31, 32, 33, 34]
+        assert ts.last() == (base + 240, 34)
+        assert ts.time_strings()[-1] == "2025-12-24 10:04:00"
+        # 视图不拷贝数据
+        assert np.shares_memory(ts.values, ts._v)
+
+    def test_to_frame(self):
+        ts = TimeSeries("float32")
+        ts.append(parse_epoch("2025-12-24 10:00:00"), 12.5)
+        ts.append(parse_epoch("2025-12-24 10:01:00"), 30.0)
+
+        df = ts.to_frame("CPU(%)")
+        assert list(df.columns) == ["CPU(%)"]
+        assert str(df.index[1]) == "2025-12-24 10:01:00"
+        assert df["CPU(%)"].mean() == 21.25
+
+    def test_state_roundtrip(self):
+        ts = TimeSeries("int32")
+        ts.append(100, 1)
+        ts.append(200, 2)
+        restored = TimeSeries.from_state(ts.to_state())
+        assert restored == ts
+        restored.append(300, 3)
+        assert len(restored) == 3 and len(ts) == 2
+
+    def test_epoch_roundtrip(self):
+        assert format_epoch(parse_epoch("2025-12-24 23:59:59")) == "2025-12-24 23:59:59"
+
+    def test_between(self):
+        ts = TimeSeries("int32")
+        for i in range(10):
+            ts.append(1000 + i * 10, i)
+        t, v = ts.between(1020, 1050)
+        assert t.tolist() == [1020, 1030, 1040, 1050]
+        assert v.tolist() == [2, 3, 4, 5]
+        assert ts.between(end=1005)[1].tolist() == [0]
@@ -0,0 +1,137 @@
+import math
+
+import numpy as np
+import pytest
+
+from analyze_log import StressLogAnalyzer
+from src.sketches import TDigest, WindowedSketch, merge_sketches
+from tests.test_analyze_log import SAMPLE_LOG, STEP_LOG
+
+QS = np.array([0.01, 0.5, 0.95, 0.99])
+
+
+class TestTDigest:
+
+    def test_accuracy_and_bounded_size(self):
+        rng = np.random.default_rng(0)
+        x = rng.lognormal(3, 0.8, 300000)
+        digest = TDigest()
+        for chunk in np.array_split(x, 97):
+            digest.add_many(chunk)
+
+        assert digest.count == len(x)
+        assert len(digest.to_state()["means"]) <= digest.compression // 2 + 2
+        assert digest.quantile(QS) == pytest.approx(np.quantile(x, QS), rel=0.01)
+        assert (digest.min, digest.max) == (x.min(), x.max())
+        assert digest.mean == pytest.approx(x.mean())
+
+    def test_small_inputs_are_exact(self):
+        digest = TDigest()
+        for v in [5, 1, 3, 2, 4]:
+            digest.add(v)
+        assert digest.quantile([0, 0.5, 1]).tolist() == [1, 3, 5]
+        assert math.isnan(TDigest().quantile(0.5))
+        assert math.isnan(TDigest().summary()["p99"])
+
+    def test_merge_matches_single_pass(self):
+        rng = np.random.default_rng(1)
+        parts = [rng.normal(100 * i, 10, 20000) for i in range(4)]
+        merged = TDigest()
+        for part in parts:
+            d = TDigest()
+            d.add_many(part)
+            merged.merge(d)
+        x = np.sort(np.concatenate(parts))
+        assert merged.count == len(x)
+        # 多峰分布的峰之间数据很稀，按排名误差衡量 (估计值在全量数据里的实际分位)
+        ranks = np.searchsorted(x, merged.quantile(QS)) / len(x)
+        assert ranks == pytest.approx(QS, abs=0.005)
+
+    def test_state_roundtrip(self):
+        digest = TDigest(100)
+        digest.add_many(np.arange(1000))
+        restored = TDigest.from_state(digest.to_state())
+        assert restored.summary() == digest.summary()
+
+
+class TestWindowedSketch:
+
+    def test_windows_and_device_merge(self):
+        base = 1766570400  # 整点
+        t = base + np.arange(0, 3 * 3600, 30)
+        a, b = WindowedSketch(), WindowedSketch()
+        a.add_arrays(t, np.full(len(t), 10.0))
+        b.add_arrays(t[:120], np.full(120, 30.0))  # 第二台设备只跑了一小时
+
+        merged = merge_sketches([{"ping": a}, {"ping": b}])["ping"]
+        summary = merged.summary()
+        assert [w["start"] for w in summary["windows"]] == ["2025-12-24 10:00:00", "2025-12-24 11:00:00",
+                                                           "2025-12-24 12:00:00"]
+        assert summary["windows"][0]["count"] == 240
+        assert summary["windows"][0]["max"] == 30.0
+        assert summary["windows"][1]["p99"] == 10.0
+        assert summary["run"]["count"] == len(t) + 120
+        # 输入不被修改
+        assert a.run.count == len(t)
+
+        with pytest.raises(ValueError):
+            WindowedSketch(60).merge(a)
+
+    def test_analyzer_excludes_ping_timeouts(self, tmp_path):
+        path = tmp_path / "event.log"
+        path.write_text(SAMPLE_LOG, encoding="utf-8")
+        analyzer = StressLogAnalyzer(str(path))
+        analyzer.parse()
+
+        sketches = analyzer.build_sketches()
+        net = analyzer.data["net_records"].values
+        assert sketches["ping"].run.count == int((net < 1000).sum())
+        assert sketches["mem"].run.max == analyzer.data["mem_records"].values.max()
+
+    def test_analyzer_sketches_follow_every_parse_path(self, tmp_path, monkeypatch):
+        """串行 / 并行 / 缓存 / 实时追加得到的草图，和按最终曲线一次建出来的一样"""
+        from src.analysis_cache import AnalysisCache
+        path = tmp_path / "event.log"
+        path.write_text(SAMPLE_LOG + STEP_LOG, encoding="utf-8")
+
+        def check(analyzer):
+            for name, sk in analyzer.build_sketches().items():
+                series = analyzer.data[StressLogAnalyzer.SKETCH_METRICS[name][0]]
+                t, v = series.epochs, series.values
+                if name == "ping":
+                    keep = v < StressLogAnalyzer.PING_TIMEOUT_MS
+                    t, v = t[keep], v[keep]
+                ref = WindowedSketch()
+                ref.add_arrays(t, v)
+                assert (sk.run.count, sk.run.min, sk.run.max) == (ref.run.count, ref.run.min, ref.run.max)
+                assert math.isclose(sk.run.total, ref.run.total)
+                assert {k: d.count for k, d in sk.windows.items()} == {k: d.count for k, d in ref.windows.items()}
+
+        serial = StressLogAnalyzer(str(path))
+        serial.parse()
+        check(serial)
+        assert serial.build_sketches()["step"].run.count == 300
+
+        monkeypatch.setattr(StressLogAnalyzer, "PARALLEL_MIN_CHUNK", 1)
+        par = StressLogAnalyzer(str(path))
+        assert par.parse_parallel(workers=3)
+        check(par)
+
+        cache = AnalysisCache(str(tmp_path / "cache"))
+        StressLogAnalyzer(str(path)).parse_cached(cache)
+        cached = StressLogAnalyzer(str(path))
+        assert cache.load(str(path), cached) == "hit"
+        # 草图从缓存读出，不再把曲线重新过一遍
+        added = []
+        monkeypatch.setattr(WindowedSketch, "add_arrays", lambda self, t, v: added.append(len(t)))
+        assert cached.build_sketches()["mem"].run.count == 2
+        assert not any(added)
+        monkeypatch.undo()
+
+        cached.feed("[2025-12-24 11:30:00] [STATUS] Mem:300MB | CPU:1.0% | Temp:30C\n")
+        check(cached)
+        assert cached.build_sketches()["mem"].run.max == 300
+
+        # 曲线被整条换掉时重建
+        cached.data["mem_records"] = serial.data["mem_records"]
+        assert cached.build_sketches()["mem"].run.max == 260
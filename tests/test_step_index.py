@@ -0,0 +1,59 @@
+import numpy as np
+
+from analyze_log import StressLogAnalyzer
+from src.step_index import StepIndex, encode_positions
+from tests.test_analyze_log import SAMPLE_LOG, STEP_LOG
+
+
+def test_encode_positions():
+    assert encode_positions(["1.3", "12.40"]).tolist() == [10003, 120040]
+    assert encode_positions(np.array([b"2.1"])).tolist() == [20001]
+
+
+def test_preceding_respects_window():
+    # 乱序输入会先按时间排好
+    index = StepIndex([100, 110, 105, 300], encode_positions(["1.1", "1.3", "1.2", "2.1"]),
+                      {"1.1": "CLICK", "1.2": "SWIPE", "1.3": "CLICK", "2.1": "TEXT"})
+    idx = index.preceding([50, 110, 320], n=3, window_sec=60)
+    assert idx.tolist() == [[-1, -1, -1], [2, 1, 0], [3, -1, -1]]
+    assert [s["step"] for s in index.context(110, n=2)] == ["1.2", "1.3"]
+    assert index.describe(3)["action"] == "TEXT"
+    assert len(StepIndex([], [], {}).preceding([1, 2]).tolist()) == 2
+
+
+def test_correlate_ranks_actions_by_lift():
+    # 每 10 秒一步，大多是 CLICK；每次 OOM 之前都是一个 SHELL
+    epochs, ids, actions = [], [], {}
+    for i in range(100):
+        step = f"{1 + (i >= 50)}.{i % 50 + 1}"
+        epochs.append(1000 + 10 * i)
+        ids.append(step)
+        actions[step] = "SHELL" if i % 20 == 19 else "CLICK"
+    index = StepIndex(epochs, encode_positions(ids), actions)
+    events = [{"epoch": 1000 + 10 * i + 5, "type": "OOM"} for i in range(19, 100, 20)]
+    events.append({"epoch": 10, "type": "ANR"})
+
+    result = index.correlate(events, n=1, window_sec=30)
+    oom = result["OOM"]
+    assert (oom.errors, oom.matched) == (5, 5)
+    assert oom.actions[0].key == "SHELL" and oom.actions[0].share == 1.0 and oom.actions[0].lift == 20.0
+    assert [s.key for s in oom.sheets] == ["Sheet#2", "Sheet#1"]
+    assert result["ANR"].matched == 0 and result["ANR"].actions == []
+
+
+def test_analyzer_correlates_errors(tmp_path):
+    path = tmp_path / "event.log"
+    oom = "[2025-12-24 10:05:01] [CRITICAL_OOM] 发现严重征兆\n"
+    path.write_text(SAMPLE_LOG + STEP_LOG[:STEP_LOG.index("[2025-12-24 10:05:02]")] + oom, encoding="utf-8")
+    analyzer = StressLogAnalyzer(str(path))
+    assert analyzer.parse()
+
+    d = analyzer.data
+    assert len(d["step_pos_records"]) == 151
+    assert d["step_actions"] == {"1.1": "SWIPE", "2.1": "CLICK"}
+    correlations = analyzer.correlate_errors(n=2, window_sec=60)
+    assert correlations["OOM"].matched == 2
+    assert {a.key for a in correlations["OOM"].actions} == {"SWIPE", "CLICK"}
+    # ANR 在 10:02:00，同一秒的 1.1 SWIPE 也算作它之前的一步
+    anr = correlations["ANR"]
+    assert anr.matched == 1 and [s.key for s in anr.sheets] == ["Sheet#1"]
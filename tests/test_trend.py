@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from src.series import TimeSeries
+from src.trend import TrendTracker, analyze_trend, change_points, fit_slope, window_slopes
+
+BASE = 1766570400
+
+
+def _minutes(hours):
+    return BASE + np.arange(0, int(hours * 3600), 60, dtype=np.int64)
+
+
+class TestTrend:
+
+    def test_fit_slope(self):
+        t = _minutes(2)
+        slope, se = fit_slope(t, 500 + 0.01 * (t - BASE))
+        assert slope == pytest.approx(0.01)
+        assert se == pytest.approx(0, abs=1e-9)
+        assert fit_slope(t[:2], t[:2])[1] == float("inf")
+
+    def test_window_slopes_match_polyfit(self):
+        rng = np.random.default_rng(0)
+        t = _minutes(5)
+        v = rng.normal(0, 5, len(t)) + np.sin((t - BASE) / 3000.0) * 100
+        starts, slopes, counts = window_slopes(t, v, 3600)
+
+        assert counts.tolist() == [60] * 5
+        for i, s in enumerate(starts):
+            mask = (t >= s) & (t < s + 3600)
+            assert slopes[i] == pytest.approx(np.polyfit(t[mask] - BASE, v[mask], 1)[0] * 3600)
+
+    def test_change_points_ignore_drift(self):
+        rng = np.random.default_rng(1)
+        drift = 800 + np.arange(300) * 0.5 + rng.normal(0, 5, 300)
+        assert change_points(drift, min_jump=50) == []
+
+        step = drift.copy()
+        step[120:] += 200
+        assert change_points(step, min_jump=50) == [120]
+
+    def test_leak_with_restart(self):
+        """每小时涨 30MB，中途 ANR 重启掉下去 300MB: 阶跃不抵消上涨，仍判定泄漏"""
+        rng = np.random.default_rng(2)
+        t = _minutes(6)
+        v = 800 + 30 * (t - BASE) / 3600 + rng.normal(0, 10, len(t))
+        v[200:] -= 300
+        report = analyze_trend("mem", t, v.astype(np.int32))
+
+        assert report.verdict == "LEAK"
+        assert report.slope_per_hour == pytest.approx(30, rel=0.15)
+        assert [c.epoch for c in report.change_points] == [int(t[200])]
+        assert report.change_points[0].after < report.change_points[0].before
+
+    def test_stable_and_insufficient(self):
+        rng = np.random.default_rng(3)
+        t = _minutes(4)
+        stable = analyze_trend("cpu", t, (40 + rng.normal(0, 8, len(t))).astype(np.float32))
+        assert stable.verdict == "STABLE"
+        assert stable.change_points == []
+
+        short = analyze_trend("mem", t[:20], np.arange(20, dtype=np.int32) * 100)
+        assert short.verdict == "INSUFFICIENT"
+        assert analyze_trend("temp", t[:0], t[:0]).verdict == "INSUFFICIENT"
+
+    def test_incremental_matches_batch(self):
+        rng = np.random.default_rng(4)
+        t = _minutes(5)
+        v = (700 + 25 * (t - BASE) / 3600 + rng.normal(0, 10, len(t))).astype(np.int32)
+        v[150:] += 150
+
+        series = TimeSeries("int32")
+        tracker = TrendTracker("mem")
+        first_leak = None
+        for i, (ts, val) in enumerate(zip(t, v)):
+            series.append(ts, val)
+            if i % 5 == 0 or i == len(t) - 1:
+                report = tracker.update(series)
+                if report.verdict == "LEAK" and first_leak is None:
+                    first_leak = i
+
+        batch = analyze_trend("mem", t, v)
+        assert report == batch
+        # 远在压测结束之前就能报警
+        assert first_leak is not None and first_leak < len(t) // 2
+
+        # 日志被换掉 (曲线变短) 时从头开始
+        assert tracker.update(TimeSeries("int32")).verdict == "INSUFFICIENT"
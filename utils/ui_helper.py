@@ -36,10 +36,10 @@ def generate_template_excel():
         ], columns=["配置项 (Key)", "配置值 (Value)"])
 
         df_config_plan = pd.DataFrame([
-            ["Login_Test", 1],
-            ["Video_Loop", 100],
-            ["Settings_Check", 50],
-        ], columns=["执行顺序 (Sheet Name)", "本轮循环 (Loop)"])
+            ["Login_Test", 1, ""],
+            ["Video_Loop", 100, 30],
+            ["Settings_Check", 50, ""],
+        ], columns=["执行顺序 (Sheet Name)", "本轮循环 (Loop)", "节奏 (APM)"])
 
         # 写入 Config，分两块区域
         df_config_kv.to_excel(writer, sheet_name='Config', startcol=0, index=False)
@@ -59,7 +59,7 @@ def generate_template_excel():
 
     return output.getvalue()
 
-def package_files_to_zip(shell_content, bat_start, bat_stop, sh_name="stress_core.sh"):
+def package_files_to_zip(shell_content, bat_start, bat_stop, sh_name="stress_core.sh", bat_resume=None):
     """打包 ZIP 的逻辑封装起来"""
     # 写入虚拟内存
     zip_buffer = io.BytesIO()
@@ -70,6 +70,8 @@ def package_files_to_zip(shell_content, bat_start, bat_stop, sh_name="stress_cor
         # 换行符清洗是必须的，换行符转为linux
         zf.writestr("1_一键启动.bat", bat_start.replace('\n', '\r\n').encode('utf-8'))
         zf.writestr("2_停止并导出日志.bat", bat_stop.replace('\n', '\r\n').encode('utf-8'))
+        if bat_resume:
+            zf.writestr("3_断点续跑.bat", bat_resume.replace('\n', '\r\n').encode('utf-8'))
     return zip_buffer.getvalue()
 
 def get_bat_content(sh_filename,remote_log_dir="/sdcard/dognoise_stress"):
@@ -111,6 +113,7 @@ def format_plans_for_ui(project: ProjectModel) :
         plan_data.append({
             "执行阶段": p.name,
             "循环次数": p.loop_count,
+            "节奏 (APM)": p.pace_apm or "不限速",
             "动作数": len(p.tasks),
             "首个动作": first_action
         })
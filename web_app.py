@@ -10,7 +10,7 @@ import time
 
 try:
     from getbat import StressCompiler, load_project_config, parse_tasks_from_sheet, DEFAULT_CONFIG
-    from analyze_log import StressLogAnalyzer
+    from analyze_log import StressLogAnalyzer, record_run, compare_with_previous
 except ImportError:
     st.error("❌ 缺少依赖文件！请确保 `getbat.py` 和 `analyze_log.py` 与本脚本在同一目录下。")
     st.stop()
@@ -268,53 +268,81 @@ with tab2:
 
         if st.button("📈 开始分析", type="primary"):
             analyzer = StressLogAnalyzer(tmp_log_path)
-            if analyzer.parse():
+            if analyzer.parse_cached():
                 d = analyzer.data
+                previous = compare_with_previous(record_run(analyzer))
 
                 # 1. 关键指标展示
                 st.markdown("### 📊 测试概览")
 
-                # [新增] 计算网络平均延迟
-                avg_ping = 0
-                valid_pings = [x[1] for x in d['net_records'] if x[1] < 1000]  # 排除超时(1000)
-                if valid_pings:
-                    avg_ping = int(sum(valid_pings) / len(valid_pings))
+                # 分位数草图 (超时的 Ping 已排除，单独计数)
+                sketches = analyzer.build_sketches()
+                ping = sketches["ping"].run.summary()
+                avg_ping = int(ping["mean"]) if ping["count"] else 0
 
                 c1, c2, c3, c4, c5 = st.columns(5)  # 改为5列
                 c1.metric("总执行动作", f"{d['total_actions']} Steps")
 
-                mem_vals = [m[1] for m in d['mem_records']]
-                max_mem = max(mem_vals) if mem_vals else 0
+                mem_vals = d['mem_records'].values
+                max_mem = int(mem_vals.max()) if len(mem_vals) else 0
                 c2.metric("内存峰值", f"{max_mem} MB")
 
                 c3.metric("平均 Ping", f"{avg_ping} ms")
                 c4.metric("网络超时", f"{d['net_failures']} 次", delta_color="inverse")
                 c5.metric("严重错误", sum(d['errors'].values()), delta_color="inverse")
 
+                quantile_rows = []
+                for name, label in (("ping", "Ping (ms)"), ("cpu", "CPU (%)"), ("mem", "内存 (MB)")):
+                    r = sketches[name].run.summary()
+                    if r["count"]:
+                        quantile_rows.append({"指标": label, "p50": round(r["p50"], 1), "p95": round(r["p95"], 1),
+                                               "p99": round(r["p99"], 1), "最大": round(r["max"], 1), "样本数": r["count"]})
+                if quantile_rows:
+                    st.dataframe(pd.DataFrame(quantile_rows), hide_index=True, use_container_width=True)
+
+                # 历史对比: 同一个包 (同一台设备) 的上一场
+                if previous:
+                    base, diff_rows = previous
+                    st.markdown(f"#### 🕒 与上一场对比 (#{base['id']} | 版本 {base['build'] or '-'} | {base['device'] or '-'})")
+                    st.dataframe(pd.DataFrame([{
+                        "指标": r["metric"], "统计": r["stat"], "上一场": round(r["base"], 1), "本次": round(r["current"], 1),
+                        "变化": f"{r['change']:+.1%}" if r["change"] is not None else "", "回归": "❌" if r["regression"] else "",
+                    } for r in diff_rows]), hide_index=True, use_container_width=True)
+                    regressions = sum(r["regression"] for r in diff_rows)
+                    if regressions:
+                        st.error(f"发现 {regressions} 项回归")
+                    else:
+                        st.success("没有指标回归")
+
                 # 2. 图表区域
                 st.markdown("#### 📉 趋势分析")
                 tab_mem, tab_net, tab_cpu, tab_temp = st.tabs(["内存", "网络", "CPU", "温度"])
 
                 with tab_mem:
                     if d['mem_records']:
-                        mem_df = pd.DataFrame(d['mem_records'], columns=["Time", "Memory(MB)"])
-                        st.line_chart(mem_df.set_index("Time"))
+                        mem_df = analyzer.range_index.query("mem").to_frame("Memory(MB)")
+                        st.line_chart(mem_df)
+                        trend = analyzer.analyze_trends()["mem"]
+                        if trend.verdict != "INSUFFICIENT":
+                            msg = (f"内存趋势: {trend.slope_per_hour:+.1f} MB/h，{trend.label} "
+                                   f"(置信度 {trend.confidence:.0%}，阶跃 {len(trend.change_points)} 次)")
+                            {"LEAK": st.error, "SUSPECT": st.warning}.get(trend.verdict, st.success)(msg)
                     else:
                         st.caption("暂无内存数据")
 
                 with tab_net:
                     if d['net_records']:
                         # [新增] 网络图表
-                        net_df = pd.DataFrame(d['net_records'], columns=["Time", "Latency(ms)"])
-                        st.line_chart(net_df.set_index("Time"))
+                        net_df = analyzer.range_index.query("net").to_frame("Latency(ms)")
+                        st.line_chart(net_df)
                     else:
                         st.caption("暂无网络数据 (请确保脚本运行超过 1 分钟)")
 
                 with tab_cpu:
                     if d.get('cpu_records'):
-                        cpu_df = pd.DataFrame(d['cpu_records'], columns=["Time", "CPU(%)"])
-                        st.line_chart(cpu_df.set_index("Time"))
-                        avg_cpu = sum([x[1] for x in d['cpu_records']]) / len(d['cpu_records'])
+                        cpu_df = analyzer.range_index.query("cpu").to_frame("CPU(%)")
+                        st.line_chart(cpu_df)
+                        avg_cpu = d['cpu_records'].values.mean()
                         st.info(f"平均 CPU 占用: {avg_cpu:.1f}% (注: 多核可能超过100%)")
                     else:
                         st.caption("暂无 CPU 数据")
@@ -322,9 +350,9 @@ with tab2:
 
                 with tab_temp:
                     if d.get('temp_records'):
-                        temp_df = pd.DataFrame(d['temp_records'], columns=["Time", "Temp(°C)"])
-                        st.line_chart(temp_df.set_index("Time"))
-                        max_temp = max([x[1] for x in d['temp_records']])
+                        temp_df = analyzer.range_index.query("temp").to_frame("Temp(°C)")
+                        st.line_chart(temp_df)
+                        max_temp = int(d['temp_records'].values.max())
                         if max_temp > 80:
                             st.error(f"🔥 历史最高温: {max_temp}°C")
                         else:
@@ -1,5 +1,6 @@
 import streamlit as st
 import os
+import datetime
 import sys
 import tempfile
 import pandas as pd
@@ -29,7 +30,9 @@ try:
 
     # 3. 尝试导入日志分析模块 (可选)
     try:
-        from analyze_log import StressLogAnalyzer
+        from analyze_log import StressLogAnalyzer, record_run, compare_with_previous
+        from src.downsample import DEFAULT_POINT_BUDGET
+        from src.series import parse_epoch
 
         HAS_ANALYZER = True
     except ImportError:
@@ -107,8 +110,8 @@ with tab1:
                 if st.button("🚀 立即编译并打包下载"):
                     compiler = StressCompiler(project)
                     sh_content = compiler.compile()
-                    bat_start,bat_stop=get_bat_content("stress_core.sh")
-                    zip_bytes = package_files_to_zip(sh_content, bat_start,bat_stop)
+                    bat_start,bat_stop,bat_resume=get_bat_content("stress_core.sh")
+                    zip_bytes = package_files_to_zip(sh_content, bat_start, bat_stop, bat_resume=bat_resume)
                     st.balloons()
                     st.success("🎉 编译完成！")
 
@@ -135,70 +138,129 @@ with tab2:
     else:
         st.markdown('<div class="sub-header">上传 event.log 生成报告</div>', unsafe_allow_html=True)
         uploaded_log = st.file_uploader("请上传压测产生的 event.log 文件", type=["log", "txt"])
+        opt1, opt2 = st.columns(2)
+        max_points = opt1.number_input("每张图最多点数 (降采样，保留峰值)", min_value=200, max_value=50000,
+                                       value=DEFAULT_POINT_BUDGET, step=200)
+        if opt2.checkbox("全分辨率 (不降采样，数据量大时会卡顿)"):
+            max_points = None
 
         if uploaded_log:
             with tempfile.NamedTemporaryFile(delete=False, suffix=".log") as tmp_log:
                 tmp_log.write(uploaded_log.getvalue())
                 tmp_log_path = tmp_log.name
 
+            # 分析结果留在 session_state 里: 拖动时间范围会让页面重跑，不能每次都重新解析
+            log_key = (uploaded_log.name, uploaded_log.size)
             if st.button("📈 开始分析", type="primary"):
                 analyzer = StressLogAnalyzer(tmp_log_path)
-                if analyzer.parse():
+                parsed = analyzer.parse_cached()
+                # 只在点按钮时记一次历史库，拖动时间范围引起的重跑不重复写入
+                run_id = record_run(analyzer) if parsed else None
+                st.session_state["log_analysis"] = (log_key, analyzer if parsed else None, compare_with_previous(run_id))
+
+            analysis = st.session_state.get("log_analysis")
+            if analysis and analysis[0] == log_key:
+                analyzer, previous = analysis[1], analysis[2]
+                if analyzer:
                     d = analyzer.data
 
                     # 1. 关键指标展示
                     st.markdown("### 📊 测试概览")
 
-                    # [新增] 计算网络平均延迟
-                    avg_ping = 0
-                    valid_pings = [x[1] for x in d['net_records'] if x[1] < 1000]  # 排除超时(1000)
-                    if valid_pings:
-                        avg_ping = int(sum(valid_pings) / len(valid_pings))
+                    # 分位数草图 (超时的 Ping 已排除，单独计数)
+                    sketches = analyzer.build_sketches()
+                    ping = sketches["ping"].run.summary()
+                    avg_ping = int(ping["mean"]) if ping["count"] else 0
 
                     c1, c2, c3, c4, c5 = st.columns(5)  # 改为5列
                     c1.metric("总执行动作", f"{d['total_actions']} Steps")
 
-                    mem_vals = [m[1] for m in d['mem_records']]
-                    max_mem = max(mem_vals) if mem_vals else 0
+                    mem_vals = d['mem_records'].values
+                    max_mem = int(mem_vals.max()) if len(mem_vals) else 0
                     c2.metric("内存峰值", f"{max_mem} MB")
 
                     c3.metric("平均 Ping", f"{avg_ping} ms")
                     c4.metric("网络超时", f"{d['net_failures']} 次", delta_color="inverse")
                     c5.metric("严重错误", sum(d['errors'].values()), delta_color="inverse")
 
+                    quantile_rows = []
+                    for name, label in (("ping", "Ping (ms)"), ("cpu", "CPU (%)"), ("mem", "内存 (MB)")):
+                        r = sketches[name].run.summary()
+                        if r["count"]:
+                            quantile_rows.append({"指标": label, "p50": round(r["p50"], 1), "p95": round(r["p95"], 1),
+                                                   "p99": round(r["p99"], 1), "最大": round(r["max"], 1), "样本数": r["count"]})
+                    if quantile_rows:
+                        st.dataframe(pd.DataFrame(quantile_rows), hide_index=True, use_container_width=True)
+
+                    # 历史对比: 同一个包 (同一台设备) 的上一场
+                    if previous:
+                        base, diff_rows = previous
+                        st.markdown(f"#### 🕒 与上一场对比 (#{base['id']} | 版本 {base['build'] or '-'} | {base['device'] or '-'})")
+                        st.dataframe(pd.DataFrame([{
+                            "指标": r["metric"], "统计": r["stat"], "上一场": round(r["base"], 1), "本次": round(r["current"], 1),
+                            "变化": f"{r['change']:+.1%}" if r["change"] is not None else "", "回归": "❌" if r["regression"] else "",
+                        } for r in diff_rows]), hide_index=True, use_container_width=True)
+                        regressions = sum(r["regression"] for r in diff_rows)
+                        if regressions:
+                            st.error(f"发现 {regressions} 项回归")
+                        else:
+                            st.success("没有指标回归")
+
                     # 2. 图表区域
                     st.markdown("#### 📉 趋势分析")
-                    tab_mem, tab_net, tab_cpu, tab_temp = st.tabs(["内存", "网络", "CPU", "温度"])
+
+                    # 时间范围下钻: 曲线从多粒度索引里取 (原始点 / 每分钟 / 10 分钟 / 1 小时)，不用重新过滤全部原始数据
+                    index = analyzer.range_index
+                    t_start = t_end = None
+                    if d["start_epoch"] is not None and d["end_epoch"] > d["start_epoch"]:
+                        first, last = (datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=d[k])
+                                       for k in ("start_epoch", "end_epoch"))
+                        picked = st.slider("时间范围", min_value=first, max_value=last, value=(first, last),
+                                           step=datetime.timedelta(minutes=1), format="MM-DD HH:mm")
+                        t_start, t_end = (parse_epoch(p.strftime("%Y-%m-%d %H:%M:%S")) for p in picked)
+
+                    def range_frame(metric, label):
+                        view = index.query(metric, t_start, t_end, max_points)
+                        if view.level:
+                            st.caption(f"点数超过上限，按每 {view.level // 60} 分钟聚合 (均值 / 最小 / 最大)")
+                        return view.to_frame(label)
+
+                    tab_mem, tab_net, tab_cpu, tab_temp, tab_rec = st.tabs(["内存", "网络", "CPU", "温度", "ANR 自救"])
 
                     with tab_mem:
                         if d['mem_records']:
-                            mem_df = pd.DataFrame(d['mem_records'], columns=["Time", "Memory(MB)"])
-                            st.line_chart(mem_df.set_index("Time"))
+                            mem_df = range_frame("mem", "Memory(MB)")
+                            st.line_chart(mem_df)
+                            trend = analyzer.analyze_trends()["mem"]
+                            if trend.verdict != "INSUFFICIENT":
+                                msg = (f"内存趋势: {trend.slope_per_hour:+.1f} MB/h，{trend.label} "
+                                       f"(置信度 {trend.confidence:.0%}，阶跃 {len(trend.change_points)} 次)")
+                                {"LEAK": st.error, "SUSPECT": st.warning}.get(trend.verdict, st.success)(msg)
                         else:
                             st.caption("暂无内存数据")
 
                     with tab_net:
                         if d['net_records']:
                             # [新增] 网络图表
-                            net_df = pd.DataFrame(d['net_records'], columns=["Time", "Latency(ms)"])
-                            st.line_chart(net_df.set_index("Time"))
+                            net_df = range_frame("net", "Latency(ms)")
+                            st.line_chart(net_df)
                         else:
                             st.caption("暂无网络数据 (请确保脚本运行超过 1 分钟)")
 
                     with tab_cpu:
                         if d.get('cpu_records'):
-                            cpu_df = pd.DataFrame(d['cpu_records'], columns=["Time", "CPU(%)"])
-                            st.line_chart(cpu_df.set_index("Time"))
-                            avg_cpu = sum([x[1] for x in d['cpu_records']]) / len(d['cpu_records'])
+                            cpu_df = range_frame("cpu", "CPU(%)")
+                            st.line_chart(cpu_df)
+                            avg_cpu = d['cpu_records'].values.mean()
                             st.info(f"平均 CPU 占用: {avg_cpu:.1f}% (注: 多核可能超过100%)")
                         else:
                             st.caption("暂无 CPU 数据")
 
                     with tab_temp:
                         if d.get('temp_records'):
-                            temp_df = pd.DataFrame(d['temp_records'], columns=["Time", "Temp(°C)"])
-                            st.line_chart(temp_df.set_index("Time"))
-                            max_temp = max([x[1] for x in d['temp_records']])
+                            temp_df = range_frame("temp", "Temp(°C)")
+                            st.line_chart(temp_df)
+                            max_temp = int(d['temp_records'].values.max())
                             if max_temp > 80:
                                 st.error(f"🔥 历史最高温: {max_temp}°C")
                             else:
@@ -206,17 +268,41 @@ with tab2:
                         else:
                             st.caption("暂无温度数据")
 
+                    with tab_rec:
+                        if d.get('recovery_records'):
+                            rec_df = range_frame("recovery", "Recovery(ms)")[["Recovery(ms)"]]
+                            st.bar_chart(rec_df)
+                            avg_rec = d['recovery_records'].values.mean()
+                            st.info(f"平均恢复耗时: {avg_rec:.0f} ms | 超时 {d['recovery_failures']} 次")
+                        else:
+                            st.caption("暂无 ANR 自救记录")
+
+                    # 2.5 节奏控制
+                    pace_summary = analyzer.get_pace_summary()
+                    if pace_summary:
+                        st.markdown("#### ⏲️ 节奏控制")
+                        pace_df = pd.DataFrame([
+                            {"Sheet": k, "目标 APM": v["target"], "实际 APM": v["actual"], "步数": v["steps"]}
+                            for k, v in pace_summary.items()
+                        ])
+                        st.dataframe(pace_df, hide_index=True, use_container_width=True)
+
                     # 3. 异常分布
                     st.markdown("#### 🚫 异常分布")
                     if d['errors']:
                         err_df = pd.DataFrame(list(d['errors'].items()), columns=["类型", "次数"])
                         st.dataframe(err_df, hide_index=True, use_container_width=True)
+                        errors = index.query(index.ERRORS, t_start, t_end, max_points)
+                        if len(errors):
+                            st.caption(f"所选时间范围内每 {errors.level // 60} 分钟的错误数")
+                            st.bar_chart(pd.DataFrame({"错误数": errors.count},
+                                                      index=pd.Index(errors.epochs.view("datetime64[s]"), name="Time")))
                     else:
                         st.success("🎉 太棒了！日志中未发现严重错误。")
 
                     # 4. HTML 报告下载
                     report_path = os.path.join(tempfile.gettempdir(), "stress_report.html")
-                    analyzer.generate_html(report_path)
+                    analyzer.generate_html(report_path, max_points=max_points)
                     with open(report_path, "rb") as f:
                         st.download_button(
                             label="📄 下载完整 HTML 报告 (含交互图表)",
@@ -224,6 +310,17 @@ with tab2:
                             file_name=f"Report_{d.get('target_pkg', 'stress')}.html",
                             mime="text/html"
                         )
+
+                    # 5. 全分辨率原始数据
+                    csv_path = os.path.join(tempfile.gettempdir(), "stress_series.csv")
+                    analyzer.export_series_csv(csv_path)
+                    with open(csv_path, "rb") as f:
+                        st.download_button(
+                            label="📑 下载全分辨率监控数据 (CSV)",
+                            data=f,
+                            file_name=f"Series_{d.get('target_pkg', 'stress')}.csv",
+                            mime="text/csv"
+                        )
                 else:
                     st.error("日志解析失败，请确认文件格式正确。")
             os.unlink(tmp_log_path)